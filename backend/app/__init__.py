@@ -2,12 +2,18 @@ from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
 from app.models.data_models import db
+import atexit
 import os
+import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
-from app.scheduler import insert_weather_record
+from app.scheduler import insert_weather_record, store_held_readings
 from dotenv import load_dotenv
 from prometheus_flask_exporter import PrometheusMetrics
 from flask_caching import Cache
+from app.core.config import (
+    CACHE_PREWARM_INTERVAL, SEISMIC_LOCAL_STORE, SEISMIC_INGEST_INTERVAL, RETENTION_INTERVAL,
+    REDIS_URL, SCHEDULER_MODE, SOCKETIO_MESSAGE_QUEUE, SOCKETIO_CHANNEL
+)
 
 load_dotenv()
 
@@ -19,15 +25,54 @@ metrics = PrometheusMetrics.for_app_factory()
 
 # Configuración de caché
 cache = Cache(config={
-    'CACHE_TYPE': 'redis' if os.environ.get('REDIS_URL') else 'simple',
-    'CACHE_REDIS_URL': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+    'CACHE_TYPE': 'redis' if REDIS_URL else 'simple',
+    'CACHE_REDIS_URL': REDIS_URL or 'redis://localhost:6379/0',
     'CACHE_DEFAULT_TIMEOUT': 300  # 5 minutos
 })
 
+def start_scheduler(app):
+    """Arranca las tareas programadas; con SCHEDULER_MODE=leader solo corren en el líder."""
+    elector = None
+    shared = lambda fn: fn
+    if SCHEDULER_MODE == 'leader':
+        from app.services.leader import create_elector
+        elector = create_elector(app).start()
+        # Al salir limpiamente se libera la concesión para que otro proceso la tome ya
+        atexit.register(elector.stop)
+        shared = elector.leader_only
+        app.config['LEADER_ELECTOR'] = elector
+
+    scheduler = BackgroundScheduler()
+    # Uso de lambda para pasar la app y garantizar el contexto adecuado
+    scheduler.add_job(func=shared(lambda: insert_weather_record(app)), trigger="interval", seconds=60)
+    # Precalentar las claves de caché más consultadas antes de que venzan. Corre en todos
+    # los procesos: las claves frecuentes se registran en cada uno. Con Redis, una clave que
+    # ya refrescó otro worker está fresca y no se vuelve a pedir al upstream (ver _load)
+    from app.utils.swr_cache import prewarm_caches
+    scheduler.add_job(func=lambda: prewarm_caches(app), trigger="interval", seconds=CACHE_PREWARM_INTERVAL)
+    # Ingesta incremental del feed de USGS al almacén local de sismos
+    if SEISMIC_LOCAL_STORE:
+        from app.services.seismic_service import ingest_seismic_events
+        scheduler.add_job(func=shared(lambda: ingest_seismic_events(app)), trigger="interval",
+                          seconds=SEISMIC_INGEST_INTERVAL, next_run_time=datetime.datetime.now())
+    # Purga de datos vencidos según las políticas de retención
+    from app.services.retention import purge_expired
+    scheduler.add_job(func=shared(lambda: purge_expired(app)), trigger="interval", seconds=RETENTION_INTERVAL,
+                      max_instances=1, coalesce=True)
+    scheduler.start()
+    app.config['SCHEDULER'] = scheduler
+    print(f"Scheduler started ({SCHEDULER_MODE} mode).")
+    return scheduler
+
 def create_app():
     app = Flask(__name__)
     CORS(app)
     app.config.from_object('app.core.config')
+    # jsonify con orjson (si está disponible) y compresión negociada de las respuestas
+    from app.utils.serialization import FastJSONProvider
+    from app.utils.response_compression import init_response_compression
+    app.json = FastJSONProvider(app)
+    init_response_compression(app)
     
     # Inicializar caché
     cache.init_app(app)
@@ -38,16 +83,20 @@ def create_app():
     # Definir algunas métricas personalizadas
     metrics.info('app_info', 'Application info', version='1.0.0')
     
-    # Inicializar SocketIO con la app
-    socketio.init_app(app)
-    
     # Configurar eventos de SocketIO (importación tardía para evitar importación circular)
     from app import events
+    # Inicializar SocketIO con la app; con cola de mensajes las emisiones de cualquier
+    # proceso (workers, réplicas, scheduler) llegan a todos los clientes. El módulo json
+    # mide los bytes de cada paquete codificado
+    socketio.init_app(app, message_queue=SOCKETIO_MESSAGE_QUEUE, channel=SOCKETIO_CHANNEL,
+                      json=events.MeasuredJSON)
     events.setup_socketio(socketio)
     events.register_socketio_events(socketio)
     
-    # Inicializar la base de datos con la app
+    # Inicializar la base de datos con la app y ajustar el motor (PRAGMAs de SQLite, pool)
     db.init_app(app)
+    from app.core.storage import configure_storage
+    configure_storage(app)
     
     # Importación tardía de blueprints para evitar importación circular
     from app.api.routes import api_bp    # Endpoints para clima y sismos
@@ -59,42 +108,13 @@ def create_app():
     app.register_blueprint(users_bp, url_prefix='/api/users')
     app.register_blueprint(database_bp, url_prefix='/api/database')
     
-    # Solo iniciar el scheduler en el proceso principal,
-    # ya que 'WERKZEUG_RUN_MAIN' se establece solo en el proceso hijo que ejecuta la app
-    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
-        scheduler = BackgroundScheduler()
-        # Uso de lambda para pasar la app y garantizar el contexto adecuado
-        scheduler.add_job(func=lambda: insert_weather_record(app), trigger="interval", seconds=60)
-        scheduler.start()
-        app.config['SCHEDULER'] = scheduler
-        print("Scheduler started.")
-    
-    return app
+    # En modo 'auto' solo se inicia en el proceso hijo del recargador de desarrollo
+    # ('WERKZEUG_RUN_MAIN' solo se establece ahí); en modo 'leader' en todos los procesos,
+    # con las tareas restringidas al que tenga la concesión
+    if SCHEDULER_MODE == 'leader' or (SCHEDULER_MODE == 'auto' and os.environ.get("WERKZEUG_RUN_MAIN") == "true"):
+        start_scheduler(app)
 
-# Eventos de SocketIO
-@socketio.on('connect')
-def handle_connect():
-    print('Cliente conectado a SocketIO')
-
-@socketio.on('disconnect')
-def handle_disconnect():
-    print('Cliente desconectado de SocketIO')
-
-# Funciones para emitir eventos
-def notify_weather_update(data):
-    """Emite una actualización de clima a todos los clientes conectados"""
-    socketio.emit('weather_update', data)
-
-def notify_database_change(record_type, action, data):
-    """Emite una actualización de la base de datos a todos los clientes conectados
+    # Con el estado de compresión en memoria, las lecturas retenidas se guardan al salir
+    atexit.register(store_held_readings, app)
     
-    Parameters:
-    - record_type: El tipo de registro (weather, seismic, etc.)
-    - action: La acción realizada (create, update, delete)
-    - data: Los datos asociados con la acción
-    """
-    socketio.emit('database_update', {
-        'record_type': record_type,
-        'action': action,
-        'data': data
-    })
+    return app
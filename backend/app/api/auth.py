@@ -1,7 +1,71 @@
+import hashlib
+import threading
+import time
 import jwt
+from collections import OrderedDict
 from functools import wraps
 from flask import request, jsonify
-from app.core.config import SECRET_KEY
+from app.core.config import SECRET_KEY, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
+from app.core.metrics import TOKEN_VERIFY_SECONDS
+
+class VerifiedTokenCache:
+    """
+    Caché LRU acotada de JWT ya verificados, indexada por el SHA-256 del token.
+    Cada entrada vence al expirar el token o tras `ttl` segundos, lo que ocurra antes.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user_id
+
+    def put(self, token, user_id, exp=None):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+token_cache = VerifiedTokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+def decode_token(token):
+    """Verifica un JWT y devuelve el user_id que contiene. Lanza excepción si no es válido."""
+    started = time.perf_counter()
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        TOKEN_VERIFY_SECONDS.labels('cached').observe(time.perf_counter() - started)
+        return user_id
+    try:
+        data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        user_id = data['user_id']
+    except Exception:
+        TOKEN_VERIFY_SECONDS.labels('invalid').observe(time.perf_counter() - started)
+        raise
+    token_cache.put(token, user_id, data.get('exp'))
+    TOKEN_VERIFY_SECONDS.labels('verified').observe(time.perf_counter() - started)
+    return user_id
 
 def token_required(f):
     @wraps(f)
@@ -15,8 +79,7 @@ def token_required(f):
         if not token:
             return jsonify({'message': 'Token is missing!'}), 401
         try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            current_user_id = data['user_id']
+            current_user_id = decode_token(token)
         except Exception as e:
             return jsonify({'message': 'Token is invalid!'}), 401
         return f(current_user_id, *args, **kwargs)
@@ -1,76 +1,436 @@
+import csv
+import io
 import json
-from flask import Blueprint, request, jsonify
+import zlib
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from sqlalchemy import and_, or_
+from app import cache
 from app.api.auth import token_required
-from app.models.data_models import db, Record
-from datetime import datetime
+from app.models.data_models import db, Record, RecordRollup, TYPED_METRIC_COLUMNS, typed_metric_values
+from app.services.rollup_service import BUCKETS, update_rollups
+from app.services.compression import compressor
+from app.services.change_feed import (
+    changes_since, insert_records, oldest_sequence, record_changes, user_version
+)
+from datetime import datetime, timezone
 from app.events import notify_database_change
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.etag import conditional, not_modified, version_etag, with_etag
+from app.utils.serialization import RawJSON, dumps
+from app.utils.result_cache import record_query_cache
+from app.utils.downsampling import lttb
+from app.utils.streaming_json import iter_ndjson, iter_json_array
+from app.core.config import BULK_BATCH_SIZE, BULK_MAX_ERRORS, EXPORT_CHUNK_SIZE, CHANGE_FEED_MAX_LIMIT
 
 database_bp = Blueprint('database', __name__)
 
+# Tiempo que se reutiliza un total de registros cuando se pide count=estimate
+ESTIMATED_COUNT_TIMEOUT = 60
+
+def parse_record_filters(args):
+    """
+    Normaliza los filtros comunes de los endpoints de registros: tipo, rango de fechas
+    y rangos sobre métricas tipadas (`min_<métrica>` / `max_<métrica>`, por ejemplo
+    `min_temperatura=28`). Lanza ValueError si algún parámetro no es válido.
+    """
+    filters = {'record_type': args.get('record_type', None), 'start': None, 'end': None, 'metrics': []}
+    for metric in TYPED_METRIC_COLUMNS:
+        for prefix in ('min', 'max'):
+            name = f'{prefix}_{metric}'
+            value = args.get(name, None)
+            if value is None:
+                continue
+            try:
+                filters['metrics'].append((metric, prefix, float(value)))
+            except ValueError as e:
+                raise ValueError(f'{name} must be a number')
+    # Filtros de fecha (formato ISO, por ejemplo "2025-04-01")
+    for name, key in (('start_date', 'start'), ('end_date', 'end')):
+        value = args.get(name, None)
+        if value:
+            try:
+                filters[key] = datetime.strptime(value, "%Y-%m-%d")
+            except Exception as e:
+                raise ValueError(f'{name} format must be YYYY-MM-DD')
+    return filters
+
+def filtered_records_query(user_id, filters):
+    """Construye la consulta de registros del usuario aplicando los filtros normalizados."""
+    query = Record.query.filter_by(user_id=user_id)
+    if filters['record_type']:
+        query = query.filter_by(record_type=filters['record_type'])
+    if filters['start']:
+        query = query.filter(Record.timestamp >= filters['start'])
+    if filters['end']:
+        query = query.filter(Record.timestamp <= filters['end'])
+    for metric, prefix, value in filters['metrics']:
+        column = getattr(Record, metric)
+        query = query.filter(column >= value if prefix == 'min' else column <= value)
+    return query
+
+def _count_records(query, user_id, filters, mode):
+    """Cuenta los registros según el modo pedido: 'exact', 'estimate' (cacheado) o 'none'."""
+    if mode == 'none':
+        return None
+    if mode == 'estimate':
+        key = 'records_count:{}:{}:{}:{}:{}'.format(
+            user_id, filters['record_type'] or '',
+            filters['start'].isoformat() if filters['start'] else '',
+            filters['end'].isoformat() if filters['end'] else '',
+            ','.join(f'{metric}{prefix}{value}' for metric, prefix, value in filters['metrics']))
+        total = cache.get(key)
+        if total is None:
+            total = query.order_by(None).count()
+            cache.set(key, total, timeout=ESTIMATED_COUNT_TIMEOUT)
+        return total
+    return query.order_by(None).count()
+
+def _serialize_record(record):
+    # `data` ya es JSON: se incrusta tal cual, sin decodificarlo ni volver a codificarlo
+    return {
+        'id': record.id,
+        'record_type': record.record_type,
+        'data': RawJSON(record.data),
+        'timestamp': record.timestamp.isoformat()
+    }
+
 @database_bp.route('/records', methods=['GET'])
 @token_required
 def get_records(current_user_id):
+    """
+    Lista los registros del usuario, del más reciente al más antiguo.
+
+    Admite dos modos de paginación:
+    - Por página (`page`, `per_page`), compatible con el comportamiento anterior.
+    - Por cursor (`after=<next_cursor>`), que busca directamente en el índice sin OFFSET.
+      La primera página del modo cursor se pide con `after=` vacío.
+
+    El parámetro `count` controla el total: 'exact' (por defecto en modo página),
+    'estimate' (total cacheado unos segundos) o 'none' (por defecto en modo cursor).
+
+    El ETag depende de la última secuencia del feed de cambios del usuario: si no hubo
+    cambios desde la versión que tiene el cliente se responde 304 sin consultar la página.
+    Las páginas ya servidas se reutilizan desde la caché de resultados mientras la
+    versión no cambie.
+    """
+    # La misma versión identifica el ETag y la entrada de la caché de resultados
+    version = user_version(current_user_id)
+    etag = version_etag('records', current_user_id, version, request.query_string.decode())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
     # Parámetros de paginación con valores por defecto
-    page = request.args.get('page', 1, type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
     per_page = request.args.get('per_page', 10, type=int)
-    
-    # Filtro por tipo de registro
-    record_type = request.args.get('record_type', None)
-    
-    # Filtros de fecha (formato ISO, por ejemplo "2025-04-01")
-    start_date = request.args.get('start_date', None)
-    end_date = request.args.get('end_date', None)
-    
-    # Construir la consulta inicial para el usuario actual
-    query = Record.query.filter_by(user_id=current_user_id)
-    
-    # Filtrar por tipo de registro si se proporciona
-    if record_type:
-        query = query.filter_by(record_type=record_type)
-    
-    # Filtrar por rango de fecha, si se proporcionan
-    if start_date:
-        try:
-            # Convierte a datetime, asumiendo formato ISO (YYYY-MM-DD)
-            start_datetime = datetime.strptime(start_date, "%Y-%m-%d")
-            query = query.filter(Record.timestamp >= start_datetime)
-        except Exception as e:
-            return jsonify({'error': 'start_date format must be YYYY-MM-DD'}), 400
-    if end_date:
+    if per_page < 1:
+        per_page = 10
+    after = request.args.get('after', None)
+    cursor_mode = after is not None
+    count_mode = request.args.get('count', 'none' if cursor_mode else 'exact')
+    if count_mode not in ('exact', 'estimate', 'none'):
+        return jsonify({'error': 'count must be one of exact, estimate, none'}), 400
+
+    try:
+        filters = parse_record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    record_type = filters['record_type']
+    after_key = None
+    if after:
         try:
-            end_datetime = datetime.strptime(end_date, "%Y-%m-%d")
-            query = query.filter(Record.timestamp <= end_datetime)
-        except Exception as e:
-            return jsonify({'error': 'end_date format must be YYYY-MM-DD'}), 400
-    
-    # Ordenar los registros (ejemplo: timestamp descendente)
-    query = query.order_by(Record.timestamp.desc())
-    
-    # Aplicar paginación
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-    records_list = [{
-        'id': record.id,
-        'record_type': record.record_type,
-        'data': record.data,
-        'timestamp': record.timestamp.isoformat()
-    } for record in pagination.items]
+            after_key = decode_cursor(after)
+        except ValueError as e:
+            return jsonify({'error': 'after must be a cursor returned by a previous page'}), 400
+
+    def query_page():
+        # Construir la consulta inicial para el usuario actual
+        query = filtered_records_query(current_user_id, filters)
+        total = _count_records(query, current_user_id, filters, count_mode)
+
+        # Ordenar los registros por timestamp descendente (id como desempate para el cursor)
+        query = query.order_by(Record.timestamp.desc(), Record.id.desc())
+
+        if cursor_mode:
+            if after_key:
+                after_timestamp, after_id = after_key
+                query = query.filter(or_(
+                    Record.timestamp < after_timestamp,
+                    and_(Record.timestamp == after_timestamp, Record.id < after_id)
+                ))
+            # Se pide un registro extra para saber si hay más páginas sin contar
+            items = query.limit(per_page + 1).all()
+            has_more = len(items) > per_page
+            items = items[:per_page]
+            next_cursor = encode_cursor(items[-1].timestamp, items[-1].id) if has_more else None
+            pages = None
+        else:
+            items = query.offset((page - 1) * per_page).limit(per_page).all()
+            next_cursor = None
+            pages = -(-total // per_page) if total is not None else None
+
+        # Se guarda el cuerpo ya serializado: un acierto no consulta ni serializa nada
+        return len(items), dumps({
+            'user_id': current_user_id,
+            'records': [_serialize_record(record) for record in items],
+            'total': total,
+            'pages': pages,
+            'page': None if cursor_mode else page,
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        }) + b'\n'
+
+    # Resultado cacheado por usuario, versión y filtros normalizados; cualquier escritura
+    # del usuario cambia la versión (ver app/utils/result_cache.py)
+    count, body = record_query_cache.get_or_compute(current_user_id, version, {
+        'record_type': record_type or '',
+        'start': filters['start'].isoformat() if filters['start'] else '',
+        'end': filters['end'].isoformat() if filters['end'] else '',
+        'metrics': sorted(filters['metrics']),
+        'page': None if cursor_mode else page,
+        'per_page': per_page,
+        'after': after if cursor_mode else None,
+        'count': count_mode
+    }, query_page)
 
     # Notificar sobre la consulta realizada
     notify_database_change("query", "read", {
         'user_id': current_user_id,
         'record_type': record_type,
-        'count': len(records_list),
+        'count': count,
         'page': page
     })
 
-    return jsonify({
+    return with_etag(Response(body, mimetype='application/json'), etag)
+
+@database_bp.route('/records/changes', methods=['GET'])
+@token_required
+def get_record_changes(current_user_id):
+    """
+    Altas y bajas de registros del usuario posteriores a la secuencia `since`, en orden.
+    Las bajas llegan como lápidas {'id', 'deleted': true} y las purgas por retención como
+    {'action': 'purge', 'record_type', 'before', 'deleted': true}. Sin `since` solo se devuelve
+    la secuencia actual, para empezar a seguir el feed. Si `since` es anterior a los
+    cambios conservados se responde 410 y el cliente debe recargar los registros.
+    """
+    limit = min(max(request.args.get('limit', 500, type=int), 1), CHANGE_FEED_MAX_LIMIT)
+    since = request.args.get('since', None)
+    if since is None or since == '':
+        return jsonify({'changes': [], 'next_since': str(user_version(current_user_id)), 'has_more': False})
+    try:
+        since = int(since)
+    except ValueError as e:
+        return jsonify({'error': 'since must be a sequence returned by a previous call'}), 400
+
+    oldest = oldest_sequence()
+    if oldest is not None and since < oldest - 1:
+        return jsonify({'error': 'since is older than the retained change feed; reload records'}), 410
+
+    changes, last_seq, has_more = changes_since(current_user_id, since, limit)
+    for change in changes:
+        if 'record' in change:
+            change['record'] = _serialize_record(change['record'])
+    return jsonify({'changes': changes, 'next_since': str(last_seq), 'has_more': has_more})
+
+# Máximo de buckets devueltos por /records/aggregate
+MAX_AGGREGATE_BUCKETS = 5000
+
+@database_bp.route('/records/aggregate', methods=['GET'])
+@token_required
+def get_records_aggregate(current_user_id):
+    """
+    Devuelve min/max/avg/count/last de una métrica por bucket de tiempo, leyendo
+    de los rollups mantenidos incrementalmente en lugar de los registros crudos.
+    """
+    bucket = request.args.get('bucket', '1h')
+    metric = request.args.get('metric', None)
+    if bucket not in BUCKETS:
+        return jsonify({'error': 'bucket must be one of ' + ', '.join(BUCKETS)}), 400
+    if not metric:
+        return jsonify({'error': 'metric is required'}), 400
+    try:
+        filters = parse_record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    record_type = filters['record_type'] or 'weather'
+
+    query = RecordRollup.query.filter_by(
+        user_id=current_user_id, record_type=record_type, metric=metric, bucket=bucket)
+    if filters['start']:
+        query = query.filter(RecordRollup.bucket_start >= filters['start'])
+    if filters['end']:
+        query = query.filter(RecordRollup.bucket_start <= filters['end'])
+    rollups = query.order_by(RecordRollup.bucket_start.desc()).limit(MAX_AGGREGATE_BUCKETS).all()
+
+    # Los rollups cambian también con lecturas que la compresión no guarda: ETag por contenido
+    return conditional(jsonify({
         'user_id': current_user_id,
-        'records': records_list,
-        'total': pagination.total,
-        'pages': pagination.pages,
-        'page': pagination.page,
-        'per_page': pagination.per_page
-    })
+        'record_type': record_type,
+        'metric': metric,
+        'bucket': bucket,
+        'buckets': [{
+            'bucket_start': rollup.bucket_start.isoformat(),
+            'min': rollup.min_value,
+            'max': rollup.max_value,
+            'avg': rollup.sum_value / rollup.count,
+            'count': rollup.count,
+            'last': rollup.last_value
+        } for rollup in reversed(rollups)]
+    }))
+
+# Puntos por defecto y máximos de /records/series
+SERIES_DEFAULT_POINTS = 500
+SERIES_MAX_POINTS = 5000
+
+@database_bp.route('/records/series', methods=['GET'])
+@token_required
+def get_records_series(current_user_id):
+    """
+    Serie de una métrica tipada en formato columnar para gráficos: `t` (epoch en ms,
+    orden cronológico) y `v`, reducida con LTTB a como mucho `points` puntos sobre el
+    rango pedido. Admite los mismos filtros que /records; `record_type` por defecto es
+    'weather'. El tamaño de la respuesta no depende de la longitud del rango.
+    """
+    metric = request.args.get('metric', None)
+    if metric not in TYPED_METRIC_COLUMNS:
+        return jsonify({'error': 'metric must be one of ' + ', '.join(TYPED_METRIC_COLUMNS)}), 400
+    points = request.args.get('points', SERIES_DEFAULT_POINTS, type=int)
+    if points < 3 or points > SERIES_MAX_POINTS:
+        return jsonify({'error': f'points must be between 3 and {SERIES_MAX_POINTS}'}), 400
+    try:
+        filters = parse_record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filters['record_type'] = filters['record_type'] or 'weather'
+
+    version = user_version(current_user_id)
+    etag = version_etag('series', current_user_id, version, request.query_string.decode())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+
+    def query_series():
+        column = getattr(Record, metric)
+        # Solo las dos columnas necesarias, sin cargar `data` ni construir objetos Record
+        rows = filtered_records_query(current_user_id, filters).filter(column.isnot(None)).with_entities(
+            Record.timestamp, column).order_by(Record.timestamp.asc(), Record.id.asc()).all()
+        epoch = datetime(1970, 1, 1)
+        t = [(timestamp - epoch).total_seconds() for timestamp, _ in rows]
+        v = [value for _, value in rows]
+        indexes = lttb(t, v, points)
+        return len(indexes), dumps({
+            'user_id': current_user_id,
+            'record_type': filters['record_type'],
+            'metric': metric,
+            'total': len(rows),
+            'points': len(indexes),
+            't': [int(t[i] * 1000) for i in indexes],
+            'v': [v[i] for i in indexes]
+        }) + b'\n'
+
+    _, body = record_query_cache.get_or_compute(current_user_id, version, {
+        'series': metric,
+        'record_type': filters['record_type'],
+        'start': filters['start'].isoformat() if filters['start'] else '',
+        'end': filters['end'].isoformat() if filters['end'] else '',
+        'metrics': sorted(filters['metrics']),
+        'points': points
+    }, query_series)
+    return with_etag(Response(body, mimetype='application/json'), etag)
+
+# Tamaño a partir del cual se envía un trozo de la exportación
+EXPORT_FLUSH_BYTES = 64 * 1024
+EXPORT_CSV_COLUMNS = ('id', 'timestamp', 'record_type', 'data') + TYPED_METRIC_COLUMNS
+
+def _iter_export_rows(user_id, filters):
+    """
+    Recorre los registros filtrados en orden cronológico por lotes con búsqueda por
+    cursor (timestamp, id). Cada lote es una consulta corta: la transacción se cierra
+    antes de entregar sus filas, así nunca queda abierta mientras el cliente lee.
+    """
+    columns = [Record.id, Record.timestamp, Record.record_type, Record.data] + \
+        [getattr(Record, metric) for metric in TYPED_METRIC_COLUMNS]
+    last = None
+    while True:
+        query = filtered_records_query(user_id, filters).with_entities(*columns)
+        if last is not None:
+            query = query.filter(or_(
+                Record.timestamp > last[0],
+                and_(Record.timestamp == last[0], Record.id > last[1])
+            ))
+        rows = query.order_by(Record.timestamp.asc(), Record.id.asc()).limit(EXPORT_CHUNK_SIZE).all()
+        db.session.rollback()
+        for row in rows:
+            yield row
+        if len(rows) < EXPORT_CHUNK_SIZE:
+            return
+        last = (rows[-1].timestamp, rows[-1].id)
+
+def _ndjson_line(row):
+    # `data` ya es JSON: se incrusta tal cual, sin decodificar y volver a codificar
+    return '{{"id":{},"record_type":{},"timestamp":{},"data":{}}}\n'.format(
+        row.id, json.dumps(row.record_type), json.dumps(row.timestamp.isoformat()), row.data or 'null')
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    for row in rows:
+        writer.writerow([row.id, row.timestamp.isoformat(), row.record_type, row.data] +
+                        [getattr(row, metric) for metric in TYPED_METRIC_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+def _chunked(lines, gzip_stream=None):
+    """Agrupa las líneas en trozos de ~64 KiB y, si se pide, los comprime con gzip en streaming."""
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= EXPORT_FLUSH_BYTES:
+            data = ''.join(pending).encode('utf-8')
+            pending, size = [], 0
+            data = gzip_stream.compress(data) if gzip_stream else data
+            if data:
+                yield data
+    data = ''.join(pending).encode('utf-8')
+    if gzip_stream:
+        data = gzip_stream.compress(data) + gzip_stream.flush()
+    if data:
+        yield data
+
+@database_bp.route('/records/export', methods=['GET'])
+@token_required
+def export_records(current_user_id):
+    """
+    Exporta el historial del usuario (mismos filtros que GET /records) en streaming,
+    como NDJSON (`format=ndjson`, por defecto) o CSV (`format=csv`). La respuesta se
+    comprime con gzip si el cliente lo acepta (o con `gzip=true`; `gzip=false` lo desactiva).
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+    try:
+        filters = parse_record_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    gzip_param = request.args.get('gzip', 'auto').lower()
+    use_gzip = gzip_param == 'true' or (gzip_param == 'auto' and 'gzip' in request.accept_encodings)
+
+    rows = _iter_export_rows(current_user_id, filters)
+    lines = (_ndjson_line(row) for row in rows) if export_format == 'ndjson' else _csv_lines(rows)
+    gzip_stream = zlib.compressobj(6, zlib.DEFLATED, 31) if use_gzip else None
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+
+    response = Response(stream_with_context(_chunked(lines, gzip_stream)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=records-{current_user_id}.{export_format}'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if use_gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 @database_bp.route('/records', methods=['POST'])
 @token_required
@@ -81,28 +441,167 @@ def add_record(current_user_id):
     if not record_type or not record_data:
         return jsonify({'error': 'record_type and data are required'}), 400
     
+    reading = (current_user_id, record_type, datetime.utcnow(), record_data)
+    # La compresión de series puede descartar la lectura o guardar la retenida anterior
+    stored = compressor.compress([reading])
     try:
-        new_record = Record(
-            record_type=record_type,
-            data=json.dumps(record_data),
-            user_id=current_user_id,
-            timestamp=datetime.utcnow()
-        )
-        db.session.add(new_record)
+        # `stored` puede incluir lecturas retenidas de otras series (expulsadas del LRU)
+        new_records = [Record(
+            record_type=stored_type,
+            data=json.dumps(stored_data),
+            user_id=stored_user_id,
+            timestamp=stored_at,
+            **typed_metric_values(stored_type, stored_data)
+        ) for stored_user_id, stored_type, stored_at, stored_data in stored]
+        db.session.add_all(new_records)
+        db.session.flush()
+        record_changes('create', [(record.id, record.user_id, record.record_type) for record in new_records])
+        update_rollups([reading])
         db.session.commit()
-        
-        # Emitir evento de creación de registro
-        notify_database_change(record_type, "create", {
-            'id': new_record.id,
-            'user_id': current_user_id,
-            'timestamp': new_record.timestamp.isoformat()
-        })
-        
-        return jsonify({'message': 'Record added successfully.', 'id': new_record.id}), 201
     except Exception as e:
         db.session.rollback()
+        compressor.forget([reading])
         return jsonify({'error': f'Error adding record: {str(e)}'}), 500
 
+    # Emitir evento de creación de registro
+    for new_record in new_records:
+        notify_database_change(new_record.record_type, "create", {
+            'id': new_record.id,
+            'user_id': new_record.user_id,
+            'timestamp': new_record.timestamp.isoformat()
+        })
+
+    current = next((r for r in new_records if r.user_id == current_user_id and r.timestamp == reading[2]), None)
+    if current is None:
+        if compressor.holds(reading):
+            # Última lectura de la serie: se guardará cuando llegue la siguiente o al salir el proceso
+            return jsonify({'message': 'Record accepted; held by series compression and not stored yet.',
+                            'id': None, 'held': True}), 202
+        return jsonify({'message': 'Record accepted; represented within compression error bounds.',
+                        'id': None, 'held': False}), 202
+    return jsonify({'message': 'Record added successfully.', 'id': current.id}), 201
+
+def _parse_bulk_row(item):
+    """Valida una fila de la ingesta masiva y devuelve (record_type, data, timestamp)."""
+    if not isinstance(item, dict):
+        raise ValueError('row must be a JSON object')
+    record_type = item.get('record_type')
+    record_data = item.get('data')
+    if not record_type or not record_data:
+        raise ValueError('record_type and data are required')
+    if not isinstance(record_type, str) or len(record_type) > 50:
+        raise ValueError('record_type must be a string of at most 50 characters')
+    timestamp = item.get('timestamp')
+    if timestamp is None:
+        return record_type, record_data, datetime.utcnow()
+    try:
+        timestamp = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError) as e:
+        raise ValueError('timestamp must be an ISO 8601 string')
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return record_type, record_data, timestamp
+
+def _insert_bulk_batch(current_user_id, batch):
+    """
+    Pasa un lote por la compresión de series, inserta las filas que quedan con un único
+    executemany y commit, y notifica un resumen del lote. Devuelve las filas guardadas.
+    """
+    readings = [(current_user_id, record_type, timestamp, record_data)
+                for _, record_type, record_data, timestamp in batch]
+    rows = [dict(
+        typed_metric_values(record_type, record_data),
+        record_type=record_type,
+        data=json.dumps(record_data),
+        user_id=user_id,
+        timestamp=timestamp
+    ) for user_id, record_type, timestamp, record_data in compressor.compress(readings)]
+    try:
+        insert_records(rows)
+        update_rollups(readings)
+        db.session.commit()
+    except Exception:
+        compressor.forget(readings)
+        raise
+
+    record_types = {}
+    for _, record_type, _, _ in batch:
+        record_types[record_type] = record_types.get(record_type, 0) + 1
+    notify_database_change(next(iter(record_types)) if len(record_types) == 1 else 'mixed', 'bulk_create', {
+        'user_id': current_user_id,
+        'count': len(batch),
+        'record_types': record_types,
+        'stored': len(rows),
+        'first_row': batch[0][0],
+        'last_row': batch[-1][0]
+    })
+    return len(rows)
+
+@database_bp.route('/records/bulk', methods=['POST'])
+@token_required
+def add_records_bulk(current_user_id):
+    """
+    Ingesta masiva de registros desde un cuerpo NDJSON (una fila por línea) o un
+    array JSON. El cuerpo se lee en streaming, las filas válidas se insertan en
+    lotes de BULK_BATCH_SIZE con un commit por lote, y se devuelven los errores por
+    fila. Cada fila es {"record_type", "data", "timestamp" (ISO, opcional)}.
+    `inserted` cuenta las filas aceptadas y `stored` las que quedan tras la compresión.
+    """
+    content_type = request.mimetype or ''
+    if content_type in ('application/x-ndjson', 'application/jsonl', 'application/ndjson'):
+        items = iter_ndjson(request.stream)
+    elif content_type == 'application/json':
+        items = iter_json_array(request.stream)
+    else:
+        return jsonify({'error': 'Content-Type must be application/x-ndjson or application/json'}), 415
+
+    inserted = 0
+    stored = 0
+    failed = 0
+    errors = []
+
+    def add_error(row, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < BULK_MAX_ERRORS:
+            errors.append({'row': row, 'error': message})
+
+    def flush(batch):
+        nonlocal inserted, stored
+        try:
+            stored += _insert_bulk_batch(current_user_id, batch)
+            inserted += len(batch)
+        except Exception as e:
+            db.session.rollback()
+            # El detalle (SQL incluido) va al log, no a cada fila de la respuesta
+            print(f"[{datetime.utcnow()}] Error inserting bulk batch (rows {batch[0][0]}-{batch[-1][0]}):", e)
+            for row, _, _, _ in batch:
+                add_error(row, 'Error adding record: the batch could not be stored')
+
+    batch = []
+    for row, item, error in items:
+        if error is None:
+            try:
+                batch.append((row, *_parse_bulk_row(item)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            add_error(row, error)
+            continue
+        if len(batch) >= BULK_BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    return jsonify({
+        'inserted': inserted,
+        'stored': stored,
+        'failed': failed,
+        'errors': errors,
+        'errors_truncated': failed > len(errors)
+    }), 200 if inserted or not failed else 400
+
 @database_bp.route('/records/<int:record_id>', methods=['DELETE'])
 @token_required
 def delete_record(current_user_id, record_id):
@@ -114,6 +613,7 @@ def delete_record(current_user_id, record_id):
     
     try:
         db.session.delete(record)
+        record_changes('delete', [(record_id, current_user_id, record_type)])
         db.session.commit()
         
         # Emitir evento de eliminación de registro
@@ -1,44 +1,45 @@
 from flask import Blueprint, jsonify, request
-from app.utils.weather_api import get_weather
-from app.utils.seismic_api import get_seismic_data
-from app.core.config import DEFAULT_CITY, DEFAULT_COUNTRY
-from app import cache
-from app.events import notify_weather_update, notify_database_change
+from app.utils.http_client import CircuitOpenError
+from app.utils.etag import conditional
+from app.core.config import DEFAULT_CITY, DEFAULT_COUNTRY, WEATHER_BATCH_MAX_LOCATIONS
+from app.services.weather_service import get_current_weather, get_current_weather_batch
+from app.services.seismic_service import get_recent_earthquakes
 
 api_bp = Blueprint('api', __name__)
 
 @api_bp.route('/weather', methods=['GET'])
-@cache.cached(timeout=60, query_string=True)  # Caché por 1 minuto
 def weather():
     city = request.args.get('city', DEFAULT_CITY)
     country = request.args.get('country', DEFAULT_COUNTRY)
     try:
-        weather_data = get_weather(city, country)
-        result = {
-            "temperatura": weather_data.get("main", {}).get("temp"),
-            "humedad": weather_data.get("main", {}).get("humidity"),
-            "descripcion": weather_data.get("weather", [{}])[0].get("description"),
-            "icono": weather_data.get("weather", [{}])[0].get("icon"),
-            "velocidad_viento": weather_data.get("wind", {}).get("speed"),
-            # Aquí se forza un valor por defecto para uv_index si no se recibe
-            "uv_index": weather_data.get("uv_index", 5.0),
-            "avg_temp": weather_data.get("avg_temp", weather_data.get("main", {}).get("temp"))
-        }
-        
-        # Emitir actualización a clientes conectados a través de SocketIO
-        notify_weather_update({
-            "city": city,
-            "country": country,
-            "data": result
-        })
-        
-        return jsonify(result)
+        # Caché por 1 minuto por ubicación, con una sola llamada en curso por ubicación
+        return conditional(jsonify(get_current_weather(city, country)))
+    except CircuitOpenError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         print("Error en /weather:", e)
         return jsonify({"error": str(e)}), 500
 
+@api_bp.route('/weather/batch', methods=['GET'])
+def weather_batch():
+    """
+    Clima de varias ubicaciones en una sola petición.
+    `locations` admite 'ciudad,país' separados por ';' o repetidos
+    (?locations=Liberia,CR;Nicoya,CR). Si se omite el país se usa el predeterminado.
+    """
+    locations = []
+    for value in request.args.getlist('locations'):
+        for location in value.split(';'):
+            city, _, country = location.partition(',')
+            if city.strip():
+                locations.append((city.strip(), country.strip() or DEFAULT_COUNTRY))
+    if not locations:
+        return jsonify({"error": "locations is required"}), 400
+    if len(locations) > WEATHER_BATCH_MAX_LOCATIONS:
+        return jsonify({"error": f"At most {WEATHER_BATCH_MAX_LOCATIONS} locations per request"}), 400
+    return conditional(jsonify({"results": get_current_weather_batch(locations)}))
+
 @api_bp.route('/seismic', methods=['GET'])
-@cache.cached(timeout=300, query_string=True)  # Caché por 5 minutos
 def seismic():
     min_magnitude = request.args.get('min_magnitude', default=3.5, type=float)
     limit = request.args.get('limit', default=10, type=int)
@@ -46,17 +47,9 @@ def seismic():
     longitude = request.args.get('longitude', default=-85.44, type=float)
     maxradiuskm = request.args.get('maxradiuskm', default=200, type=float)
     try:
-        seismic_data = get_seismic_data(min_magnitude, limit, latitude, longitude, maxradiuskm)
-        
-        # Emitir actualización sísmica a través de SocketIO
-        notify_database_change("seismic", "update", {
-            "parameters": {
-                "min_magnitude": min_magnitude,
-                "maxradiuskm": maxradiuskm
-            },
-            "count": len(seismic_data)
-        })
-        
-        return jsonify(seismic_data)
+        # Caché por 5 minutos por parámetros normalizados, refrescada en segundo plano
+        return conditional(jsonify(get_recent_earthquakes(min_magnitude, limit, latitude, longitude, maxradiuskm)))
+    except CircuitOpenError as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         return jsonify({"error": str(e)}), 500
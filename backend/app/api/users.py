@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
-from app.services.user_service import create_user, authenticate_user
+from app.services.user_service import create_user, authenticate_user, PasswordHasherBusy
+from app.services.weather_service import normalize_location
+from app.models.data_models import db, UserLocation, typed_metric_values
+from app.services.compression import compressor
+from app.services.change_feed import insert_records
+from app.api.auth import token_required
 import jwt
+import json
 import datetime
 from app.core.config import SECRET_KEY
 
@@ -13,7 +19,10 @@ def register():
     password = data.get('password')
     if not username or not password:
         return jsonify({"error": "Username and password are required"}), 400
-    user = create_user(username, password)
+    try:
+        user = create_user(username, password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, try again"}), 503, {"Retry-After": "1"}
     if user is None:
         return jsonify({"error": "Username already exists"}), 400
     return jsonify({"message": "User created successfully", "username": user.username}), 201
@@ -26,7 +35,10 @@ def login():
     if not username or not password:
         return jsonify({"error": "Username and password are required"}), 400
 
-    user = authenticate_user(username, password)
+    try:
+        user = authenticate_user(username, password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, try again"}), 503, {"Retry-After": "1"}
     if user is None:
         return jsonify({"error": "Invalid credentials"}), 401
 
@@ -36,3 +48,63 @@ def login():
     }, SECRET_KEY, algorithm='HS256')
 
     return jsonify({"token": token})
+
+def _serialize_location(location):
+    return {"city": location.city, "country": location.country, "created_at": location.created_at.isoformat()}
+
+@users_bp.route('/location', methods=['GET'])
+@token_required
+def get_location(current_user_id):
+    """Ubicación de la que el usuario recibe lecturas de clima del scheduler."""
+    location = UserLocation.query.filter_by(user_id=current_user_id).first()
+    if location is None:
+        return jsonify({"error": "No location subscription"}), 404
+    return jsonify(_serialize_location(location))
+
+def _reset_weather_series(user_id):
+    """
+    Corta la serie de clima del usuario: las lecturas de la nueva ubicación no se
+    interpolan con las de la anterior. La lectura retenida de la serie anterior se
+    guarda en la misma transacción. No hace commit.
+    """
+    insert_records([dict(
+        typed_metric_values(record_type, data),
+        record_type=record_type,
+        data=json.dumps(data),
+        user_id=held_user_id,
+        timestamp=held_at
+    ) for held_user_id, record_type, held_at, data in compressor.reset([user_id], 'weather')])
+
+@users_bp.route('/location', methods=['PUT'])
+@token_required
+def set_location(current_user_id):
+    """Suscribe al usuario a una ubicación {city, country}, reemplazando la anterior."""
+    data = request.get_json(silent=True) or {}
+    city = data.get('city')
+    country = data.get('country')
+    if not isinstance(city, str) or not isinstance(country, str) or not city.strip() or not country.strip():
+        return jsonify({"error": "city and country are required"}), 400
+    city, country = normalize_location(city, country)
+
+    location = UserLocation.query.filter_by(user_id=current_user_id).first()
+    changed = location is None or (location.city, location.country) != (city, country)
+    if location is None:
+        location = UserLocation(user_id=current_user_id, city=city, country=country)
+        db.session.add(location)
+    else:
+        location.city, location.country = city, country
+    if changed:
+        _reset_weather_series(current_user_id)
+    db.session.commit()
+    return jsonify(_serialize_location(location))
+
+@users_bp.route('/location', methods=['DELETE'])
+@token_required
+def delete_location(current_user_id):
+    deleted = UserLocation.query.filter_by(user_id=current_user_id).delete()
+    if deleted:
+        _reset_weather_series(current_user_id)
+    db.session.commit()
+    if not deleted:
+        return jsonify({"error": "No location subscription"}), 404
+    return jsonify({"message": "Location subscription removed"})
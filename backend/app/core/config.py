@@ -1,12 +1,170 @@
 import os
+from dotenv import load_dotenv
+
+# Las variables de .env deben estar cargadas antes de leer cualquier ajuste
+load_dotenv()
 
 OPENWEATHER_API_KEY = os.environ.get('OPENWEATHER_API_KEY', 'fd17340b9139c6e35b3e4561824d81aa')
-OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/2.5/weather"
+OPENWEATHER_BASE_URL = os.environ.get('OPENWEATHER_BASE_URL', "https://api.openweathermap.org/data/2.5/weather")
+USGS_BASE_URL = os.environ.get('USGS_BASE_URL', "https://earthquake.usgs.gov/fdsnws/event/1/query")
 DEFAULT_CITY = os.environ.get('DEFAULT_CITY', 'Liberia')
 DEFAULT_COUNTRY = os.environ.get('DEFAULT_COUNTRY', 'CR')
 UNITS = os.environ.get('UNITS', 'metric')
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 SECRET_KEY = os.environ.get('SECRET_KEY', 'CLAVE_SECRETA_1234')
-SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, '..', '..', 'instance', 'app.db')
+# DATABASE_URL admite cualquier URL de SQLAlchemy; las rutas SQLite relativas
+# ('sqlite:///app.db') se resuelven dentro de la carpeta instance/
+SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
+    'sqlite:///' + os.path.join(basedir, '..', '..', 'instance', 'app.db')
+if SQLALCHEMY_DATABASE_URI.startswith('postgres://'):
+    SQLALCHEMY_DATABASE_URI = 'postgresql://' + SQLALCHEMY_DATABASE_URI[len('postgres://'):]
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Pool de conexiones para bases de datos servidor (PostgreSQL, MySQL...)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith('sqlite') else {
+    'pool_size': DB_POOL_SIZE,
+    'max_overflow': DB_MAX_OVERFLOW,
+    'pool_timeout': DB_POOL_TIMEOUT,
+    'pool_recycle': DB_POOL_RECYCLE,
+    'pool_pre_ping': True
+}
+
+# PRAGMAs de rendimiento que se aplican a cada conexión SQLite (SQLITE_TUNING=false los desactiva)
+SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'true').lower() == 'true'
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', -64000))  # negativo = KiB
+
+# Scheduler: tamaño de los lotes de usuarios por consulta y de los shards concurrentes
+SCHEDULER_QUERY_CHUNK_SIZE = int(os.environ.get('SCHEDULER_QUERY_CHUNK_SIZE', 500))
+SCHEDULER_SHARD_SIZE = int(os.environ.get('SCHEDULER_SHARD_SIZE', 10000))
+SCHEDULER_MAX_WORKERS = int(os.environ.get('SCHEDULER_MAX_WORKERS', 4))
+# Origen de las lecturas del tick: 'simulated' (una lectura aleatoria por usuario) u
+# 'openweather' (una consulta por ubicación suscrita, repartida a sus suscriptores)
+SCHEDULER_WEATHER_SOURCE = os.environ.get('SCHEDULER_WEATHER_SOURCE', 'simulated').lower()
+
+# Socket.IO: ventana (ms) en la que se agrupan los eventos por sala antes de emitirlos (0 = sin agrupar)
+SOCKETIO_COALESCE_WINDOW_MS = int(os.environ.get('SOCKETIO_COALESCE_WINDOW_MS', 100))
+
+# Cliente HTTP hacia OpenWeather/USGS: pool de conexiones, timeouts, reintentos y circuit breaker
+UPSTREAM_POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', 20))
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get('UPSTREAM_READ_TIMEOUT', 10))
+UPSTREAM_MAX_RETRIES = int(os.environ.get('UPSTREAM_MAX_RETRIES', 2))
+UPSTREAM_BACKOFF_BASE = float(os.environ.get('UPSTREAM_BACKOFF_BASE', 0.2))
+UPSTREAM_BACKOFF_MAX = float(os.environ.get('UPSTREAM_BACKOFF_MAX', 2.0))
+UPSTREAM_CIRCUIT_FAILURES = int(os.environ.get('UPSTREAM_CIRCUIT_FAILURES', 5))
+UPSTREAM_CIRCUIT_RESET_SECONDS = float(os.environ.get('UPSTREAM_CIRCUIT_RESET_SECONDS', 30))
+
+# Clima: caché por ubicación y consultas en lote (/api/weather/batch)
+WEATHER_CACHE_TIMEOUT = int(os.environ.get('WEATHER_CACHE_TIMEOUT', 60))
+WEATHER_CACHE_HARD_TIMEOUT = int(os.environ.get('WEATHER_CACHE_HARD_TIMEOUT', 900))
+WEATHER_BATCH_MAX_WORKERS = int(os.environ.get('WEATHER_BATCH_MAX_WORKERS', 8))
+WEATHER_BATCH_MAX_LOCATIONS = int(os.environ.get('WEATHER_BATCH_MAX_LOCATIONS', 50))
+
+# Sismos: caché por parámetros normalizados
+SEISMIC_CACHE_TIMEOUT = int(os.environ.get('SEISMIC_CACHE_TIMEOUT', 300))
+SEISMIC_CACHE_HARD_TIMEOUT = int(os.environ.get('SEISMIC_CACHE_HARD_TIMEOUT', 1800))
+
+# Caché stale-while-revalidate: decimales de coordenadas en las claves,
+# hilos de refresco en segundo plano y precalentamiento de claves frecuentes
+CACHE_COORD_DIGITS = int(os.environ.get('CACHE_COORD_DIGITS', 2))
+CACHE_REFRESH_WORKERS = int(os.environ.get('CACHE_REFRESH_WORKERS', 4))
+CACHE_HOT_KEYS_MAX = int(os.environ.get('CACHE_HOT_KEYS_MAX', 200))
+CACHE_HOT_KEY_WINDOW = int(os.environ.get('CACHE_HOT_KEY_WINDOW', 600))
+CACHE_PREWARM_INTERVAL = int(os.environ.get('CACHE_PREWARM_INTERVAL', 30))
+
+# Almacén local de sismos alimentado desde USGS de forma incremental
+SEISMIC_LOCAL_STORE = os.environ.get('SEISMIC_LOCAL_STORE', 'true').lower() == 'true'
+SEISMIC_INGEST_INTERVAL = int(os.environ.get('SEISMIC_INGEST_INTERVAL', 60))
+SEISMIC_INGEST_MIN_MAGNITUDE = float(os.environ.get('SEISMIC_INGEST_MIN_MAGNITUDE', 2.5))
+SEISMIC_INGEST_LOOKBACK_DAYS = int(os.environ.get('SEISMIC_INGEST_LOOKBACK_DAYS', 30))
+SEISMIC_INGEST_PAGE_SIZE = int(os.environ.get('SEISMIC_INGEST_PAGE_SIZE', 2000))
+
+# Autenticación: caché de JWT ya verificados y pool dedicado para hashing de contraseñas
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 300))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+# Ingesta masiva (/api/database/records/bulk): filas por transacción y errores devueltos como máximo
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 500))
+BULK_MAX_ERRORS = int(os.environ.get('BULK_MAX_ERRORS', 1000))
+
+# Exportación en streaming: filas por consulta (cada lote en su propia transacción corta)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+def _parse_mapping(value, cast=int):
+    """Convierte 'weather=7,seismic=30' en {'weather': 7, 'seismic': 30}."""
+    mapping = {}
+    for item in value.split(','):
+        name, _, number = item.partition('=')
+        if name.strip() and number.strip():
+            mapping[name.strip()] = cast(number)
+    return mapping
+
+# Retención: días que se conservan los registros por record_type y los rollups por bucket
+RETENTION_POLICIES = _parse_mapping(os.environ.get('RETENTION_POLICIES', 'weather=7'))
+ROLLUP_RETENTION = _parse_mapping(os.environ.get('ROLLUP_RETENTION', '1m=7,1h=90,1d=730'))
+RETENTION_INTERVAL = int(os.environ.get('RETENTION_INTERVAL', 3600))
+RETENTION_CHUNK_SIZE = int(os.environ.get('RETENTION_CHUNK_SIZE', 500))
+RETENTION_CHUNK_PAUSE = float(os.environ.get('RETENTION_CHUNK_PAUSE', 0.05))
+# Con auto_vacuum=INCREMENTAL el espacio liberado por la purga se devuelve al sistema
+SQLITE_INCREMENTAL_VACUUM = os.environ.get('SQLITE_INCREMENTAL_VACUUM', 'true').lower() == 'true'
+# En una base de datos existente el cambio exige un VACUUM completo (bloqueo exclusivo y
+# hasta el doble del espacio en disco): solo se hace al arrancar si se pide explícitamente
+SQLITE_VACUUM_ON_UPGRADE = os.environ.get('SQLITE_VACUUM_ON_UPGRADE', 'false').lower() == 'true'
+SQLITE_INCREMENTAL_VACUUM_PAGES = int(os.environ.get('SQLITE_INCREMENTAL_VACUUM_PAGES', 500))
+
+# Redis compartido (caché y estado de compresión) cuando está disponible
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# Compresión de series: 'swinging_door', 'deadband' u 'off'. Error máximo tolerado por
+# métrica al interpolar entre puntos guardados; las métricas sin cota no se comprimen
+COMPRESSION_MODE = os.environ.get('COMPRESSION_MODE', 'swinging_door').lower()
+COMPRESSION_RECORD_TYPES = tuple(
+    t.strip() for t in os.environ.get('COMPRESSION_RECORD_TYPES', 'weather').split(',') if t.strip()
+)
+COMPRESSION_ERROR_BOUNDS = _parse_mapping(os.environ.get(
+    'COMPRESSION_ERROR_BOUNDS', 'temperatura=0.5,humedad=2,uv_index=0.5,avg_temp=0.5,velocidad_viento=0.5'
+), float)
+# Se guarda al menos un punto por serie cada COMPRESSION_MAX_INTERVAL segundos
+COMPRESSION_MAX_INTERVAL = int(os.environ.get('COMPRESSION_MAX_INTERVAL', 900))
+COMPRESSION_STATE_MAX_SERIES = int(os.environ.get('COMPRESSION_STATE_MAX_SERIES', 200000))
+
+# Scheduler: 'auto' (solo en el proceso hijo del recargador de desarrollo), 'leader'
+# (en todos los procesos, pero las tareas solo corren en el que tiene la concesión) u 'off'
+SCHEDULER_MODE = os.environ.get('SCHEDULER_MODE', 'auto').lower()
+# Concesión del líder en Redis o en la tabla scheduler_lease de la base de datos
+SCHEDULER_LEASE_BACKEND = os.environ.get('SCHEDULER_LEASE_BACKEND', 'redis' if REDIS_URL else 'database').lower()
+SCHEDULER_LEASE_TTL = int(os.environ.get('SCHEDULER_LEASE_TTL', 30))
+SCHEDULER_LEASE_RENEW_INTERVAL = int(os.environ.get('SCHEDULER_LEASE_RENEW_INTERVAL', 10))
+
+# Cola de mensajes de Socket.IO (p. ej. redis://...) para que las emisiones de un
+# proceso lleguen a los clientes conectados a cualquier otro worker o réplica
+SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', REDIS_URL)
+SOCKETIO_CHANNEL = os.environ.get('SOCKETIO_CHANNEL', 'flask-socketio')
+
+# Feed de cambios (/api/database/records/changes): días que se conservan y cambios por respuesta
+CHANGE_FEED_RETENTION_DAYS = int(os.environ.get('CHANGE_FEED_RETENTION_DAYS', 7))
+CHANGE_FEED_MAX_LIMIT = int(os.environ.get('CHANGE_FEED_MAX_LIMIT', 1000))
+
+# Compresión de respuestas (gzip, o brotli si el módulo está instalado) a partir de un tamaño mínimo en bytes
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() == 'true'
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024))
+RESPONSE_GZIP_LEVEL = int(os.environ.get('RESPONSE_GZIP_LEVEL', 6))
+RESPONSE_BROTLI_QUALITY = int(os.environ.get('RESPONSE_BROTLI_QUALITY', 4))
+
+# Caché de resultados de GET /api/database/records: 'memory' (LRU por proceso), 'redis' u 'off'.
+# Con varios workers sin Redis cada proceso solo ve sus propias escrituras: usar 'redis'
+RECORD_CACHE_BACKEND = os.environ.get('RECORD_CACHE_BACKEND', 'redis' if REDIS_URL else 'memory').lower()
+RECORD_CACHE_TTL = int(os.environ.get('RECORD_CACHE_TTL', 60))
+RECORD_CACHE_MAX_ENTRIES = int(os.environ.get('RECORD_CACHE_MAX_ENTRIES', 2000))
@@ -0,0 +1,124 @@
+"""
+Métricas de Prometheus propias de la aplicación.
+
+Se registran en el registro por defecto de prometheus_client, el mismo que expone
+PrometheusMetrics en /metrics. Las etiquetas solo toman valores de conjuntos
+cerrados (nombres de upstream, endpoints de Flask, tipos de evento, resultados) para mantener acotada la cardinalidad.
+"""
+import time
+from flask import has_request_context, request
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    'upstream_request_duration_seconds',
+    'Latencia de las llamadas a APIs externas (incluye reintentos)',
+    ['upstream', 'outcome']
+)
+UPSTREAM_ERRORS = Counter(
+    'upstream_errors_total',
+    'Errores de las llamadas a APIs externas por motivo',
+    ['upstream', 'reason']
+)
+UPSTREAM_RETRIES = Counter(
+    'upstream_retries_total',
+    'Reintentos realizados contra APIs externas',
+    ['upstream']
+)
+CACHE_REQUESTS = Counter(
+    'app_cache_requests_total',
+    'Consultas a las cachés stale-while-revalidate por ruta y resultado (hit, stale, miss)',
+    ['cache', 'endpoint', 'result']
+)
+RETENTION_ROWS_PURGED = Counter(
+    'retention_rows_purged_total',
+    'Filas eliminadas por la política de retención',
+    ['table']
+)
+RETENTION_PURGE_SECONDS = Histogram(
+    'retention_purge_duration_seconds',
+    'Duración de cada ejecución de la purga por retención'
+)
+RETENTION_VACUUM_PAGES = Counter(
+    'retention_vacuum_pages_total',
+    'Páginas de SQLite liberadas con incremental_vacuum'
+)
+SCHEDULER_TICK_SECONDS = Histogram(
+    'scheduler_tick_duration_seconds',
+    'Duración de cada tick de inserción de clima',
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+SCHEDULER_ROWS = Counter(
+    'scheduler_rows_total',
+    'Lecturas de clima procesadas por el scheduler por resultado (inserted, skipped)',
+    ['result']
+)
+DB_QUERY_SECONDS = Histogram(
+    'db_query_duration_seconds',
+    'Tiempo de ejecución de las consultas SQL por endpoint',
+    ['endpoint'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+SOCKETIO_EMITS = Counter(
+    'socketio_emits_total',
+    'Mensajes emitidos por Socket.IO por tipo de evento',
+    ['event']
+)
+SOCKETIO_EMIT_BYTES = Counter(
+    'socketio_emit_payload_bytes_total',
+    'Bytes de los paquetes de evento codificados por Socket.IO (una vez por proceso que los entrega)',
+    ['event']
+)
+SOCKETIO_EMIT_RECIPIENTS = Histogram(
+    'socketio_emit_recipients',
+    'Clientes del proceso emisor que reciben cada mensaje (no incluye los de otros workers)',
+    ['event'],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+)
+TOKEN_VERIFY_SECONDS = Histogram(
+    'auth_token_verify_duration_seconds',
+    'Tiempo de verificación de JWT por resultado (cached, verified, invalid)',
+    ['result'],
+    buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005, 0.01)
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    'password_hash_duration_seconds',
+    'Tiempo de cómputo del hash de contraseñas por operación (hash, verify)',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+PASSWORD_HASH_REJECTED = Counter(
+    'password_hash_rejected_total',
+    'Operaciones de hashing rechazadas por tener la cola llena'
+)
+COMPRESSION_READINGS = Counter(
+    'compression_readings_total',
+    'Lecturas que pasan por la compresión de series (received) y filas que se guardan (stored)',
+    ['result']
+)
+
+def current_endpoint():
+    """Endpoint de Flask de la petición en curso, o 'background' fuera de una petición."""
+    if not has_request_context():
+        return 'background'
+    return request.endpoint or 'unmatched'
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    DB_QUERY_SECONDS.labels(current_endpoint()).observe(time.perf_counter() - started)
+
+def _handle_error(context):
+    # La consulta falló: after_cursor_execute no se ejecutará
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+def instrument_engine(engine):
+    """Mide el tiempo de cada consulta del motor y lo asigna al endpoint que la originó."""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
@@ -0,0 +1,43 @@
+"""
+Configuración del motor de base de datos según el backend en uso
+"""
+from sqlalchemy import event
+from app.core.config import (
+    SQLITE_TUNING, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE, SQLITE_CACHE_SIZE
+)
+from app.core.metrics import instrument_engine
+from app.models.data_models import db
+
+def sqlite_pragmas():
+    """PRAGMAs que se ejecutan al abrir cada conexión SQLite."""
+    return [
+        f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}',
+        f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}',
+        f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}',
+        f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}',
+        f'PRAGMA cache_size={SQLITE_CACHE_SIZE}',
+        'PRAGMA temp_store=MEMORY'
+    ]
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def configure_storage(app):
+    """
+    Ajusta el motor ya creado por Flask-SQLAlchemy. En SQLite registra los PRAGMAs de
+    rendimiento (WAL para que lectores y escritores no se bloqueen entre sí); en bases
+    de datos servidor el tamaño del pool llega por SQLALCHEMY_ENGINE_OPTIONS.
+    En todos los casos mide el tiempo de cada consulta por endpoint.
+    """
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite' and SQLITE_TUNING:
+        event.listen(engine, 'connect', _apply_sqlite_pragmas)
+    instrument_engine(engine)
+    return engine
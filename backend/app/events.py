@@ -1,44 +1,197 @@
 """
 Módulo para manejar eventos y notificaciones en tiempo real
+
+Cada cliente se une al conectarse a las salas que le interesan:
+- `user:<id>` si envía un JWT válido (en `auth={'token': ...}` o `?token=`). Con un
+  token caducado o inválido recibe `auth_error` y sigue conectado a los temas públicos.
+- `topic:<nombre>` por cada tema público (`weather`, `seismic`), todos por defecto
+  o solo los indicados en `auth={'topics': [...]}` o con el evento `subscribe`.
+
+Las notificaciones se emiten solo a esas salas y pasan por un agrupador que junta
+las ráfagas de eventos de una misma sala dentro de una ventana corta en un único
+mensaje `<evento>_batch`.
 """
+import json
+import threading
+from flask import request
+from flask_socketio import emit, join_room, leave_room
+from app.api.auth import decode_token
+from app.core.config import SOCKETIO_COALESCE_WINDOW_MS
+from app.core.metrics import SOCKETIO_EMITS, SOCKETIO_EMIT_BYTES, SOCKETIO_EMIT_RECIPIENTS
+
+# Temas públicos a los que un cliente puede suscribirse
+PUBLIC_TOPICS = ('weather', 'seismic')
 
 # La instancia de SocketIO se establecerá después desde __init__.py
 # Usamos esta variable para evitar importación circular
 socketio = None
 
+def user_room(user_id):
+    return f'user:{user_id}'
+
+def topic_room(topic):
+    return f'topic:{topic}'
+
+def _room_size(room):
+    """
+    Clientes de la sala conectados a este proceso, leídos del gestor de salas de
+    python-socketio (no hay API pública que los cuente sin copiar la lista). Solo el
+    proceso que emite llama a _emit: con SOCKETIO_MESSAGE_QUEUE los clientes de otros
+    workers también reciben el mensaje pero no se cuentan, así que es una cota inferior.
+    """
+    try:
+        return len(socketio.server.manager.rooms.get('/', {}).get(room, ()))
+    except Exception as e:
+        return 0
+
+class MeasuredJSON:
+    """
+    Módulo json para Socket.IO (`socketio.init_app(..., json=MeasuredJSON)`) que suma a
+    SOCKETIO_EMIT_BYTES el tamaño de cada paquete de evento al codificarlo. Socket.IO
+    codifica el paquete una vez por emisión (no por destinatario), así que medir aquí no
+    añade ninguna serialización. Con ensure_ascii la longitud coincide con los bytes.
+    """
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        encoded = json.dumps(obj, *args, **kwargs)
+        # Los paquetes de evento son [nombre, payload...]; el resto (acks, handshake) no se cuenta
+        if isinstance(obj, list) and obj and isinstance(obj[0], str):
+            SOCKETIO_EMIT_BYTES.labels(obj[0]).inc(len(encoded))
+        return encoded
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)
+
+def _emit(event, payload, room):
+    """
+    Emite a la sala y registra el tipo de evento y los destinatarios en este proceso;
+    los bytes se cuentan al codificar el paquete (ver MeasuredJSON).
+    """
+    SOCKETIO_EMITS.labels(event).inc()
+    SOCKETIO_EMIT_RECIPIENTS.labels(event).observe(_room_size(room))
+    socketio.emit(event, payload, to=room)
+
+class EmitCoalescer:
+    """
+    Agrupa los eventos emitidos a una misma sala durante `window` segundos.
+
+    El primer evento de una sala programa un vaciado; los que llegan antes de que
+    ocurra se acumulan. Si al vaciar solo hay un evento se emite tal cual; si hay
+    varios se emite un único `<evento>_batch` con la lista en `events`.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+        self.events_in = 0
+        self.messages_out = 0
+
+    def emit(self, event, payload, room):
+        if self.window <= 0:
+            with self._lock:
+                self.events_in += 1
+                self.messages_out += 1
+            _emit(event, payload, room)
+            return
+        with self._lock:
+            self.events_in += 1
+            self._pending.setdefault((event, room), []).append(payload)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        socketio.start_background_task(self._flush_later)
+
+    def _flush_later(self):
+        socketio.sleep(self.window)
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+            self.messages_out += len(pending)
+        for (event, room), payloads in pending.items():
+            if len(payloads) == 1:
+                _emit(event, payloads[0], room)
+            else:
+                _emit(f'{event}_batch', {'count': len(payloads), 'events': payloads}, room)
+
+    def stats(self):
+        return {'events_in': self.events_in, 'messages_out': self.messages_out}
+
+coalescer = EmitCoalescer(SOCKETIO_COALESCE_WINDOW_MS / 1000.0)
+
 def setup_socketio(socketio_instance):
     """Configura la instancia global de socketio"""
     global socketio
     socketio = socketio_instance
 
 def notify_weather_update(data):
-    """Emite una actualización de clima a todos los clientes conectados"""
+    """Emite una actualización de clima a los clientes suscritos al tema 'weather'"""
     if socketio:
-        socketio.emit('weather_update', data)
+        coalescer.emit('weather_update', data, topic_room('weather'))
+
+def notify_database_change(record_type, action, data, user_id=None):
+    """Emite una actualización de la base de datos a los clientes interesados
 
-def notify_database_change(record_type, action, data):
-    """Emite una actualización de la base de datos a todos los clientes conectados
-    
     Parameters:
     - record_type: El tipo de registro (weather, seismic, etc.)
     - action: La acción realizada (create, update, delete)
     - data: Los datos asociados con la acción
+    - user_id: Usuario dueño de los datos; por defecto se toma de data['user_id'].
+      Sin usuario, el evento va a la sala del tema `record_type`.
     """
-    if socketio:
-        socketio.emit('database_update', {
-            'record_type': record_type,
-            'action': action,
-            'data': data
-        })
+    if not socketio:
+        return
+    if user_id is None:
+        user_id = data.get('user_id')
+    room = user_room(user_id) if user_id is not None else topic_room(record_type)
+    coalescer.emit('database_update', {
+        'record_type': record_type,
+        'action': action,
+        'data': data
+    }, room)
+
+def _join_topics(topics):
+    joined = [topic for topic in topics if topic in PUBLIC_TOPICS]
+    for topic in joined:
+        join_room(topic_room(topic))
+    return joined
 
 # Eventos de Socket.IO (se configurarán cuando socketio esté disponible)
 def register_socketio_events(socketio_instance):
     """Registra los eventos de SocketIO"""
-    
+
     @socketio_instance.on('connect')
-    def handle_connect():
+    def handle_connect(auth=None):
+        auth = auth if isinstance(auth, dict) else {}
+        token = auth.get('token') or request.args.get('token')
+        if token:
+            try:
+                join_room(user_room(decode_token(token)))
+            except Exception:
+                # Token caducado o inválido: sin sala de usuario, pero se mantienen los temas públicos
+                emit('auth_error', {'error': 'Token is invalid or expired'})
+        topics = auth.get('topics')
+        _join_topics(topics if isinstance(topics, list) else PUBLIC_TOPICS)
         print('Cliente conectado a SocketIO')
 
+    @socketio_instance.on('subscribe')
+    def handle_subscribe(data):
+        topics = data.get('topics', []) if isinstance(data, dict) else []
+        return {'topics': _join_topics(topics)}
+
+    @socketio_instance.on('unsubscribe')
+    def handle_unsubscribe(data):
+        topics = data.get('topics', []) if isinstance(data, dict) else []
+        for topic in topics:
+            leave_room(topic_room(topic))
+        return {'topics': topics}
+
     @socketio_instance.on('disconnect')
     def handle_disconnect():
-        print('Cliente desconectado de SocketIO') 
\ No newline at end of file
+        print('Cliente desconectado de SocketIO')
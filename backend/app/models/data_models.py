@@ -3,6 +3,33 @@ import datetime
 
 db = SQLAlchemy()
 
+# Métricas con columna numérica propia en Record, por tipo de registro conocido.
+# Los tipos desconocidos solo guardan el JSON de `data`.
+TYPED_METRICS = {
+    'weather': ('temperatura', 'humedad', 'uv_index', 'avg_temp', 'velocidad_viento'),
+}
+TYPED_METRIC_COLUMNS = tuple(sorted({metric for metrics in TYPED_METRICS.values() for metric in metrics}))
+
+def _to_float(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def typed_metric_values(record_type, data):
+    """
+    Devuelve los valores de las columnas numéricas de Record para un payload.
+    Siempre incluye todas las columnas (None si no aplican) para poder usarse en
+    inserciones masivas con tipos de registro mezclados.
+    """
+    values = dict.fromkeys(TYPED_METRIC_COLUMNS)
+    if isinstance(data, dict):
+        for metric in TYPED_METRICS.get(record_type, ()):
+            values[metric] = _to_float(data.get(metric))
+    return values
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
@@ -13,6 +40,22 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+class UserLocation(db.Model):
+    """Ubicación (normalizada con normalize_location) de la que el usuario recibe lecturas de clima"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+    city = db.Column(db.String(100), nullable=False)
+    country = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        # El tick agrupa a los suscriptores por ubicación
+        db.Index('ix_user_location_city_country', 'city', 'country'),
+    )
+
+    def __repr__(self):
+        return f'<UserLocation {self.user_id} {self.city},{self.country}>'
+
 class Record(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     record_type = db.Column(db.String(50))  # 'weather' o 'seismic'
@@ -20,5 +63,119 @@ class Record(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
+    # Métricas tipadas (ver TYPED_METRICS), copiadas de `data` al escribir
+    temperatura = db.Column(db.Float)
+    humedad = db.Column(db.Float)
+    uv_index = db.Column(db.Float)
+    avg_temp = db.Column(db.Float)
+    velocidad_viento = db.Column(db.Float)
+
+    __table_args__ = (
+        # Cubre los filtros de /api/database/records y el orden por timestamp
+        db.Index('ix_record_user_type_timestamp', 'user_id', 'record_type', 'timestamp'),
+        # Purga por antigüedad (ver app/services/retention.py)
+        db.Index('ix_record_type_timestamp', 'record_type', 'timestamp'),
+    )
+
     def __repr__(self):
         return f'<Record {self.record_type} for user {self.user_id} at {self.timestamp}>'
+
+class RecordRollup(db.Model):
+    """Agregados por usuario, tipo de registro, métrica y bucket de tiempo (1m/1h/1d)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    record_type = db.Column(db.String(50), nullable=False)
+    metric = db.Column(db.String(50), nullable=False)
+    bucket = db.Column(db.String(3), nullable=False)       # '1m', '1h' o '1d'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    min_value = db.Column(db.Float, nullable=False)
+    max_value = db.Column(db.Float, nullable=False)
+    sum_value = db.Column(db.Float, nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    last_value = db.Column(db.Float, nullable=False)
+    last_timestamp = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'record_type', 'metric', 'bucket', 'bucket_start',
+                            name='uq_record_rollup_bucket'),
+        db.Index('ix_record_rollup_bucket_start', 'bucket', 'bucket_start'),
+    )
+
+    def __repr__(self):
+        return f'<RecordRollup {self.metric}/{self.bucket} for user {self.user_id} at {self.bucket_start}>'
+
+class RecordChange(db.Model):
+    """
+    Registro de cambios de Record con una secuencia monótona para /records/changes.
+    Las eliminaciones quedan como lápidas (action='delete'). Las filas sin usuario marcan
+    purgas globales por retención de un record_type anteriores a `purged_before` (llegan
+    al feed de todos los usuarios y cambian los ETags) o recortes del propio feed
+    (action='trim', no llegan al feed pero hacen que ninguna versión retroceda).
+    """
+    seq = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    record_id = db.Column(db.Integer, nullable=True)
+    record_type = db.Column(db.String(50))
+    action = db.Column(db.String(10), nullable=False)  # 'create', 'delete', 'purge' o 'trim'
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
+    purged_before = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_record_change_user_seq', 'user_id', 'seq'),
+        # AUTOINCREMENT en SQLite: una secuencia nunca se reutiliza aunque se borre la última fila
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<RecordChange {self.seq} {self.action} record {self.record_id}>'
+
+def seismic_grid_cell(latitude, longitude):
+    """Índice de la celda de 1 grado (rejilla de 180x360) que contiene el punto."""
+    row = min(int(latitude + 90), 179)
+    column = int(longitude + 180) % 360
+    return row * 360 + column
+
+class SeismicEvent(db.Model):
+    """Sismo del feed de USGS guardado localmente para responder /api/seismic sin llamar al upstream"""
+    id = db.Column(db.String(32), primary_key=True)    # id del evento en USGS
+    time = db.Column(db.DateTime, nullable=False, index=True)
+    updated = db.Column(db.DateTime, nullable=False, index=True)
+    magnitude = db.Column(db.Float, index=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    depth = db.Column(db.Float)
+    grid_cell = db.Column(db.Integer, nullable=False)  # celda de 1°x1° (ver seismic_grid_cell())
+    feature = db.Column(db.Text, nullable=False)       # Feature GeoJSON original
+
+    __table_args__ = (
+        db.Index('ix_seismic_event_cell_time', 'grid_cell', 'time'),
+    )
+
+    def __repr__(self):
+        return f'<SeismicEvent {self.id} M{self.magnitude} at {self.time}>'
+
+class IngestState(db.Model):
+    """Marca de agua de una ingesta incremental; solo avanza cuando la ingesta termina completa"""
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<IngestState {self.name} at {self.watermark}>'
+
+class SchemaMigration(db.Model):
+    """Pasos de migración de datos ya completados, para no repetirlos en cada arranque"""
+    name = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaMigration {self.name} at {self.applied_at}>'
+
+class SchedulerLease(db.Model):
+    """Concesión con vencimiento que identifica al proceso que ejecuta las tareas programadas"""
+    name = db.Column(db.String(50), primary_key=True)
+    holder = db.Column(db.String(200), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} held by {self.holder} until {self.expires_at}>'
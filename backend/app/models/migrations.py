@@ -0,0 +1,106 @@
+"""
+Actualización ligera del esquema para bases de datos existentes
+"""
+import json
+from sqlalchemy import inspect, text
+from app.core.config import SQLITE_INCREMENTAL_VACUUM, SQLITE_VACUUM_ON_UPGRADE
+from app.models.data_models import db, Record, SchemaMigration, TYPED_METRICS, typed_metric_values
+
+# Filas procesadas por transacción al rellenar columnas nuevas
+BACKFILL_CHUNK_SIZE = 1000
+TYPED_METRICS_BACKFILL = 'backfill_typed_metrics'
+
+def _add_missing_columns():
+    """Añade con ALTER TABLE las columnas (anulables) que falten en tablas existentes."""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f'{table.name}.{column.name}')
+    return added
+
+def backfill_typed_metrics():
+    """
+    Copia a las columnas tipadas las métricas de los registros guardados solo como JSON.
+    Recorre la tabla por id en lotes pequeños para no mantener transacciones largas.
+    Al terminar se anota en schema_migration y los arranques siguientes no la repiten:
+    los registros sin métricas numéricas siguen con las columnas a NULL y, si no, se
+    volverían a leer y reescribir cada vez.
+    """
+    if db.session.get(SchemaMigration, TYPED_METRICS_BACKFILL) is not None:
+        return 0
+    typed_columns = [getattr(Record, metric) for metrics in TYPED_METRICS.values() for metric in metrics]
+    last_id = 0
+    updated = 0
+    while True:
+        rows = db.session.query(Record.id, Record.record_type, Record.data).filter(
+            Record.id > last_id,
+            Record.record_type.in_(list(TYPED_METRICS)),
+            *[column.is_(None) for column in typed_columns]
+        ).order_by(Record.id).limit(BACKFILL_CHUNK_SIZE).all()
+        if not rows:
+            break
+        mappings = []
+        for record_id, record_type, data in rows:
+            try:
+                payload = json.loads(data) if data else {}
+            except Exception as e:
+                payload = {}
+            mappings.append(dict(typed_metric_values(record_type, payload), id=record_id))
+        db.session.bulk_update_mappings(Record, mappings)
+        db.session.commit()
+        updated += len(mappings)
+        last_id = rows[-1][0]
+    db.session.add(SchemaMigration(name=TYPED_METRICS_BACKFILL))
+    db.session.commit()
+    return updated
+
+def enable_incremental_vacuum():
+    """
+    Activa auto_vacuum=INCREMENTAL en SQLite. En una base de datos nueva basta el PRAGMA;
+    en una que ya tiene tablas el cambio solo se aplica tras un VACUUM completo, que
+    bloquea la base y necesita hasta el doble de espacio en disco, así que solo se hace
+    con SQLITE_VACUUM_ON_UPGRADE=true. Devuelve True si se activó.
+    """
+    if db.engine.dialect.name != 'sqlite' or not SQLITE_INCREMENTAL_VACUUM:
+        return False
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        if connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() == 2:
+            return False
+        existing = bool(inspect(connection).get_table_names())
+        if existing and not SQLITE_VACUUM_ON_UPGRADE:
+            print("SQLite auto_vacuum is not INCREMENTAL; set SQLITE_VACUUM_ON_UPGRADE=true to run "
+                  "the one-time VACUUM that enables it (exclusive lock, up to 2x disk space).")
+            return False
+        connection.exec_driver_sql('PRAGMA auto_vacuum=INCREMENTAL')
+        if existing:
+            connection.exec_driver_sql('VACUUM')
+    return True
+
+def upgrade_schema():
+    """
+    Crea las tablas que falten, añade columnas e índices nuevos a tablas existentes
+    y rellena las columnas derivadas. db.create_all() solo crea índices junto con
+    tablas nuevas, por eso se revisan uno a uno.
+    """
+    if enable_incremental_vacuum():
+        print("SQLite auto_vacuum set to INCREMENTAL.")
+    db.create_all()
+    added = _add_missing_columns()
+    if added:
+        print("Columns added:", added)
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+    backfilled = backfill_typed_metrics()
+    if backfilled:
+        print(f"Typed metrics backfilled for {backfilled} records.")
@@ -1,73 +1,197 @@
 import random
 import datetime
 import json
-from app.models.data_models import db, User, Record
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func
+from app.models.data_models import db, User, UserLocation, Record, TYPED_METRICS, typed_metric_values
+from app.services.compression import compressor
+from app.services.change_feed import insert_records
+from app.services.rollup_service import update_rollups
+from app.core.metrics import SCHEDULER_TICK_SECONDS, SCHEDULER_ROWS
+from app.core.config import (
+    SCHEDULER_QUERY_CHUNK_SIZE, SCHEDULER_SHARD_SIZE, SCHEDULER_MAX_WORKERS, SCHEDULER_WEATHER_SOURCE
+)
 
-def is_similar(new_data, last_data, temp_threshold=1.0, humedad_threshold=5):
-    """
-    Compara dos conjuntos de datos de clima.
-    Devuelve True si la diferencia en temperatura y humedad está por debajo de los umbrales definidos.
-    """
-    try:
-        # Convertir ambos a flotantes
-        new_temp = float(new_data.get("temperatura", 0))
-        last_temp = float(last_data.get("temperatura", new_temp))
-        new_humedad = float(new_data.get("humedad", 0))
-        last_humedad = float(last_data.get("humedad", new_humedad))
-        temp_diff = abs(new_temp - last_temp)
-        humedad_diff = abs(new_humedad - last_humedad)
-        # Si ambas diferencias son menores a los umbrales, considera que son similares
-        return temp_diff < temp_threshold and humedad_diff < humedad_threshold
-    except Exception as e:
-        # Si ocurre algún problema en la comparación, forza que se inserte un nuevo registro
-        return False
+def _chunks(items, size):
+    """Divide una lista en trozos consecutivos de tamaño `size`."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-def insert_weather_record(app):
-    with app.app_context():
-        users = User.query.all()
-        print(f"[{datetime.datetime.utcnow()}] Scheduler running. Users found:", [u.id for u in users])
-        
-        for user in users:
-            # Simular datos del clima
-            weather_data = {
-                "temperatura": round(random.uniform(20, 30), 1),
-                "humedad": random.randint(40, 80),
-                "uv_index": round(random.uniform(0, 10), 1),
-                "avg_temp": round(random.uniform(20, 30), 1),
-                "descripcion": random.choice(["clear sky", "few clouds", "overcast", "rain"]),
-                "velocidad_viento": round(random.uniform(0.5, 5), 1)
-            }
+def simulate_weather_data():
+    """Genera una lectura de clima simulada."""
+    return {
+        "temperatura": round(random.uniform(20, 30), 1),
+        "humedad": random.randint(40, 80),
+        "uv_index": round(random.uniform(0, 10), 1),
+        "avg_temp": round(random.uniform(20, 30), 1),
+        "descripcion": random.choice(["clear sky", "few clouds", "overcast", "rain"]),
+        "velocidad_viento": round(random.uniform(0.5, 5), 1)
+    }
 
-            # Consultar el último registro del usuario del tipo 'weather'
-            last_record = Record.query.filter_by(user_id=user.id, record_type="weather")\
-                                        .order_by(Record.timestamp.desc()).first()
+def latest_weather_data(user_ids):
+    """
+    Devuelve {user_id: (timestamp, métricas)} con el último registro 'weather' de cada
+    usuario, usando una única consulta con ROW_NUMBER() en lugar de una consulta por usuario.
+    Lee las columnas tipadas, sin deserializar el JSON de `data`.
+    """
+    metrics = TYPED_METRICS["weather"]
+    ranked = db.session.query(
+        Record.user_id.label('user_id'),
+        Record.timestamp.label('timestamp'),
+        *[getattr(Record, metric).label(metric) for metric in metrics],
+        func.row_number().over(
+            partition_by=Record.user_id,
+            order_by=(Record.timestamp.desc(), Record.id.desc())
+        ).label('rn')
+    ).filter(
+        Record.record_type == "weather",
+        Record.user_id.in_(user_ids)
+    ).subquery()
 
-            if last_record:
-                try:
-                    # Convertir el campo data a dict
-                    last_data = json.loads(last_record.data)
-                except Exception as e:
-                    last_data = {}
-            else:
-                last_data = None
+    query = db.session.query(
+        ranked.c.user_id, ranked.c.timestamp, *[ranked.c[metric] for metric in metrics]
+    ).filter(ranked.c.rn == 1)
+    return {
+        row[0]: (row[1], {metric: value for metric, value in zip(metrics, row[2:]) if value is not None})
+        for row in query
+    }
 
-            # Si existe un registro previo y los datos nuevos son similares, saltar inserción
-            if last_data and is_similar(weather_data, last_data):
-                print(f"[{datetime.datetime.utcnow()}] Data for user {user.id} is similar. Skipping insertion.")
-                continue
+def _process_shard(app, user_ids, timestamp, reading_for):
+    """
+    Procesa un shard de usuarios en su propio contexto (y sesión) de aplicación.
+    `reading_for(user_id)` devuelve la lectura de cada usuario.
+    """
+    inserted = 0
+    skipped = 0
+    with app.app_context():
+        for chunk in _chunks(user_ids, SCHEDULER_QUERY_CHUNK_SIZE):
+            # Solo se consulta la base de datos para series sin estado de compresión
+            cold = compressor.missing(chunk, "weather")
+            if cold:
+                compressor.seed("weather", latest_weather_data(cold))
+            readings = [(user_id, "weather", timestamp, reading_for(user_id)) for user_id in chunk]
+            # La compresión decide qué lecturas se guardan; los rollups reciben todas
+            stored = compressor.compress(readings)
+            rows = [dict(
+                typed_metric_values(record_type, data),
+                record_type=record_type,
+                data=json.dumps(data),
+                user_id=user_id,
+                timestamp=stored_at
+            ) for user_id, record_type, stored_at, data in stored]
+            try:
+                # Inserción masiva (executemany) y un commit por lote
+                insert_records(rows)
+                update_rollups(readings)
+                db.session.commit()
+                inserted += len(rows)
+                skipped += max(len(readings) - len(rows), 0)
+            except Exception as e:
+                db.session.rollback()
+                compressor.forget(readings)
+                print("Error inserting weather records:", e)
+    return inserted, skipped
 
-            # Insertar nuevo registro
-            new_record = Record(
-                record_type="weather",
-                data=json.dumps(weather_data),  # Es preferible almacenar como JSON
-                user_id=user.id,
-                timestamp=datetime.datetime.utcnow()
-            )
-            db.session.add(new_record)
-        
+def store_held_readings(app):
+    """
+    Guarda las lecturas retenidas por la compresión que siguen solo en memoria. Se
+    registra con atexit para que un reinicio no pierda la última lectura de cada serie;
+    ya se contaron en los rollups al recibirlas.
+    """
+    held = compressor.drain()
+    if not held:
+        return 0
+    with app.app_context():
         try:
+            insert_records([dict(
+                typed_metric_values(record_type, data),
+                record_type=record_type,
+                data=json.dumps(data),
+                user_id=user_id,
+                timestamp=held_at
+            ) for user_id, record_type, held_at, data in held])
             db.session.commit()
-            print(f"[{datetime.datetime.utcnow()}] Weather records inserted for {len(users)} users (if data varied).")
         except Exception as e:
             db.session.rollback()
-            print("Error inserting weather records:", e)
+            print("Error storing held readings:", e)
+            return 0
+    print(f"[{datetime.datetime.utcnow()}] Stored {len(held)} held readings from series compression.")
+    return len(held)
+
+def subscribed_weather(app):
+    """
+    Agrupa a los usuarios por ubicación suscrita y consulta cada ubicación una sola
+    vez, en paralelo sobre el pool acotado de get_current_weather_batch (y a través de
+    la misma caché que /api/weather). Devuelve ({user_id: lectura}, ubicaciones, fallidas).
+    Los suscriptores de una ubicación que falla no reciben lectura en este tick.
+    """
+    # Importación tardía: weather_service depende de la caché creada en app/__init__.py
+    from app.services.weather_service import get_current_weather_batch
+
+    with app.app_context():
+        subscribers = {}
+        for user_id, city, country in db.session.query(
+                UserLocation.user_id, UserLocation.city, UserLocation.country).order_by(UserLocation.user_id):
+            subscribers.setdefault((city, country), []).append(user_id)
+        results = get_current_weather_batch(list(subscribers))
+
+    readings = {}
+    failed = 0
+    for location, result in zip(subscribers, results):
+        if 'error' in result:
+            failed += 1
+            print(f"[{datetime.datetime.utcnow()}] Weather fetch failed for {location}: {result['error']}")
+            continue
+        data = dict(result['data'], city=location[0], country=location[1])
+        for user_id in subscribers[location]:
+            readings[user_id] = data
+    return readings, len(subscribers), failed
+
+def insert_weather_record(app):
+    """
+    Tick del scheduler: obtiene una lectura de clima por usuario y guarda las que la
+    compresión de series no puede descartar (ver app/services/compression.py).
+
+    Con SCHEDULER_WEATHER_SOURCE='simulated' cada usuario recibe una lectura aleatoria;
+    con 'openweather' solo los usuarios con ubicación suscrita, y las llamadas al
+    upstream dependen del número de ubicaciones distintas, no del de usuarios.
+
+    Los usuarios se procesan en lotes (una inserción masiva por lote) y, si son muchos,
+    en shards que se ejecutan en paralelo.
+    Devuelve un diccionario con la duración del tick y las filas insertadas/omitidas.
+    """
+    started = time.perf_counter()
+    timestamp = datetime.datetime.utcnow()
+    extra = {}
+    if SCHEDULER_WEATHER_SOURCE == 'openweather':
+        readings, locations, failed = subscribed_weather(app)
+        user_ids = sorted(readings)
+        reading_for = readings.get
+        extra = {"locations": locations, "locations_failed": failed}
+    else:
+        with app.app_context():
+            user_ids = [user_id for (user_id,) in db.session.query(User.id).order_by(User.id)]
+        reading_for = lambda user_id: simulate_weather_data()
+
+    shards = list(_chunks(user_ids, SCHEDULER_SHARD_SIZE))
+    if len(shards) > 1:
+        with ThreadPoolExecutor(max_workers=min(SCHEDULER_MAX_WORKERS, len(shards))) as executor:
+            results = list(executor.map(lambda shard: _process_shard(app, shard, timestamp, reading_for), shards))
+    else:
+        results = [_process_shard(app, shard, timestamp, reading_for) for shard in shards]
+
+    stats = {
+        "users": len(user_ids),
+        **extra,
+        "shards": len(shards),
+        "inserted": sum(inserted for inserted, _ in results),
+        "skipped": sum(skipped for _, skipped in results),
+        "duration_seconds": round(time.perf_counter() - started, 3)
+    }
+    SCHEDULER_TICK_SECONDS.observe(time.perf_counter() - started)
+    SCHEDULER_ROWS.labels('inserted').inc(stats["inserted"])
+    SCHEDULER_ROWS.labels('skipped').inc(stats["skipped"])
+    print(f"[{datetime.datetime.utcnow()}] Scheduler tick: {stats['users']} users in {stats['shards']} shard(s), "
+          f"{stats['inserted']} inserted, {stats['skipped']} skipped in {stats['duration_seconds']}s.")
+    return stats
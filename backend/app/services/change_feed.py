@@ -0,0 +1,111 @@
+"""
+Feed de cambios de registros.
+
+Cada alta o baja de Record añade una fila a RecordChange en la misma transacción, con
+una secuencia monótona. Los clientes piden los cambios posteriores a la última secuencia
+que vieron, y la última secuencia del usuario sirve como versión para los ETags.
+
+Para que un cliente que leyó hasta `since=N` no se salte cambios, las secuencias deben
+hacerse visibles en orden. SQLite ya serializa las escrituras; en PostgreSQL la secuencia
+se asigna al insertar, no al hacer commit, así que las transacciones que escriben en el
+feed toman antes un advisory lock de transacción y se confirman de una en una. Otros
+motores no tienen esta garantía.
+"""
+import datetime
+from sqlalchemy import and_, insert, or_, text
+from app.models.data_models import db, Record, RecordChange
+
+# Clave del advisory lock de PostgreSQL que ordena las escrituras del feed
+FEED_LOCK_KEY = 7302011
+
+def _lock_feed():
+    """En PostgreSQL, serializa hasta el commit las transacciones que añaden cambios."""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': FEED_LOCK_KEY})
+
+def record_changes(action, records):
+    """Añade a la sesión un cambio por cada (record_id, user_id, record_type). No hace commit."""
+    rows = [{'record_id': record_id, 'user_id': user_id, 'record_type': record_type,
+             'action': action, 'changed_at': datetime.datetime.utcnow()}
+            for record_id, user_id, record_type in records]
+    if rows:
+        _lock_feed()
+        db.session.execute(insert(RecordChange), rows)
+
+def record_purge(record_type, before):
+    """
+    Marca global de purga por retención de los registros `record_type` anteriores a
+    `before`: aparece en el feed de todos los usuarios e invalida sus ETags.
+    """
+    _lock_feed()
+    db.session.add(RecordChange(action='purge', record_type=record_type, purged_before=before,
+                                changed_at=datetime.datetime.utcnow()))
+
+def record_trim():
+    """
+    Marca global previa a recortar el feed. Su secuencia es mayor que la de cualquier fila
+    que se vaya a borrar, así la versión de ningún usuario retrocede a un valor que un
+    cliente pudiera tener en su ETag. No aparece en el feed. No hace commit.
+    """
+    _lock_feed()
+    db.session.add(RecordChange(action='trim', changed_at=datetime.datetime.utcnow()))
+
+def insert_records(rows):
+    """
+    Inserta filas de Record con un executemany que devuelve los ids, y registra sus
+    altas en el feed. Devuelve [(id, user_id, record_type)]. No hace commit.
+    """
+    if not rows:
+        return []
+    result = db.session.execute(
+        insert(Record).returning(Record.id, Record.user_id, Record.record_type, sort_by_parameter_order=True), rows)
+    created = [tuple(row) for row in result]
+    record_changes('create', created)
+    return created
+
+def user_version(user_id):
+    """
+    Última secuencia que afecta a los registros del usuario (incluye las marcas globales
+    de purga y de recorte del feed). Nunca disminuye.
+    """
+    return db.session.query(db.func.max(RecordChange.seq)).filter(
+        or_(RecordChange.user_id == user_id, RecordChange.user_id.is_(None))
+    ).scalar() or 0
+
+def oldest_sequence():
+    return db.session.query(db.func.min(RecordChange.seq)).scalar()
+
+def changes_since(user_id, since, limit):
+    """
+    Cambios del usuario con secuencia mayor que `since`, en orden. Las altas incluyen el
+    registro (si ya se eliminó, su lápida aparece más adelante y el alta se omite). Las
+    purgas por retención llegan como {'action': 'purge', 'record_type', 'before'}: el
+    cliente debe descartar sus registros de ese tipo anteriores a `before`.
+    Devuelve (cambios, última secuencia leída, hay_más).
+    """
+    changes = RecordChange.query.filter(
+        or_(RecordChange.user_id == user_id,
+            and_(RecordChange.user_id.is_(None), RecordChange.action == 'purge')),
+        RecordChange.seq > since
+    ).order_by(RecordChange.seq).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    created_ids = [change.record_id for change in changes if change.action == 'create']
+    records = {record.id: record for record in Record.query.filter(Record.id.in_(created_ids))} if created_ids else {}
+
+    output = []
+    for change in changes:
+        if change.action == 'create':
+            record = records.get(change.record_id)
+            if record is None:
+                continue
+            output.append({'seq': change.seq, 'action': 'create', 'record': record})
+        elif change.action == 'purge':
+            output.append({'seq': change.seq, 'action': 'purge', 'record_type': change.record_type,
+                           'before': change.purged_before.isoformat() if change.purged_before else None,
+                           'deleted': True})
+        else:
+            output.append({'seq': change.seq, 'action': change.action, 'id': change.record_id,
+                           'record_type': change.record_type, 'deleted': True})
+    last_seq = changes[-1].seq if changes else since
+    return output, last_seq, has_more
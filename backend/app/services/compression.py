@@ -0,0 +1,285 @@
+"""
+Compresión de series temporales en la ingesta.
+
+Cada serie (usuario + record_type) decide si una lectura nueva se guarda o se descarta
+sin consultar la base de datos, con un estado por serie en memoria o en Redis:
+
+- deadband: se guarda la lectura si alguna métrica se aleja más de su cota del último
+  valor guardado.
+- swinging_door: se mantiene, desde el último punto guardado, el rango de pendientes
+  que deja todas las lecturas intermedias a menos de la cota de error de la recta
+  interpolada. Cuando una lectura nueva cierra la "puerta" se guarda la lectura
+  anterior (retenida en el estado) y se abre una puerta nueva desde ella.
+
+Las métricas sin cota en COMPRESSION_ERROR_BOUNDS no intervienen en la decisión.
+La lectura retenida de una serie no se pierde: si el LRU en memoria expulsa la serie
+se devuelve para guardarla junto con el lote actual, y al terminar el proceso
+`drain()` entrega las que queden (ver store_held_readings en app/scheduler.py). Tras un
+reinicio el estado se vuelve a sembrar con el último registro guardado.
+"""
+import datetime
+import json
+import threading
+from collections import OrderedDict
+from app.core.config import (
+    COMPRESSION_MODE, COMPRESSION_RECORD_TYPES, COMPRESSION_ERROR_BOUNDS,
+    COMPRESSION_MAX_INTERVAL, COMPRESSION_STATE_MAX_SERIES, REDIS_URL, SCHEDULER_MODE
+)
+from app.core.metrics import COMPRESSION_READINGS
+from app.services.rollup_service import numeric_metrics
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+def series_key(user_id, record_type):
+    return f'{record_type}:{user_id}'
+
+def _parse_series_key(key):
+    record_type, _, user_id = key.rpartition(':')
+    return int(user_id), record_type
+
+def _seconds(timestamp):
+    return (timestamp - _EPOCH).total_seconds()
+
+class MemoryStateStore:
+    """Estado por serie en la memoria del proceso, como LRU acotado."""
+
+    def __init__(self, max_series):
+        self.max_series = max_series
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self._lock:
+            return {key: self._states[key] for key in keys if key in self._states}
+
+    def set_many(self, states):
+        """Guarda los estados y devuelve {clave: estado} de las series expulsadas del LRU."""
+        evicted = {}
+        with self._lock:
+            for key, state in states.items():
+                self._states[key] = state
+                self._states.move_to_end(key)
+            while len(self._states) > self.max_series:
+                key, state = self._states.popitem(last=False)
+                evicted[key] = state
+        return evicted
+
+    def pop_all(self):
+        with self._lock:
+            states, self._states = self._states, OrderedDict()
+        return states
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._states.pop(key, None)
+
+class RedisStateStore:
+    """Estado por serie en un hash de Redis, compartido por todos los procesos."""
+
+    def __init__(self, url, name='compression:state'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.name = name
+
+    def get_many(self, keys):
+        if not keys:
+            return {}
+        values = self._redis.hmget(self.name, keys)
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, states):
+        if states:
+            self._redis.hset(self.name, mapping={key: json.dumps(state) for key, state in states.items()})
+        # Sin límite propio: el estado sobrevive a los reinicios y no hay expulsiones
+        return {}
+
+    def delete_many(self, keys):
+        if keys:
+            self._redis.hdel(self.name, *keys)
+
+class SeriesCompressor:
+    """Aplica la compresión configurada a lecturas (user_id, record_type, timestamp, data)."""
+
+    def __init__(self, store, mode, bounds, max_interval, record_types):
+        self.store = store
+        self.mode = mode
+        self.bounds = bounds
+        self.max_interval = max_interval
+        self.record_types = set(record_types)
+        self._lock = threading.Lock()
+        # Lecturas retenidas de series expulsadas del LRU, a entregar con el próximo compress()
+        self._evicted = []
+
+    def _values(self, data):
+        return {metric: value for metric, value in numeric_metrics(data).items() if metric in self.bounds}
+
+    def _archive(self, timestamp, values):
+        return {'t': _seconds(timestamp), 'values': values, 'up': {}, 'low': {}, 'held': None}
+
+    def _deadband(self, state, timestamp, data, values):
+        if any(abs(value - state['values'][metric]) > self.bounds[metric] for metric, value in values.items()):
+            return self._archive(timestamp, values), [(timestamp, data)]
+        return state, []
+
+    def _swinging_door(self, state, timestamp, data, values, elapsed):
+        up, low = {}, {}
+        closed = False
+        for metric, value in values.items():
+            start, bound = state['values'][metric], self.bounds[metric]
+            up[metric] = (value + bound - start) / elapsed
+            low[metric] = (value - bound - start) / elapsed
+            if metric in state['up']:
+                up[metric] = min(up[metric], state['up'][metric])
+                low[metric] = max(low[metric], state['low'][metric])
+            closed = closed or low[metric] > up[metric]
+
+        if closed:
+            held = state['held']
+            if held is None:
+                return self._archive(timestamp, values), [(timestamp, data)]
+            # Se guarda la lectura retenida y la puerta se abre de nuevo desde ella
+            held_timestamp = datetime.datetime.fromisoformat(held['timestamp'])
+            state, stored = self._step(
+                self._archive(held_timestamp, self._values(held['data'])), timestamp, data)
+            return state, [(held_timestamp, held['data'])] + stored
+
+        state = dict(state, up=up, low=low, held={'timestamp': timestamp.isoformat(), 'data': data})
+        return state, []
+
+    def _held(self, state):
+        # Las series que solo han recibido lecturas sin métricas comprimibles no tienen estado
+        held = state['held'] if state else None
+        return [(datetime.datetime.fromisoformat(held['timestamp']), held['data'])] if held else []
+
+    def _step(self, state, timestamp, data):
+        """Procesa una lectura y devuelve (estado nuevo, [(timestamp, data)] a guardar)."""
+        values = self._values(data)
+        if not values:
+            return state, [(timestamp, data)]
+        if state is None:
+            return self._archive(timestamp, values), [(timestamp, data)]
+        elapsed = _seconds(timestamp) - state['t']
+        if elapsed <= 0:
+            # Lectura fuera de orden: se guarda tal cual sin alterar la serie
+            return state, [(timestamp, data)]
+        if set(values) != set(state['values']) or elapsed >= self.max_interval:
+            # Se cierra la serie actual: la lectura retenida se guarda antes que la nueva
+            return self._archive(timestamp, values), self._held(state) + [(timestamp, data)]
+        if self.mode == 'deadband':
+            return self._deadband(state, timestamp, data, values)
+        return self._swinging_door(state, timestamp, data, values, elapsed)
+
+    def compress(self, entries):
+        """
+        Recibe lecturas (user_id, record_type, timestamp, data) en orden temporal por
+        serie y devuelve, con el mismo formato, las que hay que guardar.
+        """
+        if self.mode == 'off':
+            return list(entries)
+        keys = list({series_key(user_id, record_type) for user_id, record_type, _, _ in entries
+                     if record_type in self.record_types})
+        output = []
+        with self._lock:
+            states = self.store.get_many(keys)
+            changed = {}
+            for entry in entries:
+                user_id, record_type, timestamp, data = entry
+                if record_type not in self.record_types:
+                    output.append(entry)
+                    continue
+                key = series_key(user_id, record_type)
+                state, stored = self._step(states.get(key), timestamp, data)
+                states[key] = changed[key] = state
+                output.extend((user_id, record_type, stored_at, stored_data) for stored_at, stored_data in stored)
+            self._set_states(changed)
+            # Las series expulsadas del LRU entregan su lectura retenida para guardarla ya
+            output.extend(self._evicted)
+            self._evicted = []
+        COMPRESSION_READINGS.labels('received').inc(len(entries))
+        COMPRESSION_READINGS.labels('stored').inc(len(output))
+        return output
+
+    def _set_states(self, states):
+        """Guarda estados (con el lock tomado) y aparta las lecturas retenidas de las series expulsadas."""
+        self._evicted.extend(self._held_entries(self.store.set_many(states)))
+
+    def _held_entries(self, states):
+        entries = []
+        for key, state in states.items():
+            user_id, record_type = _parse_series_key(key)
+            entries.extend((user_id, record_type, held_at, held_data) for held_at, held_data in self._held(state))
+        return entries
+
+    def holds(self, entry):
+        """Indica si la lectura (user_id, record_type, timestamp, data) es la retenida de su serie."""
+        user_id, record_type, timestamp, _ = entry
+        key = series_key(user_id, record_type)
+        state = self.store.get_many([key]).get(key)
+        return bool(state and state['held'] and state['held']['timestamp'] == timestamp.isoformat())
+
+    def drain(self):
+        """
+        Vacía el estado en memoria y devuelve las lecturas retenidas pendientes de guardar,
+        con el formato de compress(). Con Redis el estado persiste y no hay nada que entregar.
+        """
+        if self.mode == 'off' or not isinstance(self.store, MemoryStateStore):
+            return []
+        with self._lock:
+            entries, self._evicted = self._evicted + self._held_entries(self.store.pop_all()), []
+        return entries
+
+    def missing(self, user_ids, record_type):
+        """Usuarios cuya serie aún no tiene estado (p. ej. tras reiniciar el proceso)."""
+        if self.mode == 'off' or record_type not in self.record_types:
+            return []
+        known = self.store.get_many([series_key(user_id, record_type) for user_id in user_ids])
+        return [user_id for user_id in user_ids if series_key(user_id, record_type) not in known]
+
+    def seed(self, record_type, latest):
+        """Siembra el estado con el último registro guardado {user_id: (timestamp, data)}."""
+        states = {}
+        for user_id, (timestamp, data) in latest.items():
+            values = self._values(data)
+            if values:
+                states[series_key(user_id, record_type)] = self._archive(timestamp, values)
+        with self._lock:
+            existing = self.store.get_many(list(states))
+            self._set_states({key: state for key, state in states.items() if key not in existing})
+
+    def reset(self, user_ids, record_type):
+        """
+        Empieza series nuevas (p. ej. al cambiar la ubicación del usuario): la siguiente
+        lectura se guarda siempre y no se siembra el estado con registros anteriores.
+        Devuelve, con el formato de compress(), las lecturas retenidas de las series
+        anteriores, que hay que guardar.
+        """
+        if self.mode == 'off' or record_type not in self.record_types:
+            return []
+        keys = [series_key(user_id, record_type) for user_id in user_ids]
+        with self._lock:
+            held = self._held_entries(self.store.get_many(keys))
+            # Un estado sin métricas cierra la serie con la próxima lectura (ver _step)
+            self._set_states({key: self._archive(_EPOCH, {}) for key in keys})
+        return held
+
+    def forget(self, entries):
+        """Descarta el estado de las series de lecturas cuyo guardado falló."""
+        self.store.delete_many(list({series_key(user_id, record_type) for user_id, record_type, _, _ in entries}))
+
+def effective_mode(mode, scheduler_mode, redis_url):
+    """
+    Modo de compresión a usar. Con SCHEDULER_MODE=leader hay varios workers y cada uno
+    recibe lecturas de las mismas series: sin Redis cada proceso tendría su propio estado
+    y descartaría lecturas que otro ya había retenido, así que se desactiva la compresión.
+    """
+    if mode != 'off' and scheduler_mode == 'leader' and not redis_url:
+        print(f"[{datetime.datetime.utcnow()}] COMPRESSION_MODE={mode} requires REDIS_URL "
+              f"with SCHEDULER_MODE=leader; compression disabled.")
+        return 'off'
+    return mode
+
+compressor = SeriesCompressor(
+    RedisStateStore(REDIS_URL) if REDIS_URL else MemoryStateStore(COMPRESSION_STATE_MAX_SERIES),
+    effective_mode(COMPRESSION_MODE, SCHEDULER_MODE, REDIS_URL), COMPRESSION_ERROR_BOUNDS, COMPRESSION_MAX_INTERVAL, COMPRESSION_RECORD_TYPES
+)
@@ -0,0 +1,132 @@
+"""
+Elección de líder para las tareas programadas.
+
+Con varios workers o réplicas cada proceso arranca su scheduler, pero las tareas solo
+se ejecutan en el que tiene la concesión (lease). El líder la renueva periódicamente;
+si deja de hacerlo (caída, bloqueo) la concesión vence y otro proceso la toma.
+La concesión vive en Redis (SET NX PX) o en la tabla scheduler_lease.
+"""
+import datetime
+import os
+import socket
+import threading
+import uuid
+from sqlalchemy.exc import IntegrityError
+from app.core.config import (
+    REDIS_URL, SCHEDULER_LEASE_BACKEND, SCHEDULER_LEASE_TTL, SCHEDULER_LEASE_RENEW_INTERVAL
+)
+from app.models.data_models import db, SchedulerLease
+
+class DatabaseLease:
+    """Concesión en la base de datos: un UPDATE condicional que solo gana un proceso."""
+
+    def __init__(self, app, name):
+        self.app = app
+        self.name = name
+
+    def acquire(self, holder, ttl):
+        now = datetime.datetime.utcnow()
+        expires_at = now + datetime.timedelta(seconds=ttl)
+        table = SchedulerLease.__table__
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                taken = connection.execute(table.update().where(
+                    table.c.name == self.name,
+                    (table.c.holder == holder) | (table.c.expires_at < now)
+                ).values(holder=holder, expires_at=expires_at)).rowcount
+                if taken:
+                    return True
+            try:
+                with db.engine.begin() as connection:
+                    connection.execute(table.insert().values(name=self.name, holder=holder, expires_at=expires_at))
+                return True
+            except IntegrityError:
+                return False
+
+    def release(self, holder):
+        table = SchedulerLease.__table__
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.execute(table.delete().where(table.c.name == self.name, table.c.holder == holder))
+
+class RedisLease:
+    """Concesión en Redis: SET NX PX para tomarla y un script que solo renueva o libera el dueño."""
+
+    RENEW_SCRIPT = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                    "return redis.call('pexpire', KEYS[1], ARGV[2]) else return 0 end")
+    RELEASE_SCRIPT = ("if redis.call('get', KEYS[1]) == ARGV[1] then "
+                      "return redis.call('del', KEYS[1]) else return 0 end")
+
+    def __init__(self, url, name):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.name = f'lease:{name}'
+
+    def acquire(self, holder, ttl):
+        ttl_ms = int(ttl * 1000)
+        if self._redis.set(self.name, holder, nx=True, px=ttl_ms):
+            return True
+        return bool(self._redis.eval(self.RENEW_SCRIPT, 1, self.name, holder, ttl_ms))
+
+    def release(self, holder):
+        self._redis.eval(self.RELEASE_SCRIPT, 1, self.name, holder)
+
+class LeaderElector:
+    """
+    Hilo que intenta tomar o renovar la concesión cada `renew_interval` segundos.
+    Ante cualquier error con el backend el proceso deja de considerarse líder.
+    """
+
+    def __init__(self, lease, ttl=SCHEDULER_LEASE_TTL, renew_interval=SCHEDULER_LEASE_RENEW_INTERVAL):
+        self.lease = lease
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _renew(self):
+        try:
+            acquired = self.lease.acquire(self.holder, self.ttl)
+        except Exception as e:
+            print("Error renewing scheduler lease:", e)
+            acquired = False
+        if acquired != self.is_leader:
+            state = "acquired" if acquired else "lost"
+            print(f"[{datetime.datetime.utcnow()}] Scheduler lease {state} by {self.holder}.")
+        self.is_leader = acquired
+
+    def _run(self):
+        while not self._stop.wait(self.renew_interval):
+            self._renew()
+
+    def start(self):
+        # Primer intento en el arranque para que las tareas iniciales ya sepan si son líder
+        self._renew()
+        self._thread = threading.Thread(target=self._run, name='leader-elector', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                self.lease.release(self.holder)
+            except Exception as e:
+                print("Error releasing scheduler lease:", e)
+
+    def leader_only(self, fn):
+        """Envuelve una tarea para que solo se ejecute mientras este proceso es líder."""
+        def job():
+            if self.is_leader:
+                return fn()
+        return job
+
+def create_elector(app, name='scheduler'):
+    if SCHEDULER_LEASE_BACKEND == 'redis':
+        lease = RedisLease(REDIS_URL, name)
+    else:
+        lease = DatabaseLease(app, name)
+    return LeaderElector(lease)
@@ -0,0 +1,97 @@
+"""
+Purga de datos antiguos según las políticas de retención.
+
+Los borrados se hacen en lotes pequeños seleccionados por índice, con un commit y
+una pausa breve entre lotes, para no retener el bloqueo de escritura de SQLite.
+Después se devuelve el espacio libre al sistema con `PRAGMA incremental_vacuum`.
+"""
+import datetime
+import time
+from app.core.config import (
+    RETENTION_POLICIES, ROLLUP_RETENTION, SEISMIC_INGEST_LOOKBACK_DAYS,
+    RETENTION_CHUNK_SIZE, RETENTION_CHUNK_PAUSE, SQLITE_INCREMENTAL_VACUUM_PAGES, CHANGE_FEED_RETENTION_DAYS
+)
+from app.core.metrics import RETENTION_ROWS_PURGED, RETENTION_PURGE_SECONDS, RETENTION_VACUUM_PAGES
+from app.models.data_models import db, Record, RecordChange, RecordRollup, SeismicEvent
+from app.services.change_feed import record_purge, record_trim
+
+def _purge_chunked(model, order_column, *conditions):
+    """Borra en lotes de RETENTION_CHUNK_SIZE las filas que cumplen las condiciones."""
+    key = model.__mapper__.primary_key[0]
+    purged = 0
+    while True:
+        ids = [row_id for (row_id,) in db.session.query(key).filter(*conditions)
+               .order_by(order_column).limit(RETENTION_CHUNK_SIZE)]
+        if not ids:
+            break
+        model.query.filter(key.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        purged += len(ids)
+        RETENTION_ROWS_PURGED.labels(model.__tablename__).inc(len(ids))
+        if len(ids) < RETENTION_CHUNK_SIZE:
+            break
+        time.sleep(RETENTION_CHUNK_PAUSE)
+    return purged
+
+def incremental_vacuum():
+    """En SQLite con auto_vacuum=INCREMENTAL, libera las páginas vacías en pasos pequeños."""
+    if db.engine.dialect.name != 'sqlite':
+        return 0
+    freed = 0
+    with db.engine.connect() as connection:
+        if connection.exec_driver_sql('PRAGMA auto_vacuum').scalar() != 2:
+            return 0
+        while True:
+            free_pages = connection.exec_driver_sql('PRAGMA freelist_count').scalar()
+            if not free_pages:
+                break
+            step = min(free_pages, SQLITE_INCREMENTAL_VACUUM_PAGES)
+            connection.exec_driver_sql(f'PRAGMA incremental_vacuum({step})')
+            connection.commit()
+            freed += step
+            RETENTION_VACUUM_PAGES.inc(step)
+            time.sleep(RETENTION_CHUNK_PAUSE)
+    return freed
+
+def purge_expired(app):
+    """Tarea del scheduler: aplica las políticas de retención y recupera espacio."""
+    started = time.perf_counter()
+    now = datetime.datetime.utcnow()
+    stats = {'record': {}, 'record_rollup': {}, 'seismic_event': 0, 'record_change': 0, 'vacuum_pages': 0}
+    with app.app_context():
+        try:
+            for record_type, days in RETENTION_POLICIES.items():
+                cutoff = now - datetime.timedelta(days=days)
+                stats['record'][record_type] = _purge_chunked(
+                    Record, Record.timestamp, Record.record_type == record_type, Record.timestamp < cutoff)
+                if stats['record'][record_type]:
+                    # Sin lápidas por registro: una marca global (con la fecha de corte) llega al
+                    # feed de todos los usuarios y cambia su versión (ETags y caché de resultados)
+                    record_purge(record_type, cutoff)
+                    db.session.commit()
+            for bucket, days in ROLLUP_RETENTION.items():
+                cutoff = now - datetime.timedelta(days=days)
+                stats['record_rollup'][bucket] = _purge_chunked(
+                    RecordRollup, RecordRollup.bucket_start,
+                    RecordRollup.bucket == bucket, RecordRollup.bucket_start < cutoff)
+            # Los sismos fuera de la ventana de consulta ya no se pueden servir
+            cutoff = now - datetime.timedelta(days=SEISMIC_INGEST_LOOKBACK_DAYS)
+            stats['seismic_event'] = _purge_chunked(
+                SeismicEvent, SeismicEvent.time, SeismicEvent.time < cutoff)
+            cutoff = now - datetime.timedelta(days=CHANGE_FEED_RETENTION_DAYS)
+            if db.session.query(RecordChange.seq).filter(RecordChange.changed_at < cutoff).first():
+                # Primero la marca y luego el recorte: las versiones no retroceden en ningún momento
+                record_trim()
+                db.session.commit()
+                stats['record_change'] = _purge_chunked(
+                    RecordChange, RecordChange.seq, RecordChange.changed_at < cutoff)
+            stats['vacuum_pages'] = incremental_vacuum()
+        except Exception as e:
+            db.session.rollback()
+            print("Error purging expired data:", e)
+
+    duration = time.perf_counter() - started
+    RETENTION_PURGE_SECONDS.observe(duration)
+    stats['duration_seconds'] = round(duration, 3)
+    print(f"[{datetime.datetime.utcnow()}] Retention purge: {stats}")
+    return stats
@@ -0,0 +1,118 @@
+import datetime
+import math
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.data_models import db, RecordRollup
+
+# Duración de cada bucket en segundos
+BUCKETS = {'1m': 60, '1h': 3600, '1d': 86400}
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_KEY_COLUMNS = ['user_id', 'record_type', 'metric', 'bucket', 'bucket_start']
+# Nombres más largos no caben en RecordRollup.metric (en PostgreSQL harían fallar la transacción)
+MAX_METRIC_NAME_LENGTH = RecordRollup.__table__.c.metric.type.length
+
+def bucket_start(timestamp, bucket):
+    """Trunca un timestamp al inicio de su bucket."""
+    seconds = BUCKETS[bucket]
+    offset = int((timestamp - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + datetime.timedelta(seconds=offset)
+
+def numeric_metrics(data):
+    """
+    Extrae las métricas numéricas (int/float finitos) de un payload de registro. Se
+    ignoran NaN/infinito, los enteros que no caben en un float y las claves que no
+    caben en RecordRollup.metric.
+    """
+    if not isinstance(data, dict):
+        return {}
+    metrics = {}
+    for key, value in data.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        if not isinstance(key, str) or len(key) > MAX_METRIC_NAME_LENGTH:
+            continue
+        try:
+            value = float(value)
+        except OverflowError:
+            continue
+        if math.isfinite(value):
+            metrics[key] = value
+    return metrics
+
+def _aggregate(entries):
+    """Agrupa en memoria las lecturas por bucket antes de tocar la base de datos."""
+    rows = {}
+    for user_id, record_type, timestamp, data in entries:
+        for metric, value in numeric_metrics(data).items():
+            for bucket in BUCKETS:
+                key = (user_id, record_type, metric, bucket, bucket_start(timestamp, bucket))
+                row = rows.get(key)
+                if row is None:
+                    rows[key] = dict(zip(_KEY_COLUMNS, key), min_value=value, max_value=value,
+                                     sum_value=value, count=1, last_value=value, last_timestamp=timestamp)
+                    continue
+                row['min_value'] = min(row['min_value'], value)
+                row['max_value'] = max(row['max_value'], value)
+                row['sum_value'] += value
+                row['count'] += 1
+                if timestamp >= row['last_timestamp']:
+                    row['last_value'] = value
+                    row['last_timestamp'] = timestamp
+    return list(rows.values())
+
+def _upsert_statement(dialect):
+    table = RecordRollup.__table__
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table)
+        least, greatest = func.least, func.greatest
+    else:
+        stmt = sqlite.insert(table)
+        # En SQLite min()/max() con varios argumentos son funciones escalares
+        least, greatest = func.min, func.max
+    excluded = stmt.excluded
+    newer = excluded.last_timestamp >= table.c.last_timestamp
+    return stmt.on_conflict_do_update(
+        index_elements=_KEY_COLUMNS,
+        set_={
+            'min_value': least(table.c.min_value, excluded.min_value),
+            'max_value': greatest(table.c.max_value, excluded.max_value),
+            'sum_value': table.c.sum_value + excluded.sum_value,
+            'count': table.c.count + excluded.count,
+            'last_value': case((newer, excluded.last_value), else_=table.c.last_value),
+            'last_timestamp': case((newer, excluded.last_timestamp), else_=table.c.last_timestamp),
+        }
+    )
+
+def _merge_rows(rows):
+    """Actualización genérica (leer y modificar) para motores sin ON CONFLICT."""
+    for row in rows:
+        existing = RecordRollup.query.filter_by(**{key: row[key] for key in _KEY_COLUMNS}).first()
+        if existing is None:
+            db.session.add(RecordRollup(**row))
+            continue
+        existing.min_value = min(existing.min_value, row['min_value'])
+        existing.max_value = max(existing.max_value, row['max_value'])
+        existing.sum_value += row['sum_value']
+        existing.count += row['count']
+        if row['last_timestamp'] >= existing.last_timestamp:
+            existing.last_value = row['last_value']
+            existing.last_timestamp = row['last_timestamp']
+
+def update_rollups(entries):
+    """
+    Actualiza incrementalmente los rollups con nuevas lecturas.
+
+    `entries` es un iterable de tuplas (user_id, record_type, timestamp, data) con `data`
+    ya como diccionario. No hace commit: se ejecuta en la misma transacción que la
+    inserción de los registros. Devuelve el número de filas de rollup afectadas.
+    """
+    rows = _aggregate(entries)
+    if not rows:
+        return 0
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        db.session.execute(_upsert_statement(dialect), rows)
+    else:
+        _merge_rows(rows)
+    return len(rows)
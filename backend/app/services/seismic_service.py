@@ -0,0 +1,187 @@
+import datetime
+import json
+import math
+import time
+from app.core.config import (
+    SEISMIC_CACHE_TIMEOUT, SEISMIC_CACHE_HARD_TIMEOUT, CACHE_COORD_DIGITS, SEISMIC_LOCAL_STORE,
+    SEISMIC_INGEST_MIN_MAGNITUDE, SEISMIC_INGEST_LOOKBACK_DAYS, SEISMIC_INGEST_PAGE_SIZE
+)
+from app.events import notify_database_change
+from app.models.data_models import db, IngestState, SeismicEvent, seismic_grid_cell
+from app.utils.seismic_api import get_seismic_data, get_seismic_feed
+from app.utils.swr_cache import StaleWhileRevalidateCache
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+# Por encima de este número de celdas el prefiltro usa solo el rango de coordenadas
+MAX_GRID_CELLS = 400
+# Nombre de la marca de agua de la ingesta en IngestState
+SEISMIC_INGEST_STATE = 'usgs_seismic'
+
+def _fetch_seismic(min_magnitude, limit, latitude, longitude, maxradiuskm):
+    seismic_data = get_seismic_data(min_magnitude, limit, latitude, longitude, maxradiuskm)
+
+    # Emitir actualización sísmica a través de SocketIO
+    notify_database_change("seismic", "update", {
+        "parameters": {
+            "min_magnitude": min_magnitude,
+            "maxradiuskm": maxradiuskm
+        },
+        "count": len(seismic_data)
+    })
+    return seismic_data
+
+# Las coordenadas se redondean para que consultas casi idénticas compartan entrada
+seismic_cache = StaleWhileRevalidateCache(
+    'seismic', _fetch_seismic, SEISMIC_CACHE_TIMEOUT, SEISMIC_CACHE_HARD_TIMEOUT,
+    coord_params=('latitude', 'longitude'), coord_digits=CACHE_COORD_DIGITS
+)
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia en km sobre la superficie terrestre entre dos puntos."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def _from_epoch_ms(value):
+    return datetime.datetime.utcfromtimestamp(value / 1000.0)
+
+def _event_row(feature):
+    properties = feature.get("properties") or {}
+    longitude, latitude, depth = (feature["geometry"]["coordinates"] + [None])[:3]
+    return {
+        "id": feature["id"],
+        "time": _from_epoch_ms(properties["time"]),
+        "updated": _from_epoch_ms(properties.get("updated") or properties["time"]),
+        "magnitude": properties.get("mag"),
+        "latitude": latitude,
+        "longitude": longitude,
+        "depth": depth,
+        "grid_cell": seismic_grid_cell(latitude, longitude),
+        "feature": json.dumps(feature)
+    }
+
+def ingest_seismic_events(app):
+    """
+    Tarea del scheduler: trae de USGS los eventos creados o modificados desde la última
+    ingesta completa (`updatedafter`) y los guarda en la tabla local, página a página.
+    Los eventos marcados como eliminados en USGS se borran localmente.
+
+    Las páginas van ordenadas por tiempo, no por `updated`, así que la marca de agua
+    (el mayor `updated` visto) se guarda en IngestState solo tras la última página: si
+    la ingesta falla a mitad, la siguiente vuelve a pedir todo desde la marca anterior
+    (el reemplazo por id hace que repetir páginas no duplique eventos).
+    """
+    started = time.perf_counter()
+    upserted = 0
+    deleted = 0
+    with app.app_context():
+        starttime = datetime.datetime.utcnow() - datetime.timedelta(days=SEISMIC_INGEST_LOOKBACK_DAYS)
+        state = db.session.get(IngestState, SEISMIC_INGEST_STATE) or IngestState(name=SEISMIC_INGEST_STATE)
+        updatedafter = state.watermark
+        watermark = updatedafter
+        offset = 1
+        try:
+            while True:
+                page = get_seismic_feed(starttime, updatedafter, SEISMIC_INGEST_MIN_MAGNITUDE,
+                                        SEISMIC_INGEST_PAGE_SIZE, offset)
+                features = [feature for feature in page.get("features", []) if feature.get("id")]
+                removed = {f["id"] for f in features if (f.get("properties") or {}).get("status") == "deleted"}
+                rows = [_event_row(f) for f in features
+                        if f["id"] not in removed and f.get("geometry") and (f.get("properties") or {}).get("time")]
+                ids = [f["id"] for f in features]
+                if ids:
+                    # Reemplazo por id: sirve tanto para eventos nuevos como modificados
+                    SeismicEvent.query.filter(SeismicEvent.id.in_(ids)).delete(synchronize_session=False)
+                if rows:
+                    db.session.execute(db.insert(SeismicEvent), rows)
+                for feature in features:
+                    properties = feature.get("properties") or {}
+                    if properties.get("updated") or properties.get("time"):
+                        updated = _from_epoch_ms(properties.get("updated") or properties["time"])
+                        watermark = updated if watermark is None else max(watermark, updated)
+                last_page = len(page.get("features", [])) < SEISMIC_INGEST_PAGE_SIZE
+                if last_page:
+                    state.watermark = watermark
+                    state.updated_at = datetime.datetime.utcnow()
+                    db.session.add(state)
+                db.session.commit()
+                upserted += len(rows)
+                deleted += len(removed)
+                if last_page:
+                    break
+                offset += SEISMIC_INGEST_PAGE_SIZE
+        except Exception as e:
+            db.session.rollback()
+            print("Error ingesting seismic events:", e)
+
+    if upserted or deleted:
+        notify_database_change("seismic", "update", {"upserted": upserted, "deleted": deleted})
+    stats = {"upserted": upserted, "deleted": deleted, "duration_seconds": round(time.perf_counter() - started, 3)}
+    print(f"[{datetime.datetime.utcnow()}] Seismic ingest: {upserted} upserted, {deleted} deleted "
+          f"in {stats['duration_seconds']}s.")
+    return stats
+
+def _grid_cells(min_lat, max_lat, min_lon, max_lon):
+    rows = range(min(int(min_lat + 90), 179), min(int(max_lat + 90), 179) + 1)
+    columns = range(int(min_lon + 180), int(max_lon + 180) + 1)
+    if len(rows) * len(columns) > MAX_GRID_CELLS:
+        return None
+    return [row * 360 + column % 360 for row in rows for column in columns]
+
+def query_local_earthquakes(min_magnitude, limit, latitude, longitude, maxradiuskm):
+    """
+    Sismos del almacén local dentro de `maxradiuskm` del punto, del más reciente al más
+    antiguo, con el mismo formato GeoJSON que USGS. Prefiltra en SQL por celdas de la
+    rejilla y caja de coordenadas y confirma la distancia con haversine.
+    """
+    delta_lat = maxradiuskm / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0)
+    cos_lat = math.cos(math.radians(latitude))
+    delta_lon = maxradiuskm / (KM_PER_DEGREE * cos_lat) if cos_lat > 1e-6 else 360.0
+
+    query = SeismicEvent.query.filter(
+        SeismicEvent.time >= datetime.datetime.utcnow() - datetime.timedelta(days=SEISMIC_INGEST_LOOKBACK_DAYS),
+        SeismicEvent.magnitude >= min_magnitude,
+        SeismicEvent.latitude.between(min_lat, max_lat)
+    )
+    min_lon, max_lon = longitude - delta_lon, longitude + delta_lon
+    # Si la caja cruza el antimeridiano o los polos se filtra solo por latitud
+    if min_lon >= -180.0 and max_lon <= 180.0 and min_lat > -90.0 and max_lat < 90.0:
+        query = query.filter(SeismicEvent.longitude.between(min_lon, max_lon))
+        cells = _grid_cells(min_lat, max_lat, min_lon, max_lon)
+        if cells is not None:
+            query = query.filter(SeismicEvent.grid_cell.in_(cells))
+
+    features = []
+    for event in query.order_by(SeismicEvent.time.desc()).yield_per(500):
+        if haversine_km(latitude, longitude, event.latitude, event.longitude) <= maxradiuskm:
+            features.append(json.loads(event.feature))
+            if len(features) >= limit:
+                break
+
+    return {
+        "type": "FeatureCollection",
+        "metadata": {
+            "generated": int(time.time() * 1000),
+            "title": "Local USGS event store",
+            "count": len(features)
+        },
+        "features": features
+    }
+
+def local_store_ready(min_magnitude):
+    """El almacén local puede responder si está habilitado, ya tiene datos y cubre la magnitud pedida."""
+    if not SEISMIC_LOCAL_STORE or min_magnitude < SEISMIC_INGEST_MIN_MAGNITUDE:
+        return False
+    return db.session.query(SeismicEvent.id).first() is not None
+
+def get_recent_earthquakes(min_magnitude, limit, latitude, longitude, maxradiuskm):
+    """
+    Sismos recientes alrededor de un punto. Se responden desde el almacén local cuando
+    está disponible; si no, desde USGS a través de la caché.
+    """
+    if local_store_ready(min_magnitude):
+        return query_local_earthquakes(min_magnitude, limit, latitude, longitude, maxradiuskm)
+    return seismic_cache.get(min_magnitude=min_magnitude, limit=limit, latitude=latitude,
+                             longitude=longitude, maxradiuskm=maxradiuskm)
@@ -1,10 +1,46 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.security import generate_password_hash, check_password_hash
+from app.core.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_QUEUE_TIMEOUT
+from app.core.metrics import PASSWORD_HASH_SECONDS, PASSWORD_HASH_REJECTED
 from app.models.data_models import db, User
 
+# El hashing de contraseñas (scrypt/PBKDF2) corre en un pool dedicado para que una
+# ráfaga de logins no acapare la CPU de los hilos que atienden el resto de la API
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+class PasswordHasherBusy(Exception):
+    """Hay demasiadas operaciones de hashing pendientes; el cliente debe reintentar."""
+
+def _timed(operation, fn, *args):
+    # Se mide dentro del worker: solo el cómputo, sin la espera en la cola
+    started = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        PASSWORD_HASH_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+def _run_hasher(operation, fn, *args):
+    if not _hash_slots.acquire(timeout=PASSWORD_HASH_QUEUE_TIMEOUT):
+        PASSWORD_HASH_REJECTED.inc()
+        raise PasswordHasherBusy()
+    try:
+        return _hash_executor.submit(_timed, operation, fn, *args).result()
+    finally:
+        _hash_slots.release()
+
+def hash_password(password):
+    return _run_hasher('hash', generate_password_hash, password)
+
+def verify_password(password_hash, password):
+    return _run_hasher('verify', check_password_hash, password_hash, password)
+
 def create_user(username, password):
     if User.query.filter_by(username=username).first():
         return None  # Usuario ya existe
-    user = User(username=username, password_hash=generate_password_hash(password))
+    user = User(username=username, password_hash=hash_password(password))
     db.session.add(user)
     try:
         db.session.commit()
@@ -16,6 +52,6 @@ def create_user(username, password):
 
 def authenticate_user(username, password):
     user = User.query.filter_by(username=username).first()
-    if user and check_password_hash(user.password_hash, password):
+    if user and verify_password(user.password_hash, password):
         return user
     return None
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.core.config import WEATHER_CACHE_TIMEOUT, WEATHER_CACHE_HARD_TIMEOUT, WEATHER_BATCH_MAX_WORKERS
+from app.events import notify_weather_update
+from app.utils.swr_cache import StaleWhileRevalidateCache
+from app.utils.weather_api import get_weather
+
+# Pool acotado compartido por las consultas en lote
+_executor = ThreadPoolExecutor(max_workers=WEATHER_BATCH_MAX_WORKERS, thread_name_prefix='weather')
+
+def normalize_location(city, country):
+    """Normaliza una ubicación para que variantes de escritura compartan caché ('san  josé', 'cr')."""
+    return ' '.join(city.split()).title(), country.strip().upper()
+
+def format_weather(weather_data):
+    """Convierte la respuesta de OpenWeather al formato que usa el dashboard."""
+    return {
+        "temperatura": weather_data.get("main", {}).get("temp"),
+        "humedad": weather_data.get("main", {}).get("humidity"),
+        "descripcion": weather_data.get("weather", [{}])[0].get("description"),
+        "icono": weather_data.get("weather", [{}])[0].get("icon"),
+        "velocidad_viento": weather_data.get("wind", {}).get("speed"),
+        # Aquí se forza un valor por defecto para uv_index si no se recibe
+        "uv_index": weather_data.get("uv_index", 5.0),
+        "avg_temp": weather_data.get("avg_temp", weather_data.get("main", {}).get("temp"))
+    }
+
+def _fetch_weather(city, country):
+    result = format_weather(get_weather(city, country))
+
+    # Emitir actualización a clientes conectados a través de SocketIO
+    notify_weather_update({
+        "city": city,
+        "country": country,
+        "data": result
+    })
+    return result
+
+# Fresco durante WEATHER_CACHE_TIMEOUT; hasta WEATHER_CACHE_HARD_TIMEOUT se sirve y se refresca en segundo plano
+weather_cache = StaleWhileRevalidateCache('weather', _fetch_weather, WEATHER_CACHE_TIMEOUT, WEATHER_CACHE_HARD_TIMEOUT)
+
+def get_current_weather(city, country):
+    """
+    Devuelve el clima actual de una ubicación, desde caché si está disponible.
+    Ante un fallo de caché, las peticiones concurrentes para la misma ubicación
+    comparten una única llamada a OpenWeather.
+    """
+    city, country = normalize_location(city, country)
+    return weather_cache.get(city=city, country=country)
+
+def get_current_weather_batch(locations):
+    """
+    Consulta varias ubicaciones [(city, country), ...] en paralelo sobre el pool acotado.
+    Devuelve una lista en el mismo orden con `data` o `error` por ubicación.
+    """
+    app = current_app._get_current_object()
+
+    def fetch(location):
+        city, country = location
+        with app.app_context():
+            try:
+                return {"city": city, "country": country, "data": get_current_weather(city, country)}
+            except Exception as e:
+                return {"city": city, "country": country, "error": str(e)}
+
+    return list(_executor.map(fetch, locations))
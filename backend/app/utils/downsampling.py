@@ -0,0 +1,75 @@
+"""
+Reducción de series para gráficos con Largest-Triangle-Three-Buckets (LTTB).
+
+Se conservan el primer y el último punto; el resto se reparte en `threshold - 2`
+buckets y de cada uno se elige el punto que forma el triángulo de mayor área con el
+punto elegido en el bucket anterior y la media del bucket siguiente. Así se mantienen
+los picos y la forma visual de la serie con un número fijo de puntos.
+
+Con numpy (opcional) las medias de los buckets y las áreas de cada bucket se calculan
+vectorizadas; sin numpy se usa la versión en Python puro, con el mismo resultado.
+"""
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def _bounds(n, threshold):
+    """Límites [inicio, fin) de los buckets interiores sobre los índices 1..n-2."""
+    every = (n - 2) / (threshold - 2)
+    return [(int(i * every) + 1, int((i + 1) * every) + 1) for i in range(threshold - 2)]
+
+def _lttb_python(t, v, threshold):
+    n = len(t)
+    bounds = _bounds(n, threshold)
+    selected = [0]
+    a = 0
+    for i, (start, end) in enumerate(bounds):
+        # Media del bucket siguiente (el último punto para el último bucket)
+        next_start, next_end = bounds[i + 1] if i + 1 < len(bounds) else (n - 1, n)
+        count = next_end - next_start
+        avg_t = sum(t[next_start:next_end]) / count
+        avg_v = sum(v[next_start:next_end]) / count
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((t[a] - avg_t) * (v[j] - v[a]) - (t[a] - t[j]) * (avg_v - v[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+def _lttb_numpy(t, v, threshold):
+    t = numpy.asarray(t, dtype=float)
+    v = numpy.asarray(v, dtype=float)
+    n = len(t)
+    bounds = _bounds(n, threshold) + [(n - 1, n)]
+    starts = numpy.array([start for start, _ in bounds])
+    counts = numpy.array([end - start for start, end in bounds])
+    # Medias de todos los buckets de una vez (el bucket final es solo el último punto)
+    avg_t = numpy.add.reduceat(t, starts) / counts
+    avg_v = numpy.add.reduceat(v, starts) / counts
+
+    selected = [0]
+    a = 0
+    for i, (start, end) in enumerate(bounds[:-1]):
+        area = numpy.abs((t[a] - avg_t[i + 1]) * (v[start:end] - v[a])
+                         - (t[a] - t[start:end]) * (avg_v[i + 1] - v[a]))
+        a = start + int(area.argmax())
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+def lttb(t, v, threshold):
+    """
+    Devuelve los índices (ordenados) de como mucho `threshold` puntos de la serie
+    (t, v), con `t` creciente. Si la serie ya cabe, devuelve todos los índices.
+    """
+    n = len(t)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    if numpy is not None:
+        return _lttb_numpy(t, v, threshold)
+    return _lttb_python(t, v, threshold)
@@ -0,0 +1,43 @@
+"""
+ETags fuertes y respuestas condicionales (If-None-Match -> 304).
+
+- `conditional(response)`: ETag a partir del hash del cuerpo ya serializado; ahorra
+  la transferencia cuando el cliente ya tiene esa versión.
+- `version_etag(...)` + `not_modified(etag)`: ETag a partir de una versión conocida
+  de antemano (p. ej. la última secuencia del feed de cambios), para responder 304
+  sin consultar ni serializar los datos.
+
+La compresión de respuestas añade a la ETag el sufijo de la codificación; las
+comparaciones aceptan cualquiera de las variantes.
+"""
+import hashlib
+import json
+from flask import Response, request
+from app.utils.response_compression import ENCODINGS
+
+def conditional(response):
+    etag = hashlib.sha1(response.get_data()).hexdigest()
+    return not_modified(etag) or with_etag(response, etag)
+
+def version_etag(*parts):
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()[:32]
+
+def not_modified(etag):
+    """
+    Devuelve la respuesta 304 si el cliente ya tiene `etag` (en cualquiera de sus
+    variantes comprimidas); si no, None.
+    """
+    if any(request.if_none_match.contains(tag) for tag in variants(etag)):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def variants(etag):
+    return [etag] + [f'{etag}-{encoding}' for encoding in ENCODINGS]
+
+def with_etag(response, etag):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
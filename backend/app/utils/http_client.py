@@ -0,0 +1,143 @@
+"""
+Cliente HTTP compartido para las APIs externas (OpenWeather, USGS).
+
+Reutiliza conexiones con un pool por upstream, aplica timeouts de conexión y
+lectura, reintenta errores transitorios con backoff exponencial con jitter y
+corta las llamadas con un circuit breaker cuando el upstream está caído.
+"""
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from app.core.config import (
+    UPSTREAM_POOL_SIZE, UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT,
+    UPSTREAM_MAX_RETRIES, UPSTREAM_BACKOFF_BASE, UPSTREAM_BACKOFF_MAX,
+    UPSTREAM_CIRCUIT_FAILURES, UPSTREAM_CIRCUIT_RESET_SECONDS
+)
+from app.core.metrics import UPSTREAM_REQUEST_SECONDS, UPSTREAM_ERRORS, UPSTREAM_RETRIES
+
+# Códigos HTTP que se consideran transitorios y se reintentan
+RETRY_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El circuit breaker está abierto: se rechaza la llamada sin contactar al upstream."""
+
+class CircuitBreaker:
+    """
+    Circuit breaker de tres estados.
+
+    - closed: las llamadas pasan; tras `failure_threshold` fallos seguidos se abre.
+    - open: las llamadas fallan de inmediato durante `reset_timeout` segundos.
+    - half_open: se deja pasar una única llamada de prueba; si funciona se cierra,
+      si falla se vuelve a abrir.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+class UpstreamClient:
+    """Cliente para un upstream concreto; es seguro compartirlo entre hilos."""
+
+    def __init__(self, name, pool_size=UPSTREAM_POOL_SIZE,
+                 connect_timeout=UPSTREAM_CONNECT_TIMEOUT, read_timeout=UPSTREAM_READ_TIMEOUT,
+                 max_retries=UPSTREAM_MAX_RETRIES, backoff_base=UPSTREAM_BACKOFF_BASE,
+                 backoff_max=UPSTREAM_BACKOFF_MAX, failure_threshold=UPSTREAM_CIRCUIT_FAILURES,
+                 reset_timeout=UPSTREAM_CIRCUIT_RESET_SECONDS):
+        self.name = name
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.session = requests.Session()
+        # Los reintentos se hacen aquí (con jitter y métricas), no en urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _backoff(self, attempt):
+        """Backoff exponencial con jitter completo."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get_json(self, url, params=None):
+        """
+        GET con reintentos que devuelve el cuerpo JSON.
+
+        Los errores de conexión, timeouts y respuestas 429/5xx se reintentan hasta
+        `max_retries` veces y cuentan como fallo para el circuit breaker. Los demás
+        4xx se propagan de inmediato (HTTPError). Una respuesta que no es JSON válido
+        u otro error de requests cuenta como fallo y se propaga sin reintentar. Con el
+        circuito abierto lanza CircuitOpenError sin hacer la llamada.
+        """
+        if not self.breaker.allow():
+            UPSTREAM_ERRORS.labels(self.name, 'circuit_open').inc()
+            raise CircuitOpenError(f'{self.name} circuit is open')
+
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    data = response.json()
+                    self.breaker.record_success()
+                    UPSTREAM_REQUEST_SECONDS.labels(self.name, 'success').observe(time.perf_counter() - started)
+                    return data
+                reason = 'http_429' if response.status_code == 429 else 'http_5xx'
+                error = requests.exceptions.HTTPError(
+                    f'{response.status_code} Server Error for url: {response.url}', response=response)
+            except requests.exceptions.Timeout as e:
+                reason, error = 'timeout', e
+            except requests.exceptions.ConnectionError as e:
+                reason, error = 'connection', e
+            except requests.exceptions.HTTPError as e:
+                # 4xx no transitorio: el upstream responde, así que no penaliza el circuito
+                self.breaker.record_success()
+                UPSTREAM_ERRORS.labels(self.name, 'http_4xx').inc()
+                UPSTREAM_REQUEST_SECONDS.labels(self.name, 'error').observe(time.perf_counter() - started)
+                raise
+            except (requests.exceptions.RequestException, ValueError):
+                # Respuesta inválida (p. ej. una página HTML con 200), redirecciones o cuerpo
+                # cortado: cuenta como fallo sin reintentar, para que una llamada de prueba
+                # en half_open no deje el circuito bloqueado
+                self.breaker.record_failure()
+                UPSTREAM_ERRORS.labels(self.name, 'invalid_response').inc()
+                UPSTREAM_REQUEST_SECONDS.labels(self.name, 'error').observe(time.perf_counter() - started)
+                raise
+
+            UPSTREAM_ERRORS.labels(self.name, reason).inc()
+            if attempt >= self.max_retries:
+                self.breaker.record_failure()
+                UPSTREAM_REQUEST_SECONDS.labels(self.name, 'error').observe(time.perf_counter() - started)
+                raise error
+            UPSTREAM_RETRIES.labels(self.name).inc()
+            time.sleep(self._backoff(attempt))
+            attempt += 1
@@ -0,0 +1,17 @@
+import base64
+import json
+from datetime import datetime
+
+def encode_cursor(timestamp, record_id):
+    """Codifica la posición (timestamp, id) de un registro como un cursor opaco."""
+    raw = json.dumps([timestamp.isoformat(), record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decodifica un cursor generado por encode_cursor. Lanza ValueError si no es válido."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, record_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except Exception as e:
+        raise ValueError('invalid cursor') from e
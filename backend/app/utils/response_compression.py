@@ -0,0 +1,59 @@
+"""
+Compresión negociada de las respuestas (Accept-Encoding).
+
+Se comprimen las respuestas 200 JSON/texto que superan RESPONSE_COMPRESSION_MIN_SIZE;
+por debajo de ese tamaño el coste de CPU no compensa. Se prefiere brotli si el módulo
+`brotli` está instalado y el cliente lo acepta, y gzip en otro caso. Las respuestas en
+streaming (exportaciones) se dejan como están: ya gestionan su propia compresión.
+
+El ETag fuerte de la respuesta recibe el sufijo de la codificación (`"<etag>-gzip"`),
+y `not_modified` acepta cualquiera de las variantes.
+"""
+import gzip
+from flask import request
+from app.core.config import (
+    RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_MIN_SIZE, RESPONSE_GZIP_LEVEL, RESPONSE_BROTLI_QUALITY
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip')
+_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/csv', 'text/html')
+
+def _choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers or response.mimetype not in _MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < RESPONSE_COMPRESSION_MIN_SIZE:
+        return response
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        body = brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+def init_response_compression(app):
+    if RESPONSE_COMPRESSION:
+        app.after_request(compress_response)
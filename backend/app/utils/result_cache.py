@@ -0,0 +1,105 @@
+"""
+Caché de resultados de consultas de registros por usuario, versionada por el feed de cambios.
+
+La clave de una entrada incluye la versión del usuario (`user_version`, la última
+secuencia del feed que le afecta), la misma que se usa para el ETag. Cada escritura
+añade su cambio al feed en la misma transacción, así que en cuanto se ve el commit la
+versión es otra y las entradas anteriores dejan de usarse, en cualquier worker y sin
+invalidar nada; nunca se recorren ni se borran claves, simplemente caducan (TTL) o
+salen del LRU. Un cuerpo nunca se sirve con un ETag de una versión posterior a la que
+se leyó antes de consultarlo.
+
+- MemoryResultStore: LRU acotado en la memoria del proceso.
+- RedisResultStore: entradas con SET ... EX, compartidas por todos los procesos (el
+  límite de tamaño lo pone la política maxmemory de Redis).
+"""
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import RECORD_CACHE_BACKEND, RECORD_CACHE_TTL, RECORD_CACHE_MAX_ENTRIES, REDIS_URL
+from app.core.metrics import CACHE_REQUESTS, current_endpoint
+
+class MemoryResultStore:
+    """Entradas en la memoria del proceso."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class RedisResultStore:
+    """
+    Entradas en Redis. Los valores son (número de filas, cuerpo JSON ya serializado) y
+    se guardan como `<número>\\n<cuerpo>`, sin pickle: leer de Redis no ejecuta código.
+    """
+
+    def __init__(self, url, ttl, prefix='records_cache'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self._redis.get(f'{self.prefix}:{key}')
+        if value is None:
+            return None
+        count, _, body = value.partition(b'\n')
+        return int(count), body
+
+    def set(self, key, value):
+        count, body = value
+        self._redis.set(f'{self.prefix}:{key}', b'%d\n' % count + body, ex=self.ttl)
+
+class RecordQueryCache:
+    """Caché read-through de resultados por (usuario, versión, parámetros normalizados)."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def get_or_compute(self, user_id, version, params, compute):
+        """
+        Devuelve el resultado cacheado para `params` en la versión `version` del usuario
+        o lo calcula con `compute()`. `version` debe leerse antes de consultar los datos.
+        Sin almacén (RECORD_CACHE_BACKEND=off) siempre se calcula.
+        """
+        if self.store is None:
+            return compute()
+        key = f'{user_id}:{version}:' + \
+            '&'.join(f'{name}={params[name]!r}' for name in sorted(params))
+        value = self.store.get(key)
+        if value is not None:
+            CACHE_REQUESTS.labels('records', current_endpoint(), 'hit').inc()
+            return value
+        CACHE_REQUESTS.labels('records', current_endpoint(), 'miss').inc()
+        value = compute()
+        self.store.set(key, value)
+        return value
+
+def _create_store():
+    if RECORD_CACHE_BACKEND == 'redis' and REDIS_URL:
+        return RedisResultStore(REDIS_URL, RECORD_CACHE_TTL)
+    if RECORD_CACHE_BACKEND in ('memory', 'redis'):
+        return MemoryResultStore(RECORD_CACHE_MAX_ENTRIES, RECORD_CACHE_TTL)
+    return None
+
+record_query_cache = RecordQueryCache(_create_store())
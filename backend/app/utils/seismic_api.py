@@ -1,7 +1,9 @@
-import requests
+from app.core.config import USGS_BASE_URL
+from app.utils.http_client import UpstreamClient
+
+client = UpstreamClient('usgs')
 
 def get_seismic_data(min_magnitude=3.5, limit=10, latitude=10.63, longitude=-85.44, maxradiuskm=200):
-    url = "https://earthquake.usgs.gov/fdsnws/event/1/query"
     params = {
         "format": "geojson",
         "minmagnitude": min_magnitude,
@@ -10,8 +12,23 @@ def get_seismic_data(min_magnitude=3.5, limit=10, latitude=10.63, longitude=-85.
         "longitude": longitude,
         "maxradiuskm": maxradiuskm
     }
-    response = requests.get(url, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        response.raise_for_status()
+    return client.get_json(USGS_BASE_URL, params=params)
+
+def get_seismic_feed(starttime, updatedafter=None, min_magnitude=2.5, limit=2000, offset=1):
+    """
+    Página del feed de USGS para ingesta incremental, ordenada por tiempo ascendente.
+    Con `updatedafter` solo devuelve eventos creados o modificados después de esa fecha;
+    incluye los eventos eliminados (status 'deleted').
+    """
+    params = {
+        "format": "geojson",
+        "starttime": starttime.strftime("%Y-%m-%dT%H:%M:%S"),
+        "minmagnitude": min_magnitude,
+        "orderby": "time-asc",
+        "includedeleted": "true",
+        "limit": limit,
+        "offset": offset
+    }
+    if updatedafter is not None:
+        params["updatedafter"] = updatedafter.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+    return client.get_json(USGS_BASE_URL, params=params)
@@ -0,0 +1,92 @@
+"""
+Serialización JSON de las respuestas.
+
+- `RawJSON` marca un fragmento que ya es JSON válido (p. ej. `Record.data` tal como se
+  guardó) para incrustarlo en la respuesta sin decodificarlo y volver a codificarlo.
+- `dumps` usa orjson si está instalado (con `orjson.Fragment` en versiones que lo
+  tienen) y json de la biblioteca estándar si no. Sin Fragment, cada RawJSON se
+  serializa como un marcador y después se sustituyen los marcadores, en orden de
+  aparición, por los fragmentos.
+- `FastJSONProvider` hace que `jsonify` use este camino en toda la aplicación.
+"""
+import dataclasses
+import datetime
+import decimal
+import json
+import uuid
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_Fragment = getattr(orjson, 'Fragment', None)
+# Marcador de los fragmentos; el token aleatorio evita choques con datos reales
+_TOKEN = f'__rawjson_{uuid.uuid4().hex}__'
+_PLACEHOLDER = f'"{_TOKEN}"'.encode()
+
+class RawJSON:
+    """Fragmento JSON ya codificado que se incrusta tal cual."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value if value else 'null'
+
+def _default_for(fragments):
+    def default(o):
+        if isinstance(o, RawJSON):
+            if _Fragment is not None:
+                return _Fragment(o.value)
+            fragments.append(o.value.encode())
+            return _TOKEN
+        # Mismos tipos que admite el proveedor JSON por defecto de Flask
+        if isinstance(o, datetime.date):
+            return http_date(o)
+        if isinstance(o, (decimal.Decimal, uuid.UUID)):
+            return str(o)
+        if dataclasses.is_dataclass(o):
+            return dataclasses.asdict(o)
+        if hasattr(o, '__html__'):
+            return str(o.__html__())
+        raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+    return default
+
+def dumps(obj, indent=False):
+    """Serializa `obj` a bytes JSON compactos, incrustando los RawJSON sin re-codificarlos."""
+    fragments = []
+    default = _default_for(fragments)
+    if orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        output = orjson.dumps(obj, default=default, option=options)
+    else:
+        output = json.dumps(obj, default=default, ensure_ascii=False,
+                            indent=2 if indent else None, separators=None if indent else (',', ':')).encode()
+    if fragments:
+        # Los codificadores recorren el objeto en orden, así que el marcador i-ésimo
+        # corresponde al fragmento i-ésimo
+        parts = output.split(_PLACEHOLDER)
+        output = b''.join(part for pair in zip(parts, fragments) for part in pair) + parts[-1]
+    return output
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask basado en `dumps`/`loads` de este módulo."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, indent=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(dumps(obj, indent=indent) + b'\n', mimetype=self.mimetype)
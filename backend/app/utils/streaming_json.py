@@ -0,0 +1,121 @@
+"""
+Lectura incremental de cuerpos JSON grandes sin cargarlos completos en memoria.
+
+Ambos generadores producen tuplas (fila, valor, error) con la fila numerada desde 1;
+`error` es None cuando el elemento se pudo decodificar. `NaN`, `Infinity` e `-Infinity`
+no son JSON válido (json de Python los acepta): la fila que los contiene es un error.
+"""
+import codecs
+import io
+import json
+
+READ_CHUNK_SIZE = 64 * 1024
+# Tamaño máximo de un elemento; acota la memoria usada por elemento
+MAX_ELEMENT_BYTES = 1024 * 1024
+
+_WHITESPACE = ' \t\r\n'
+
+def _reject_constant(name):
+    raise ValueError(f'{name} is not a valid JSON number')
+
+def iter_ndjson(stream, max_line=MAX_ELEMENT_BYTES):
+    """Una línea = un documento JSON. Las líneas vacías se ignoran; una línea inválida es un error de esa fila."""
+    if not isinstance(stream, io.BufferedIOBase):
+        # readline() sobre un stream sin buffer (p. ej. el de WSGI) lee byte a byte
+        stream = io.BufferedReader(stream, READ_CHUNK_SIZE)
+    row = 0
+    while True:
+        line = stream.readline(max_line + 1)
+        if not line:
+            return
+        if len(line) > max_line and not line.endswith(b'\n'):
+            row += 1
+            yield row, None, f'line exceeds {max_line} bytes'
+            # Descartar el resto de la línea demasiado larga
+            while line and not line.endswith(b'\n'):
+                line = stream.readline(max_line + 1)
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        row += 1
+        try:
+            yield row, json.loads(line, parse_constant=_reject_constant), None
+        except ValueError as e:
+            yield row, None, f'invalid JSON: {e}'
+
+def iter_json_array(stream, chunk_size=READ_CHUNK_SIZE, max_element=MAX_ELEMENT_BYTES):
+    """
+    Decodifica un array JSON de nivel superior elemento a elemento. Un error de sintaxis
+    hace imposible seguir leyendo: se informa como error de la fila actual y se termina.
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    # Las constantes no finitas se anotan en vez de lanzar: así se conoce el final del
+    # elemento y se puede seguir con el siguiente
+    constants = []
+    decoder = json.JSONDecoder(parse_constant=lambda name: constants.append(name))
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+    need_separator = False
+    row = 0
+
+    def fill():
+        nonlocal buffer, position, eof
+        data = stream.read(chunk_size)
+        if not data:
+            eof = True
+            return
+        buffer = buffer[position:] + text_decoder.decode(data)
+        position = 0
+
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                if started:
+                    yield row + 1, None, 'unexpected end of body: array is not closed'
+                return
+            fill()
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != '[':
+                yield 1, None, 'body must be a JSON array or NDJSON'
+                return
+            started = True
+            position += 1
+            continue
+        if char == ']':
+            return
+        if need_separator:
+            if char != ',':
+                yield row + 1, None, "invalid JSON: expected ',' or ']'"
+                return
+            need_separator = False
+            position += 1
+            continue
+
+        try:
+            del constants[:]
+            value, end = decoder.raw_decode(buffer, position)
+            # Un valor que termina justo al final del buffer puede estar incompleto (p. ej. un número)
+            if end == len(buffer) and not eof:
+                raise ValueError('need more data')
+        except ValueError as e:
+            if not eof and len(buffer) - position <= max_element:
+                fill()
+                continue
+            message = 'element exceeds {} bytes'.format(max_element) if not eof else f'invalid JSON: {e}'
+            yield row + 1, None, message
+            return
+        row += 1
+        position = end
+        need_separator = True
+        if constants:
+            yield row, None, f'invalid JSON: {constants[0]} is not a valid JSON number'
+            continue
+        yield row, value, None
@@ -0,0 +1,154 @@
+"""
+Caché stale-while-revalidate sobre Flask-Caching (funciona con 'simple' y 'redis').
+
+Cada entrada guarda el valor y el momento en que se obtuvo:
+- Antes del TTL blando se sirve tal cual (hit).
+- Entre el TTL blando y el duro se sirve el valor viejo de inmediato y se refresca
+  en segundo plano (stale).
+- Tras el TTL duro el backend la descarta y la petición espera al upstream (miss).
+
+Las claves se construyen con parámetros canónicos (ordenados, coordenadas
+redondeadas), así `latitude=10.63` y `latitude=10.630` comparten entrada.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app import cache
+from app.core.config import CACHE_REFRESH_WORKERS, CACHE_HOT_KEYS_MAX, CACHE_HOT_KEY_WINDOW
+from app.core.metrics import CACHE_REQUESTS, current_endpoint
+from app.utils.singleflight import SingleFlight
+
+# Las claves frecuentes se precalientan cuando han consumido esta fracción del TTL blando
+PREWARM_THRESHOLD = 0.8
+
+_executor = ThreadPoolExecutor(max_workers=CACHE_REFRESH_WORKERS, thread_name_prefix='cache-refresh')
+
+def canonical_params(params, coord_params=(), digits=2):
+    """Normaliza parámetros: floats redondeados (coordenadas a `digits` decimales) y cadenas sin espacios extra."""
+    canonical = {}
+    for name, value in params.items():
+        if isinstance(value, float):
+            value = round(value, digits) if name in coord_params else value
+        elif isinstance(value, str):
+            value = ' '.join(value.split())
+        canonical[name] = value
+    return canonical
+
+def make_key(namespace, params):
+    """Clave estable a partir de parámetros ya canónicos ('seismic:latitude=10.63&limit=10')."""
+    return namespace + ':' + '&'.join(f'{name}={params[name]!r}' for name in sorted(params))
+
+class StaleWhileRevalidateCache:
+    """Caché de una función `fetch(**params)` con TTL blando/duro y refresco en segundo plano."""
+
+    instances = []
+
+    def __init__(self, namespace, fetch, soft_ttl, hard_ttl, coord_params=(), coord_digits=2):
+        self.namespace = namespace
+        self.fetch = fetch
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.coord_params = coord_params
+        self.coord_digits = coord_digits
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        # Claves accedidas recientemente (LRU acotado) para el precalentamiento
+        self._hot = OrderedDict()
+        self._stats = {'hit': 0, 'stale': 0, 'miss': 0, 'refresh_error': 0}
+        StaleWhileRevalidateCache.instances.append(self)
+
+    def _count(self, result):
+        with self._lock:
+            self._stats[result] += 1
+        CACHE_REQUESTS.labels(self.namespace, current_endpoint(), result).inc()
+
+    def _touch(self, key, params):
+        with self._lock:
+            self._hot[key] = (params, time.time())
+            self._hot.move_to_end(key)
+            while len(self._hot) > CACHE_HOT_KEYS_MAX:
+                self._hot.popitem(last=False)
+
+    def _load(self, key, params, max_age):
+        """Obtiene el valor del upstream salvo que la entrada tenga menos de `max_age` segundos."""
+        entry = cache.get(key)
+        if entry is not None and time.time() - entry['fetched_at'] < max_age:
+            return entry['value']
+        value = self.fetch(**params)
+        cache.set(key, {'value': value, 'fetched_at': time.time()}, timeout=self.hard_ttl)
+        return value
+
+    def _refresh_async(self, key, params):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self._flights.do(key, self._load, key, params, self.soft_ttl)
+            except Exception as e:
+                self._count('refresh_error')
+                print(f"Error refreshing cache key {key}:", e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _executor.submit(refresh)
+
+    def get(self, **params):
+        """Devuelve el valor para los parámetros dados, del caché o del upstream."""
+        params = canonical_params(params, self.coord_params, self.coord_digits)
+        key = make_key(self.namespace, params)
+        self._touch(key, params)
+
+        entry = cache.get(key)
+        if entry is not None:
+            if time.time() - entry['fetched_at'] < self.soft_ttl:
+                self._count('hit')
+            else:
+                self._count('stale')
+                self._refresh_async(key, params)
+            return entry['value']
+
+        self._count('miss')
+        return self._flights.do(key, self._load, key, params, self.soft_ttl)
+
+    def prewarm(self):
+        """Refresca las claves usadas recientemente que están por vencer. Devuelve cuántas refrescó."""
+        now = time.time()
+        with self._lock:
+            hot = list(self._hot.items())
+            for key, (_, last_access) in hot:
+                if now - last_access > CACHE_HOT_KEY_WINDOW:
+                    del self._hot[key]
+        refreshed = 0
+        for key, (params, last_access) in hot:
+            if now - last_access > CACHE_HOT_KEY_WINDOW:
+                continue
+            try:
+                entry = cache.get(key)
+                if entry is None or now - entry['fetched_at'] >= self.soft_ttl * PREWARM_THRESHOLD:
+                    self._flights.do(key, self._load, key, params, self.soft_ttl * PREWARM_THRESHOLD)
+                    refreshed += 1
+            except Exception as e:
+                self._count('refresh_error')
+                print(f"Error prewarming cache key {key}:", e)
+        return refreshed
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+def prewarm_caches(app):
+    """Tarea del scheduler: precalienta las claves frecuentes de todas las cachés."""
+    with app.app_context():
+        refreshed = sum(instance.prewarm() for instance in StaleWhileRevalidateCache.instances)
+    if refreshed:
+        print(f"Cache prewarm: {refreshed} keys refreshed.")
+    return refreshed
@@ -1,5 +1,7 @@
-import requests
 from app.core.config import OPENWEATHER_API_KEY, OPENWEATHER_BASE_URL, UNITS
+from app.utils.http_client import UpstreamClient
+
+client = UpstreamClient('openweather')
 
 def get_weather(city, country):
     params = {
@@ -7,6 +9,4 @@ def get_weather(city, country):
         "appid": OPENWEATHER_API_KEY,
         "units": UNITS
     }
-    response = requests.get(OPENWEATHER_BASE_URL, params=params)
-    response.raise_for_status()
-    return response.json()
+    return client.get_json(OPENWEATHER_BASE_URL, params=params)
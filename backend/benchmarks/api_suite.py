@@ -0,0 +1,180 @@
+"""
+Benchmark general del backend con OpenWeather y USGS simulados en local.
+
+Escenarios (cada grupo corre en un proceso nuevo, con su propia base temporal):
+- api: p50/p95/p99 y throughput de /api/weather (caché caliente y fría), /api/seismic,
+  /api/database/records (primera página, página profunda por OFFSET y por cursor),
+  alta de registros y login, con N usuarios y M registros precargados.
+- tick: duración de un tick de insert_weather_record para cada número de usuarios
+  (el primero sin historial y el segundo comparando con la lectura anterior). Con
+  --tick-locations L los usuarios se suscriben a L ubicaciones y el tick consulta
+  OpenWeather (simulado): se informan las llamadas al upstream de cada tick.
+- socketio: coste de emitir una actualización de clima según los clientes conectados.
+
+Uso (desde backend/):
+    python benchmarks/api_suite.py --users 1000 --records 20000 --latency-ms 20 \\
+        --tick-users 1000 10000 100000 --output results.json
+    python benchmarks/api_suite.py --scenarios tick --tick-users 10000 --tick-locations 50
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+from harness import build_app, measure, seed_records, seed_users, write_report
+from stubs import start_stub_server, stub_environment
+
+SCENARIOS = ('api', 'tick', 'socketio')
+
+def _start_stubs(args):
+    server, base_url, calls = start_stub_server(args.latency_ms, args.seismic_events)
+    os.environ.update(stub_environment(base_url))
+    return calls
+
+def run_api(args):
+    calls = _start_stubs(args)
+    app = build_app()
+    from app.models.data_models import Record, User
+    from app.services.seismic_service import ingest_seismic_events
+    from app.utils.pagination import encode_cursor
+
+    client = app.test_client()
+    client.post('/api/users/register', json={'username': 'bench', 'password': 'secret'})
+    token = client.post('/api/users/login', json={'username': 'bench', 'password': 'secret'}).get_json()['token']
+    headers = {'Authorization': 'Bearer ' + token}
+    seed_users(app, args.users)
+    with app.app_context():
+        bench_id = User.query.filter_by(username='bench').first().id
+        seed_records(app, [bench_id], args.records)
+        # Cursor que apunta a la mitad del historial del usuario
+        middle = Record.query.filter_by(user_id=bench_id).order_by(
+            Record.timestamp.desc(), Record.id.desc()).offset(args.records // 2).first()
+        deep_cursor = encode_cursor(middle.timestamp, middle.id)
+    ingest_seismic_events(app)
+
+    per_page = 50
+    deep_page = max(1, args.records // per_page // 2)
+    scenarios = {
+        'weather_hot': lambda i: client.get('/api/weather?city=Liberia&country=CR').status_code,
+        'weather_cold': lambda i: client.get(f'/api/weather?city=Bench{i}&country=CR').status_code,
+        'seismic': lambda i: client.get('/api/seismic?min_magnitude=3.5&maxradiuskm=300').status_code,
+        'records_first_page': lambda i: client.get(
+            f'/api/database/records?per_page={per_page}', headers=headers).status_code,
+        'records_deep_page': lambda i: client.get(
+            f'/api/database/records?per_page={per_page}&page={deep_page}', headers=headers).status_code,
+        'records_deep_cursor': lambda i: client.get(
+            f'/api/database/records?per_page={per_page}&after={deep_cursor}', headers=headers).status_code,
+        'add_record': lambda i: client.post('/api/database/records', headers=headers, json={
+            'record_type': 'weather', 'data': {'temperatura': 20 + i % 10, 'humedad': 60}}).status_code,
+    }
+    results = {}
+    for name, call in scenarios.items():
+        results[name] = measure(call, args.requests, args.concurrency)
+    results['login'] = measure(
+        lambda i: client.post('/api/users/login', json={'username': 'bench', 'password': 'secret'}).status_code,
+        args.login_requests, args.concurrency)
+    return {'users': args.users, 'records': args.records, 'latency_ms': args.latency_ms,
+            'concurrency': args.concurrency, 'upstream_calls': calls, 'endpoints': results}
+
+def run_tick(args):
+    calls = _start_stubs(args)
+    app = build_app()
+    from app.models.data_models import db, UserLocation
+    from app.scheduler import insert_weather_record
+
+    started = time.perf_counter()
+    user_ids = seed_users(app, args.tick_users)
+    if args.tick_locations:
+        with app.app_context():
+            db.session.execute(db.insert(UserLocation), [
+                {'user_id': user_id, 'city': f'City{i % args.tick_locations}', 'country': 'CR'}
+                for i, user_id in enumerate(user_ids)])
+            db.session.commit()
+    seed_seconds = time.perf_counter() - started
+    ticks = []
+    for _ in range(2):
+        before = calls['weather']
+        ticks.append(dict(insert_weather_record(app), upstream_calls=calls['weather'] - before))
+    return {'users': args.tick_users, 'locations': args.tick_locations, 'seed_seconds': round(seed_seconds, 3),
+            'first_tick': ticks[0], 'second_tick': ticks[1]}
+
+def run_socketio(args):
+    _start_stubs(args)
+    app = build_app()
+    from app import socketio
+    from app.events import notify_weather_update
+
+    clients = [socketio.test_client(app, auth={'topics': ['weather']}) for _ in range(args.sio_clients)]
+    payload = {'city': 'Liberia', 'temperatura': 25.0, 'humedad': 60, 'descripcion': 'clear sky'}
+    started = time.perf_counter()
+    for _ in range(args.sio_messages):
+        notify_weather_update(payload)
+    elapsed = time.perf_counter() - started
+    delivered = sum(len(client.get_received()) for client in clients)
+    for client in clients:
+        client.disconnect()
+    return {
+        'clients': args.sio_clients,
+        'messages': args.sio_messages,
+        'delivered': delivered,
+        'emit_ms': round(elapsed / args.sio_messages * 1000, 3),
+        'per_client_us': round(elapsed / (args.sio_messages * max(1, args.sio_clients)) * 1e6, 2)
+    }
+
+def _child(args, scenario, **overrides):
+    env = dict(os.environ)
+    if scenario == 'tick' and args.tick_locations:
+        env['SCHEDULER_WEATHER_SOURCE'] = 'openweather'
+    if scenario == 'socketio':
+        # Sin agrupación, para medir el coste real de cada emisión
+        env['SOCKETIO_COALESCE_WINDOW_MS'] = '0'
+    command = [sys.executable, os.path.abspath(__file__), '--child', scenario]
+    for key, value in dict(vars(args), **overrides).items():
+        if key in ('child', 'output', 'scenarios') or value is None:
+            continue
+        command += ['--' + key.replace('_', '-')] + [str(v) for v in (value if isinstance(value, list) else [value])]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--seismic-events', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--login-requests', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--tick-users', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--tick-locations', type=int, default=0,
+                        help='Ubicaciones distintas entre los usuarios del tick (0 = lecturas simuladas)')
+    parser.add_argument('--sio-clients', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--sio-messages', type=int, default=200)
+    parser.add_argument('--output', default=None, help='Archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--child', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        if args.child == 'tick':
+            args.tick_users = args.tick_users[0]
+        if args.child == 'socketio':
+            args.sio_clients = args.sio_clients[0]
+        runner = {'api': run_api, 'tick': run_tick, 'socketio': run_socketio}[args.child]
+        print(json.dumps(runner(args)))
+        return
+
+    report = {'benchmark': 'api_suite', 'started_at': datetime.datetime.utcnow().isoformat() + 'Z'}
+    if 'api' in args.scenarios:
+        report['api'] = _child(args, 'api')
+    if 'tick' in args.scenarios:
+        report['tick'] = [_child(args, 'tick', tick_users=[users]) for users in args.tick_users]
+    if 'socketio' in args.scenarios:
+        report['socketio'] = [_child(args, 'socketio', sio_clients=[clients]) for clients in args.sio_clients]
+    write_report(report, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Utilidades compartidas por los benchmarks: percentiles, medición de peticiones
+concurrentes, creación de la app sobre una base de datos temporal y carga de datos.
+
+La configuración de la app se lee al importarla, así que `build_app` debe llamarse
+después de fijar en el entorno las variables que cada benchmark necesite.
+"""
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100.0 * (len(ordered) - 1))))]
+
+def summarize(latencies, errors, seconds):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+def measure(call, requests, concurrency):
+    """
+    Ejecuta `call(i)` `requests` veces repartidas entre `concurrency` hilos.
+    `call` devuelve el código HTTP; cualquier código >= 400 cuenta como error.
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    counter = iter(range(requests))
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            status = call(i)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if status >= 400:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+def build_app():
+    """Crea la app con create_app() sobre una base SQLite temporal (o DATABASE_URL si está definida)."""
+    os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    from app.models.migrations import upgrade_schema
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    return app
+
+def seed_users(app, count, prefix='user', password='secret', chunk_size=5000):
+    """Inserta `count` usuarios en bloque (con un único hash compartido) y devuelve sus ids."""
+    from werkzeug.security import generate_password_hash
+    from app.models.data_models import db, User
+
+    password_hash = generate_password_hash(password)
+    with app.app_context():
+        for start in range(0, count, chunk_size):
+            rows = [{'username': f'{prefix}{i}', 'password_hash': password_hash}
+                    for i in range(start, min(start + chunk_size, count))]
+            db.session.execute(db.insert(User), rows)
+            db.session.commit()
+        return [user_id for (user_id,) in db.session.query(User.id)
+                .filter(User.username.like(f'{prefix}%')).order_by(User.id)]
+
+def seed_records(app, user_ids, count, chunk_size=5000, seed=42):
+    """Inserta `count` registros de clima repartidos entre `user_ids`, uno por minuto hacia atrás."""
+    from app.models.data_models import db, Record, typed_metric_values
+
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+    with app.app_context():
+        for start in range(0, count, chunk_size):
+            rows = []
+            for i in range(start, min(start + chunk_size, count)):
+                data = {'temperatura': round(rng.uniform(20, 30), 1), 'humedad': rng.randint(40, 80)}
+                rows.append(dict(typed_metric_values('weather', data), record_type='weather',
+                                 data=json.dumps(data), user_id=user_ids[i % len(user_ids)],
+                                 timestamp=now - datetime.timedelta(minutes=i)))
+            db.session.execute(db.insert(Record), rows)
+            db.session.commit()
+
+def write_report(report, output=None):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,116 @@
+"""
+Benchmark: latencia de la API durante una ráfaga de logins.
+
+Lanza una ráfaga de logins concurrentes mientras varios lectores consultan
+/api/database/records y mide p50/p95/p99 de esas lecturas. Se ejecuta una vez
+por cada valor de PASSWORD_HASH_WORKERS (cada uno en un proceso nuevo, porque el
+pool se configura al importar la app) y escribe los resultados en JSON.
+
+Uso (desde backend/):
+    python benchmarks/login_burst.py --logins 200 --hash-workers 2 64
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from harness import percentile
+
+def run_once(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import app.core.config as config
+    config.SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    from app import create_app
+    from app.models.migrations import upgrade_schema
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    client.post('/api/users/register', json={'username': 'reader', 'password': 'secret'})
+    token = client.post('/api/users/login', json={'username': 'reader', 'password': 'secret'}).get_json()['token']
+    headers = {'Authorization': 'Bearer ' + token}
+    client.post('/api/database/records', json={'record_type': 'weather', 'data': {'temperatura': 25}}, headers=headers)
+
+    stop = threading.Event()
+    read_latencies = []
+
+    def reader():
+        reader_client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            reader_client.get('/api/database/records', headers=headers)
+            read_latencies.append(time.perf_counter() - started)
+
+    login_statuses = []
+    def login_worker(count):
+        login_client = app.test_client()
+        for _ in range(count):
+            response = login_client.post('/api/users/login', json={'username': 'reader', 'password': 'secret'})
+            login_statuses.append(response.status_code)
+
+    readers = [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in readers:
+        thread.start()
+    time.sleep(0.5)
+    idle_samples = len(read_latencies)
+
+    started = time.perf_counter()
+    per_worker = max(1, args.logins // args.login_concurrency)
+    logins = [threading.Thread(target=login_worker, args=(per_worker,)) for _ in range(args.login_concurrency)]
+    for thread in logins:
+        thread.start()
+    for thread in logins:
+        thread.join()
+    burst_seconds = time.perf_counter() - started
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    burst = read_latencies[idle_samples:]
+    return {
+        'password_hash_workers': int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+        'logins': len(login_statuses),
+        'login_ok': login_statuses.count(200),
+        'login_busy': login_statuses.count(503),
+        'burst_seconds': round(burst_seconds, 3),
+        'reads_during_burst': len(burst),
+        'read_p50_ms': round(percentile(burst, 50) * 1000, 2) if burst else None,
+        'read_p95_ms': round(percentile(burst, 95) * 1000, 2) if burst else None,
+        'read_p99_ms': round(percentile(burst, 99) * 1000, 2) if burst else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--login-concurrency', type=int, default=32)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--hash-workers', type=int, nargs='+', default=[2, 64])
+    parser.add_argument('--output', default=None, help='Archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args)))
+        return
+
+    results = []
+    for workers in args.hash_workers:
+        env = dict(os.environ, PASSWORD_HASH_WORKERS=str(workers), PASSWORD_HASH_MAX_PENDING=str(args.logins))
+        command = [sys.executable, __file__, '--child', '--logins', str(args.logins),
+                   '--login-concurrency', str(args.login_concurrency), '--readers', str(args.readers)]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = json.dumps({'benchmark': 'login_burst', 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+if __name__ == '__main__':
+    main()
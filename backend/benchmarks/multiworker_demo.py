@@ -0,0 +1,152 @@
+"""
+Demostración del modo multiproceso: elección de líder y cola de mensajes de Socket.IO.
+
+Lanza varios procesos de la app sobre la misma base de datos con SCHEDULER_MODE=leader
+y SOCKETIO_MESSAGE_QUEUE apuntando a Redis (o al sustituto de benchmarks/redis_stub.py).
+Cada proceso sirve en su propio puerto y tiene un cliente Socket.IO suscrito a 'weather';
+solo el líder emite.
+Se comprueba que hay un único líder, que todos los procesos reciben sus mensajes y,
+tras matar al líder (SIGKILL, sin liberar la concesión), cuánto tarda otro en tomarla.
+
+Uso (desde backend/):
+    python benchmarks/multiworker_demo.py --workers 3 --seconds 20 --kill-after 8
+    python benchmarks/multiworker_demo.py --redis-url redis://localhost:6379/0
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from harness import BACKEND_DIR, build_app, write_report
+from redis_stub import start_redis_stub
+
+def run_worker(args):
+    sys.path.insert(0, BACKEND_DIR)
+    import socketio as socketio_client
+    from app import create_app, socketio
+    from app.events import notify_weather_update
+
+    app = create_app()
+    elector = app.config['LEADER_ELECTOR']
+    threading.Thread(target=socketio.run, args=(app,), daemon=True, kwargs={
+        'host': '127.0.0.1', 'port': args.port, 'use_reloader': False, 'allow_unsafe_werkzeug': True}).start()
+
+    # Cliente Socket.IO real conectado al servidor de este mismo proceso
+    received = {}
+    lock = threading.Lock()
+    client = socketio_client.Client()
+
+    @client.on('weather_update')
+    def on_weather_update(data):
+        sender = str(data.get('from'))
+        with lock:
+            received[sender] = received.get(sender, 0) + 1
+
+    for _ in range(50):
+        try:
+            client.connect(f'http://127.0.0.1:{args.port}', auth={'topics': ['weather']}, transports=['polling'])
+            break
+        except Exception:
+            time.sleep(0.1)
+
+    pid = os.getpid()
+    deadline = time.time() + args.seconds
+    sequence = 0
+    while time.time() < deadline:
+        if elector.is_leader:
+            sequence += 1
+            notify_weather_update({'from': pid, 'seq': sequence})
+        time.sleep(0.5)
+        with lock:
+            snapshot, received = dict(received), {}
+        print(json.dumps({'pid': pid, 'time': time.time(), 'leader': elector.is_leader, 'received': snapshot}),
+              flush=True)
+    client.disconnect()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--kill-after', type=float, default=8)
+    parser.add_argument('--lease-ttl', type=int, default=3)
+    parser.add_argument('--port', type=int, default=5100, help='Puerto del primer worker (los demás, consecutivos)')
+    parser.add_argument('--redis-url', default=None, help='Redis real; por defecto se usa el sustituto local')
+    parser.add_argument('--output', default=None, help='Archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    redis_url = args.redis_url or start_redis_stub()[1]
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'demo.db')
+    build_app()  # crea el esquema una sola vez antes de arrancar los workers
+    env = dict(
+        os.environ,
+        SCHEDULER_MODE='leader',
+        SCHEDULER_LEASE_BACKEND='redis' if args.redis_url else 'database',
+        SCHEDULER_LEASE_TTL=str(args.lease_ttl),
+        SCHEDULER_LEASE_RENEW_INTERVAL='1',
+        SOCKETIO_MESSAGE_QUEUE=redis_url,
+        SOCKETIO_COALESCE_WINDOW_MS='0',
+        SEISMIC_LOCAL_STORE='false'
+    )
+    if args.redis_url:
+        env['REDIS_URL'] = args.redis_url
+
+    samples = []
+    lock = threading.Lock()
+
+    def read_output(process):
+        for line in process.stdout:
+            if line.startswith('{'):
+                with lock:
+                    samples.append(json.loads(line))
+
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--seconds', str(args.seconds)]
+    workers = [subprocess.Popen(command + ['--port', str(args.port + i)], env=env, stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, text=True)
+               for i in range(args.workers)]
+    readers = [threading.Thread(target=read_output, args=(worker,)) for worker in workers]
+    for reader in readers:
+        reader.start()
+
+    time.sleep(args.kill_after)
+    with lock:
+        current = [sample for sample in samples if sample['leader']]
+    killed = current[-1]['pid'] if current else None
+    killed_at = time.time()
+    if killed:
+        os.kill(killed, signal.SIGKILL)
+
+    for worker in workers:
+        worker.wait()
+    for reader in readers:
+        reader.join()
+
+    leaders_before = {s['pid'] for s in samples if s['leader'] and s['time'] < killed_at}
+    after = [s for s in samples if s['leader'] and s['time'] >= killed_at and s['pid'] != killed]
+    received_by = {}
+    for sample in samples:
+        totals = received_by.setdefault(str(sample['pid']), {})
+        for sender, count in sample['received'].items():
+            totals[sender] = totals.get(sender, 0) + count
+    write_report({
+        'benchmark': 'multiworker_demo',
+        'workers': args.workers,
+        'message_queue': 'redis' if args.redis_url else 'redis_stub',
+        'leaders_before_kill': sorted(leaders_before),
+        'killed_leader': killed,
+        'new_leader': after[0]['pid'] if after else None,
+        'failover_seconds': round(after[0]['time'] - killed_at, 2) if after else None,
+        'messages_received_by_worker': received_by
+    }, args.output)
+
+if __name__ == '__main__':
+    main()
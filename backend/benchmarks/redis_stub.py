@@ -0,0 +1,132 @@
+"""
+Sustituto mínimo de Redis para probar en local el modo multiproceso sin instalar Redis.
+
+Implementa solo lo que usa la cola de mensajes de Socket.IO (SUBSCRIBE, UNSUBSCRIBE,
+PUBLISH, PING) sobre el protocolo RESP. No guarda datos: para la concesión del
+scheduler usar SCHEDULER_LEASE_BACKEND=database.
+
+Uso independiente (desde backend/):
+    python benchmarks/redis_stub.py --port 6399
+    SOCKETIO_MESSAGE_QUEUE=redis://127.0.0.1:6399/0 SCHEDULER_MODE=leader python run.py
+"""
+import argparse
+import datetime
+import socketserver
+import threading
+import time
+
+def _encode(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    return b'*%d\r\n' % len(value) + b''.join(_encode(item) for item in value)
+
+class PubSubBroker:
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, handler):
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(handler)
+
+    def unsubscribe(self, channel, handler):
+        with self._lock:
+            self._subscribers.get(channel, set()).discard(handler)
+
+    def publish(self, channel, message):
+        with self._lock:
+            handlers = list(self._subscribers.get(channel, ()))
+        for handler in handlers:
+            handler.send(_encode([b'message', channel, message]))
+        return len(handlers)
+
+class RespHandler(socketserver.StreamRequestHandler):
+    broker = None
+
+    def setup(self):
+        super().setup()
+        self._write_lock = threading.Lock()
+        self.channels = set()
+
+    def send(self, data):
+        try:
+            with self._write_lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+        except OSError:
+            pass
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        try:
+            while True:
+                command = self._read_command()
+                if command is None:
+                    break
+                if not command:
+                    continue
+                name, args = command[0].upper(), command[1:]
+                if name == b'PING':
+                    self.send(_encode([b'pong', b'']) if self.channels else b'+PONG\r\n')
+                elif name == b'SUBSCRIBE':
+                    for channel in args:
+                        self.channels.add(channel)
+                        self.broker.subscribe(channel, self)
+                        self.send(_encode([b'subscribe', channel, len(self.channels)]))
+                elif name == b'UNSUBSCRIBE':
+                    for channel in args or list(self.channels):
+                        self.channels.discard(channel)
+                        self.broker.unsubscribe(channel, self)
+                        self.send(_encode([b'unsubscribe', channel, len(self.channels)]))
+                elif name == b'PUBLISH':
+                    self.send(_encode(self.broker.publish(args[0], args[1])))
+                elif name in (b'SELECT', b'CLIENT', b'AUTH'):
+                    self.send(b'+OK\r\n')
+                else:
+                    self.send(b'-ERR unknown command\r\n')
+        finally:
+            for channel in self.channels:
+                self.broker.unsubscribe(channel, self)
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_redis_stub(port=0):
+    """Arranca el sustituto en un hilo y devuelve (servidor, url)."""
+    handler = type('Handler', (RespHandler,), {'broker': PubSubBroker()})
+    server = _Server(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'redis://127.0.0.1:{server.server_address[1]}/0'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=6399)
+    args = parser.parse_args()
+    server, url = start_redis_stub(args.port)
+    print(f"[{datetime.datetime.utcnow()}] Redis pub/sub stand-in listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark de serialización: bytes en la red y CPU del servidor por cada 1000 registros.
+
+- encoders: serializa una página de registros con cada variante y mide el tamaño
+  (sin comprimir, gzip y brotli si está instalado) y el tiempo de CPU del proceso:
+    legacy       json de la biblioteca estándar con `data` como JSON string (doble codificación)
+    raw_stdlib   `data` incrustado como fragmento, json de la biblioteca estándar
+    raw_orjson   `data` incrustado como fragmento, orjson (si está instalado)
+- endpoint: GET /api/database/records?per_page=N de extremo a extremo con cada
+  Accept-Encoding (identity, gzip, br).
+
+Uso (desde backend/):
+    python benchmarks/serialization.py --records 1000 --iterations 50
+"""
+import argparse
+import json
+import time
+
+from harness import build_app, seed_records, write_report
+
+def _cpu_ms_per_1000(fn, iterations, records):
+    fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return round((time.process_time() - started) / iterations * 1000 / records * 1000, 3)
+
+def _sizes(body):
+    import gzip
+    from app.utils.response_compression import brotli
+    sizes = {'identity': len(body), 'gzip': len(gzip.compress(body, compresslevel=6))}
+    if brotli is not None:
+        sizes['br'] = len(brotli.compress(body, quality=4))
+    return sizes
+
+def run_encoders(app, records, iterations):
+    from flask.json.provider import DefaultJSONProvider
+    from app.models.data_models import Record
+    from app.utils import serialization
+    from app.utils.serialization import RawJSON
+
+    with app.app_context():
+        rows = Record.query.order_by(Record.id).limit(records).all()
+        base = [{'id': r.id, 'record_type': r.record_type, 'timestamp': r.timestamp.isoformat(), 'data': r.data}
+                for r in rows]
+    legacy_payload = {'records': base}
+    raw_payload = {'records': [dict(item, data=RawJSON(item['data'])) for item in base]}
+    legacy = DefaultJSONProvider(app)
+    orjson = serialization.orjson
+
+    def raw_stdlib():
+        serialization.orjson = None
+        try:
+            return serialization.dumps(raw_payload)
+        finally:
+            serialization.orjson = orjson
+
+    variants = {
+        'legacy': lambda: legacy.dumps(legacy_payload).encode(),
+        'raw_stdlib': raw_stdlib,
+    }
+    if orjson is not None:
+        variants['raw_orjson'] = lambda: serialization.dumps(raw_payload)
+
+    results = {}
+    for name, fn in variants.items():
+        body = fn()
+        json.loads(body)  # el resultado debe ser JSON válido
+        results[name] = {'cpu_ms_per_1000': _cpu_ms_per_1000(fn, iterations, len(rows)),
+                         'bytes_per_1000': {encoding: round(size * 1000 / len(rows))
+                                            for encoding, size in _sizes(body).items()}}
+    return results
+
+def run_endpoint(app, records, iterations):
+    client = app.test_client()
+    client.post('/api/users/register', json={'username': 'bench', 'password': 'secret'})
+    token = client.post('/api/users/login', json={'username': 'bench', 'password': 'secret'}).get_json()['token']
+    with app.app_context():
+        from app.models.data_models import User
+        seed_records(app, [User.query.filter_by(username='bench').first().id], records)
+
+    results = {}
+    for encoding in ('identity', 'gzip', 'br'):
+        headers = {'Authorization': 'Bearer ' + token, 'Accept-Encoding': encoding}
+        call = lambda: client.get(f'/api/database/records?per_page={records}', headers=headers)
+        response = call()
+        results[encoding] = {
+            'content_encoding': response.headers.get('Content-Encoding', 'identity'),
+            'bytes_per_1000': round(len(response.data) * 1000 / records),
+            'cpu_ms_per_1000': _cpu_ms_per_1000(call, iterations, records)
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', default=None, help='Archivo JSON de salida (por defecto stdout)')
+    args = parser.parse_args()
+
+    app = build_app()
+    endpoint = run_endpoint(app, args.records, args.iterations)
+    write_report({
+        'benchmark': 'serialization',
+        'records': args.records,
+        'iterations': args.iterations,
+        'encoders': run_encoders(app, args.records, args.iterations),
+        'endpoint': endpoint
+    }, args.output)
+
+if __name__ == '__main__':
+    main()
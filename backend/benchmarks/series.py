@@ -0,0 +1,57 @@
+"""
+Benchmark de /api/database/records/series frente a la lista completa de /records.
+
+Para cada longitud de historial se mide el tamaño de la respuesta y la latencia de
+la serie reducida con LTTB (primera petición y repetida, servida desde la caché de
+resultados) y de la lista de registros con todos los puntos del rango.
+
+Uso (desde backend/):
+    python benchmarks/series.py --records 1000 10000 100000 --points 500
+"""
+import argparse
+import time
+
+from harness import build_app, seed_records, write_report
+
+def _timed(call):
+    started = time.perf_counter()
+    response = call()
+    return response, round((time.perf_counter() - started) * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--points', type=int, default=500)
+    parser.add_argument('--output', default=None, help='Archivo JSON de salida (por defecto stdout)')
+    args = parser.parse_args()
+
+    app = build_app()
+    from app.models.data_models import User
+    from app.utils.downsampling import numpy
+
+    client = app.test_client()
+    results = []
+    for count in args.records:
+        username = f'series{count}'
+        client.post('/api/users/register', json={'username': username, 'password': 'secret'})
+        token = client.post('/api/users/login', json={'username': username, 'password': 'secret'}).get_json()['token']
+        headers = {'Authorization': 'Bearer ' + token}
+        with app.app_context():
+            seed_records(app, [User.query.filter_by(username=username).first().id], count)
+
+        series_url = f'/api/database/records/series?metric=temperatura&points={args.points}'
+        series, first_ms = _timed(lambda: client.get(series_url, headers=headers))
+        _, repeated_ms = _timed(lambda: client.get(series_url, headers=headers))
+        full, full_ms = _timed(lambda: client.get(
+            f'/api/database/records?per_page={count}&count=none', headers=headers))
+        results.append({
+            'records': count,
+            'series': {'points': series.get_json()['points'], 'bytes': len(series.data),
+                       'first_ms': first_ms, 'cached_ms': repeated_ms},
+            'full_list': {'points': len(full.get_json()['records']), 'bytes': len(full.data), 'ms': full_ms}
+        })
+    write_report({'benchmark': 'series', 'points': args.points, 'numpy': numpy is not None,
+                  'results': results}, args.output)
+
+if __name__ == '__main__':
+    main()
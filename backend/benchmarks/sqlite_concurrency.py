@@ -0,0 +1,97 @@
+"""
+Benchmark: escritores y lectores concurrentes sobre SQLite, con y sin PRAGMAs de rendimiento.
+
+Varios hilos escriben con POST /api/database/records mientras otros leen con
+GET /api/database/records durante un tiempo fijo. Se mide throughput, p50/p95/p99
+y errores (p. ej. 'database is locked') en cada modo. Cada modo corre en un
+proceso nuevo porque la configuración se lee al importar la app.
+
+Uso (desde backend/):
+    python benchmarks/sqlite_concurrency.py --writers 4 --readers 8 --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from harness import percentile, summarize
+
+def run_once(args):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app
+    from app.models.migrations import upgrade_schema
+
+    app = create_app()
+    with app.app_context():
+        upgrade_schema()
+    client = app.test_client()
+    client.post('/api/users/register', json={'username': 'bench', 'password': 'secret'})
+    token = client.post('/api/users/login', json={'username': 'bench', 'password': 'secret'}).get_json()['token']
+    headers = {'Authorization': 'Bearer ' + token}
+
+    stop = threading.Event()
+    results = {'write': ([], [0]), 'read': ([], [0])}
+
+    def worker(kind):
+        worker_client = app.test_client()
+        latencies, errors = results[kind]
+        while not stop.is_set():
+            started = time.perf_counter()
+            if kind == 'write':
+                response = worker_client.post('/api/database/records', headers=headers, json={
+                    'record_type': 'weather', 'data': {'temperatura': 25.0, 'humedad': 60}})
+            else:
+                response = worker_client.get('/api/database/records?per_page=50', headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 500:
+                errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=('write',)) for _ in range(args.writers)] + \
+              [threading.Thread(target=worker, args=('read',)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'sqlite_tuning': os.environ.get('SQLITE_TUNING', 'true'),
+        'writers': summarize(results['write'][0], results['write'][1][0], args.seconds),
+        'readers': summarize(results['read'][0], results['read'][1][0], args.seconds),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--output', default=None, help='Archivo JSON de salida (por defecto stdout)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args)))
+        return
+
+    results = []
+    for tuning in ('false', 'true'):
+        database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+        env = dict(os.environ, SQLITE_TUNING=tuning, DATABASE_URL='sqlite:///' + database)
+        command = [sys.executable, __file__, '--child', '--writers', str(args.writers),
+                   '--readers', str(args.readers), '--seconds', str(args.seconds)]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = json.dumps({'benchmark': 'sqlite_concurrency', 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+    print(report)
+
+if __name__ == '__main__':
+    main()
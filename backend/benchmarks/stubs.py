@@ -0,0 +1,120 @@
+"""
+Servidores locales que imitan a OpenWeather y a USGS para los benchmarks.
+
+Responden con datos deterministas tras una latencia configurable, de modo que las
+mediciones no dependan de la red ni de las cuotas de las APIs reales. El catálogo
+de sismos se genera con una semilla fija alrededor de Costa Rica.
+
+Uso independiente (desde backend/):
+    python benchmarks/stubs.py --port 8099 --latency-ms 50
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8099/data/2.5/weather \\
+    USGS_BASE_URL=http://127.0.0.1:8099/fdsnws/event/1/query python run.py
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WEATHER_PATH = '/data/2.5/weather'
+USGS_PATH = '/fdsnws/event/1/query'
+
+def seismic_catalog(count, seed=7, days=30):
+    """Lista de `count` features GeoJSON ordenadas por tiempo ascendente."""
+    rng = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    features = []
+    for i in range(count):
+        event_ms = now_ms - int(rng.uniform(0, days * 86400) * 1000)
+        features.append({
+            'type': 'Feature',
+            'id': f'bench{i:06d}',
+            'properties': {'mag': round(rng.uniform(2.5, 6.5), 1), 'place': 'Benchmark', 'time': event_ms,
+                           'updated': event_ms, 'status': 'reviewed', 'type': 'earthquake'},
+            'geometry': {'type': 'Point', 'coordinates': [round(rng.uniform(-87.0, -82.5), 4),
+                                                          round(rng.uniform(8.0, 11.5), 4),
+                                                          round(rng.uniform(1, 150), 1)]}
+        })
+    features.sort(key=lambda feature: feature['properties']['time'])
+    return features
+
+def _weather_payload(city):
+    rng = random.Random(city)
+    return {
+        'name': city,
+        'main': {'temp': round(rng.uniform(20, 30), 1), 'humidity': rng.randint(40, 80)},
+        'weather': [{'description': 'clear sky', 'icon': '01d'}],
+        'wind': {'speed': round(rng.uniform(0.5, 5), 1)}
+    }
+
+def _seismic_payload(catalog, params):
+    limit = int(params.get('limit', 20000))
+    offset = int(params.get('offset', 1))
+    if params.get('orderby') == 'time-asc':
+        features = catalog[offset - 1:offset - 1 + limit]
+    else:
+        features = catalog[::-1][offset - 1:offset - 1 + limit]
+    return {'type': 'FeatureCollection', 'metadata': {'count': len(features)}, 'features': features}
+
+def start_stub_server(latency_ms=0, seismic_events=1000, port=0):
+    """Arranca el servidor en un hilo y devuelve (servidor, url_base, contadores de llamadas)."""
+    catalog = seismic_catalog(seismic_events)
+    calls = {'weather': 0, 'usgs': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if latency_ms:
+                time.sleep(latency_ms / 1000.0)
+            if url.path == WEATHER_PATH:
+                calls['weather'] += 1
+                payload = _weather_payload(params.get('q', 'Liberia,CR').split(',')[0])
+            elif url.path == USGS_PATH:
+                calls['usgs'] += 1
+                payload = _seismic_payload(catalog, params)
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}', calls
+
+def stub_environment(base_url):
+    """Variables de entorno que apuntan la app a los servidores simulados."""
+    return {
+        'OPENWEATHER_BASE_URL': base_url + WEATHER_PATH,
+        'USGS_BASE_URL': base_url + USGS_PATH
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--seismic-events', type=int, default=1000)
+    args = parser.parse_args()
+    server, base_url, _ = start_stub_server(args.latency_ms, args.seismic_events, args.port)
+    print(f"[{datetime.datetime.utcnow()}] Stub upstreams listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
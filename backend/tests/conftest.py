@@ -0,0 +1,46 @@
+"""
+Configuración común de las pruebas.
+
+La configuración de la app se lee al importarla, por eso el entorno (base SQLite
+temporal, sin Redis ni tareas programadas) se fija aquí antes de cualquier import de `app`.
+"""
+import os
+import sys
+import tempfile
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['SCHEDULER_MODE'] = 'off'
+os.environ['REDIS_URL'] = ''
+os.environ['SOCKETIO_MESSAGE_QUEUE'] = ''
+
+@pytest.fixture(scope='session')
+def _app():
+    from app import create_app
+    return create_app()
+
+@pytest.fixture
+def app(_app):
+    """App con el esquema recién creado en cada prueba."""
+    from app.models.data_models import db
+    from app.models.migrations import upgrade_schema
+    from app.utils import result_cache
+    with _app.app_context():
+        db.drop_all()
+        upgrade_schema()
+    # Las versiones del feed vuelven a empezar con el esquema nuevo
+    result_cache.record_query_cache.store = result_cache._create_store()
+    yield _app
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(client):
+    client.post('/api/users/register', json={'username': 'tester', 'password': 'secret'})
+    token = client.post('/api/users/login', json={'username': 'tester', 'password': 'secret'}).get_json()['token']
+    return {'Authorization': 'Bearer ' + token}
@@ -0,0 +1,79 @@
+import json
+
+NDJSON = {'Content-Type': 'application/x-ndjson'}
+
+def test_non_finite_row_fails_alone_and_reads_stay_valid_json(client, auth_headers):
+    body = '\n'.join([
+        '{"record_type": "note", "data": {"x": 1}}',
+        '{"record_type": "note", "data": {"x": Infinity}}',
+        '{"record_type": "weather", "data": {"temperatura": NaN}}',
+        '{"record_type": "note", "data": {"x": 2}}',
+    ])
+    response = client.post('/api/database/records/bulk', data=body, headers={**auth_headers, **NDJSON})
+    result = response.get_json()
+    assert response.status_code == 200
+    assert (result['inserted'], result['failed']) == (2, 2)
+    assert [error['row'] for error in result['errors']] == [2, 3]
+
+    listing = client.get('/api/database/records', headers=auth_headers)
+    # Se valida con json estricto, como haría JSON.parse en el navegador
+    records = json.loads(listing.data, parse_constant=lambda name: 1 / 0)['records']
+    assert sorted(record['data']['x'] for record in records) == [1, 2]
+
+def test_failed_batch_does_not_expose_database_errors(client, auth_headers, monkeypatch):
+    import app.api.database as database
+    def failing_insert(rows):
+        raise RuntimeError('(sqlite3.IntegrityError) NOT NULL constraint failed [SQL: INSERT INTO record ...]')
+    monkeypatch.setattr(database, 'insert_records', failing_insert)
+    response = client.post('/api/database/records/bulk', headers={**auth_headers, **NDJSON},
+                           data='{"record_type": "note", "data": {"x": 1}}\n')
+    result = response.get_json()
+    assert response.status_code == 400
+    assert result['errors'] == [{'row': 1, 'error': 'Error adding record: the batch could not be stored'}]
+
+def _bulk(client, auth_headers, body, content_type='application/x-ndjson'):
+    return client.post('/api/database/records/bulk', data=body,
+                       headers={**auth_headers, 'Content-Type': content_type})
+
+def test_json_array_is_inserted_in_batches(client, auth_headers, monkeypatch):
+    import app.api.database as database
+    monkeypatch.setattr(database, 'BULK_BATCH_SIZE', 2)
+    rows = [{'record_type': 'note', 'data': {'n': n}, 'timestamp': f'2026-01-01T00:0{n}:00'} for n in range(5)]
+    response = _bulk(client, auth_headers, json.dumps(rows), 'application/json')
+    assert response.status_code == 200
+    assert response.get_json() == {'inserted': 5, 'stored': 5, 'failed': 0, 'errors': [], 'errors_truncated': False}
+    listing = client.get('/api/database/records?per_page=10', headers=auth_headers).get_json()
+    assert [record['data']['n'] for record in listing['records']] == [4, 3, 2, 1, 0]
+
+def test_invalid_rows_are_reported_and_valid_rows_kept(client, auth_headers):
+    body = '\n'.join([
+        '{"record_type": "note", "data": {"n": 1}, "timestamp": "2026-01-01T12:00:00+02:00"}',
+        '[1, 2]',
+        '{"record_type": "note"}',
+        '{"record_type": "' + 'x' * 51 + '", "data": {"n": 3}}',
+        '{"record_type": "note", "data": {"n": 4}, "timestamp": "ayer"}',
+        '{broken',
+    ])
+    result = _bulk(client, auth_headers, body).get_json()
+    assert (result['inserted'], result['failed']) == (1, 5)
+    assert [(error['row'], error['error']) for error in result['errors'][:4]] == [
+        (2, 'row must be a JSON object'),
+        (3, 'record_type and data are required'),
+        (4, 'record_type must be a string of at most 50 characters'),
+        (5, 'timestamp must be an ISO 8601 string'),
+    ]
+    assert result['errors'][4]['row'] == 6 and result['errors'][4]['error'].startswith('invalid JSON')
+    # Las fechas con zona horaria se guardan en UTC
+    record = client.get('/api/database/records', headers=auth_headers).get_json()['records'][0]
+    assert record['timestamp'] == '2026-01-01T10:00:00'
+
+def test_errors_are_truncated_and_all_failed_is_400(client, auth_headers, monkeypatch):
+    import app.api.database as database
+    monkeypatch.setattr(database, 'BULK_MAX_ERRORS', 2)
+    response = _bulk(client, auth_headers, '1\n2\n3\n')
+    assert response.status_code == 400
+    result = response.get_json()
+    assert result['failed'] == 3 and len(result['errors']) == 2 and result['errors_truncated'] is True
+
+def test_unsupported_content_type(client, auth_headers):
+    assert _bulk(client, auth_headers, 'a,b', 'text/csv').status_code == 415
@@ -0,0 +1,63 @@
+import datetime
+import json
+from app.models.data_models import db, User, typed_metric_values
+from app.services.change_feed import insert_records
+from app.services.retention import purge_expired
+
+def _insert(app, user_id, timestamps):
+    with app.app_context():
+        data = {'temperatura': 20.0, 'humedad': 50}
+        insert_records([dict(typed_metric_values('weather', data), record_type='weather', data=json.dumps(data),
+                             user_id=user_id, timestamp=timestamp) for timestamp in timestamps])
+        db.session.commit()
+
+def test_deleted_record_appears_only_as_tombstone(client, auth_headers):
+    since = client.get('/api/database/records/changes', headers=auth_headers).get_json()['next_since']
+    client.post('/api/database/records', headers=auth_headers,
+                json={'record_type': 'note', 'data': {'text': 'hola'}})
+    record_id = client.get('/api/database/records', headers=auth_headers).get_json()['records'][0]['id']
+    client.delete(f'/api/database/records/{record_id}', headers=auth_headers)
+
+    changes = client.get(f'/api/database/records/changes?since={since}', headers=auth_headers).get_json()['changes']
+    assert [change['action'] for change in changes] == ['delete']
+    assert changes[0]['id'] == record_id and changes[0]['deleted'] is True
+
+def test_retention_purge_reaches_the_feed(app, client, auth_headers):
+    with app.app_context():
+        user_id = User.query.filter_by(username='tester').first().id
+    now = datetime.datetime.utcnow()
+    _insert(app, user_id, [now - datetime.timedelta(days=30), now])
+    since = client.get('/api/database/records/changes', headers=auth_headers).get_json()['next_since']
+
+    purge_expired(app)
+
+    body = client.get(f'/api/database/records/changes?since={since}', headers=auth_headers).get_json()
+    purges = [change for change in body['changes'] if change['action'] == 'purge']
+    assert len(purges) == 1
+    assert purges[0]['record_type'] == 'weather' and purges[0]['deleted'] is True
+    before = datetime.datetime.fromisoformat(purges[0]['before'])
+    assert now - datetime.timedelta(days=30) < before < now
+    assert int(body['next_since']) > int(since)
+
+def test_trimming_the_feed_never_moves_the_version_back(app, client, auth_headers):
+    from app.models.data_models import RecordChange
+    from app.services.change_feed import user_version
+    client.post('/api/database/records', headers=auth_headers, json={'record_type': 'note', 'data': {'n': 1}})
+    first = client.get('/api/database/records', headers=auth_headers)
+    client.post('/api/database/records', headers=auth_headers, json={'record_type': 'note', 'data': {'n': 2}})
+    with app.app_context():
+        user_id = User.query.filter_by(username='tester').first().id
+        before = user_version(user_id)
+        # Todos los cambios del usuario quedan fuera de la retención del feed
+        RecordChange.query.update({'changed_at': datetime.datetime.utcnow() - datetime.timedelta(days=365)})
+        db.session.commit()
+
+    purge_expired(app)
+
+    with app.app_context():
+        assert user_version(user_id) > before
+    # La ETag de una versión anterior nunca vuelve a coincidir
+    response = client.get('/api/database/records', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200 and response.get_json()['total'] == 2
+    changes = client.get(f'/api/database/records/changes?since={before}', headers=auth_headers).get_json()
+    assert changes['changes'] == []
@@ -0,0 +1,83 @@
+import datetime
+from app.services.compression import SeriesCompressor, MemoryStateStore, effective_mode
+
+T0 = datetime.datetime(2026, 1, 1)
+
+def _compress(mode, readings, bound=0.5, max_interval=900):
+    compressor = SeriesCompressor(MemoryStateStore(100), mode, {'temperatura': bound}, max_interval, ['weather'])
+    stored = []
+    for seconds, value in readings:
+        stored += compressor.compress([(1, 'weather', T0 + datetime.timedelta(seconds=seconds), {'temperatura': value})])
+    return [((timestamp - T0).total_seconds(), data['temperatura']) for _, _, timestamp, data in stored]
+
+def test_swinging_door_keeps_held_reading_when_max_interval_closes_series():
+    stored = _compress('swinging_door', [(0, 20), (60, 20.7), (120, 21.4), (840, 30), (900, 20)])
+    assert stored == [(0, 20), (840, 30), (900, 20)]
+
+def test_swinging_door_drops_readings_within_bound():
+    stored = _compress('swinging_door', [(i * 60, 20 + i * 0.1) for i in range(10)])
+    # Una recta dentro de la cota: solo se guarda el primer punto, el último queda retenido
+    assert stored[0] == (0, 20)
+    assert len(stored) == 1
+
+def test_deadband_stores_only_changes_beyond_bound():
+    stored = _compress('deadband', [(0, 20), (60, 20.3), (120, 21), (180, 21.2)])
+    assert stored == [(0, 20), (120, 21)]
+
+def test_record_types_without_compression_pass_through():
+    compressor = SeriesCompressor(MemoryStateStore(100), 'swinging_door', {'temperatura': 0.5}, 900, ['weather'])
+    entries = [(1, 'note', T0, {'temperatura': 20}), (1, 'note', T0, {'temperatura': 20})]
+    assert compressor.compress(entries) == entries
+
+def test_leader_mode_without_redis_disables_compression():
+    assert effective_mode('swinging_door', 'leader', None) == 'off'
+    assert effective_mode('swinging_door', 'leader', 'redis://cache:6379/0') == 'swinging_door'
+    assert effective_mode('deadband', 'auto', None) == 'deadband'
+
+def test_reset_starts_new_series_without_interpolating():
+    compressor = SeriesCompressor(MemoryStateStore(100), 'swinging_door', {'temperatura': 0.5}, 900, ['weather'])
+    reading = lambda seconds, value: [(1, 'weather', T0 + datetime.timedelta(seconds=seconds), {'temperatura': value})]
+    assert len(compressor.compress(reading(0, 20))) == 1
+    assert compressor.compress(reading(60, 20.1)) == []
+    compressor.reset([1], 'weather')
+    # No hace falta sembrar la serie y la primera lectura de la serie nueva se guarda
+    assert compressor.missing([1], 'weather') == []
+    assert compressor.compress(reading(120, 20.2)) == reading(120, 20.2)
+
+def test_evicted_series_hands_over_its_held_reading():
+    compressor = SeriesCompressor(MemoryStateStore(1), 'swinging_door', {'temperatura': 0.5}, 900, ['weather'])
+    first = [(1, 'weather', T0, {'temperatura': 20}), (1, 'weather', T0 + datetime.timedelta(seconds=60), {'temperatura': 20.1})]
+    assert compressor.compress(first) == first[:1]
+    # La serie del usuario 2 expulsa del LRU a la del usuario 1, que entrega su lectura retenida
+    other = [(2, 'weather', T0, {'temperatura': 10})]
+    assert compressor.compress(other) == other + first[1:]
+    assert compressor.missing([1], 'weather') == [1]
+
+def test_drain_returns_held_readings_once():
+    compressor = SeriesCompressor(MemoryStateStore(100), 'swinging_door', {'temperatura': 0.5}, 900, ['weather'])
+    held = (1, 'weather', T0 + datetime.timedelta(seconds=60), {'temperatura': 20.1})
+    compressor.compress([(1, 'weather', T0, {'temperatura': 20}), held])
+    assert compressor.holds(held)
+    assert compressor.drain() == [held]
+    assert compressor.drain() == []
+
+def test_held_reading_is_reported_and_stored_on_exit(app, client, auth_headers):
+    from app.scheduler import store_held_readings
+    from app.services.compression import compressor
+    compressor.drain()
+    post = lambda value: client.post('/api/database/records', headers=auth_headers,
+                                     json={'record_type': 'weather', 'data': {'temperatura': value}})
+    assert post(20.0).status_code == 201
+    response = post(20.1)
+    assert response.status_code == 202
+    assert response.get_json()['held'] is True and response.get_json()['id'] is None
+
+    assert store_held_readings(app) == 1
+    assert client.get('/api/database/records', headers=auth_headers).get_json()['total'] == 2
+
+def test_drain_skips_series_without_state():
+    compressor = SeriesCompressor(MemoryStateStore(1), 'swinging_door', {'temperatura': 0.5}, 900, ['weather'])
+    # Sin métricas con cota: se guarda tal cual y la serie queda sin estado
+    assert compressor.compress([(1, 'weather', T0, {'descripcion': 'nublado'})]) == [(1, 'weather', T0, {'descripcion': 'nublado'})]
+    assert compressor.compress([(2, 'weather', T0, {'temperatura': 20})]) == [(2, 'weather', T0, {'temperatura': 20})]
+    assert compressor.drain() == []
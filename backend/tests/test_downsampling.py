@@ -0,0 +1,42 @@
+import math
+import random
+import pytest
+from app.utils import downsampling
+from app.utils.downsampling import lttb
+
+def _series(n, seed=1):
+    rng = random.Random(seed)
+    t = sorted(rng.uniform(0, 1e6) for _ in range(n))
+    return t, [math.sin(x / 5e4) * 10 + rng.gauss(0, 1) for x in t]
+
+def test_short_series_are_returned_whole():
+    t, v = _series(10)
+    assert lttb(t, v, 10) == list(range(10))
+    assert lttb(t, v, 50) == list(range(10))
+    assert lttb([], [], 5) == []
+
+def test_three_points_keep_the_ends_and_the_largest_triangle():
+    t = [0, 1, 2, 3, 4]
+    v = [0, 1, 9, 1, 0]
+    assert lttb(t, v, 3) == [0, 2, 4]
+
+def test_python_path_keeps_ends_and_one_point_per_bucket():
+    t, v = _series(1000)
+    indexes = downsampling._lttb_python(t, v, 100)
+    assert len(indexes) == 100
+    assert indexes[0] == 0 and indexes[-1] == 999
+    assert indexes == sorted(set(indexes))
+    for index, (start, end) in zip(indexes[1:-1], downsampling._bounds(1000, 100)):
+        assert start <= index < end
+
+def test_spike_survives_downsampling():
+    t = list(range(1000))
+    v = [0.0] * 1000
+    v[567] = 100.0
+    assert 567 in lttb(t, v, 20)
+
+@pytest.mark.parametrize('n, threshold', [(5, 3), (1000, 3), (1000, 100), (1001, 7), (10000, 500)])
+def test_numpy_and_python_paths_select_the_same_points(n, threshold):
+    pytest.importorskip('numpy')
+    t, v = _series(n, seed=n)
+    assert downsampling._lttb_numpy(t, v, threshold) == downsampling._lttb_python(t, v, threshold)
@@ -0,0 +1,64 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+
+@pytest.fixture
+def records(client, auth_headers, monkeypatch):
+    """26 registros 'note' (dos con la misma hora, en el límite de un lote) y uno 'weather'."""
+    rows = [{'record_type': 'note', 'data': {'n': n, 'texto': 'línea, con "comillas"'},
+             'timestamp': f'2026-01-01T00:{59 - n:02d}:00'} for n in range(25)]
+    rows.append({'record_type': 'note', 'data': {'n': 25}, 'timestamp': '2026-01-01T00:38:00'})
+    rows.append({'record_type': 'weather', 'data': {'temperatura': 21.5}, 'timestamp': '2026-01-02T00:00:00'})
+    result = client.post('/api/database/records/bulk', data=json.dumps(rows),
+                         headers={**auth_headers, 'Content-Type': 'application/json'}).get_json()
+    assert result['inserted'] == len(rows)
+    import app.api.database as database
+    # Lotes y trozos pequeños para recorrer varias páginas del cursor y varios envíos
+    monkeypatch.setattr(database, 'EXPORT_CHUNK_SIZE', 4)
+    monkeypatch.setattr(database, 'EXPORT_FLUSH_BYTES', 200)
+    return rows
+
+def _export(client, auth_headers, query='', **headers):
+    return client.get('/api/database/records/export' + query, headers={**auth_headers, **headers})
+
+def test_ndjson_export_is_chronological_and_streamed(client, auth_headers, records):
+    response = _export(client, auth_headers, '?gzip=false')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    assert 'Content-Encoding' not in response.headers
+    lines = [json.loads(line) for line in response.get_data().decode().splitlines()]
+    assert len(lines) == len(records)
+    keys = [(line['timestamp'], line['id']) for line in lines]
+    assert keys == sorted(keys)
+    assert lines[-1]['record_type'] == 'weather' and lines[-1]['data'] == {'temperatura': 21.5}
+    # Registros con el mismo timestamp en el límite de un lote no se repiten ni se pierden
+    assert len({line['id'] for line in lines}) == len(records)
+
+def test_filters_apply_to_the_export(client, auth_headers, records):
+    response = _export(client, auth_headers, '?gzip=false&record_type=weather')
+    assert [json.loads(line)['record_type'] for line in response.get_data().decode().splitlines()] == ['weather']
+    assert _export(client, auth_headers, '?start_date=ayer').status_code == 400
+    assert _export(client, auth_headers, '?format=xml').status_code == 400
+
+def test_csv_export(client, auth_headers, records):
+    response = _export(client, auth_headers, '?format=csv&gzip=false')
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'].endswith('.csv')
+    rows = list(csv.DictReader(io.StringIO(response.get_data().decode())))
+    assert len(rows) == len(records)
+    assert json.loads(rows[0]['data'])['texto'] == 'línea, con "comillas"'
+    assert rows[-1]['temperatura'] == '21.5' and rows[0]['temperatura'] == ''
+
+def test_gzip_is_negotiated_or_forced(client, auth_headers, records):
+    plain = _export(client, auth_headers, '?gzip=false').get_data()
+    negotiated = _export(client, auth_headers, **{'Accept-Encoding': 'gzip'})
+    assert negotiated.headers['Content-Encoding'] == 'gzip'
+    assert negotiated.headers['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(negotiated.get_data()) == plain
+    forced = _export(client, auth_headers, '?gzip=true&format=csv')
+    assert forced.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(forced.get_data()).decode().startswith('id,timestamp,record_type,data')
+    assert 'Content-Encoding' not in _export(client, auth_headers, '?gzip=false', **{'Accept-Encoding': 'gzip'}).headers
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from app.utils.http_client import UpstreamClient, CircuitOpenError
+
+class StubUpstream:
+    """Servidor HTTP local que responde, en orden, con las respuestas programadas (200 JSON al agotarse)."""
+
+    def __init__(self):
+        self.responses = []
+        self.calls = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.calls += 1
+                status, body, content_type = stub.responses.pop(0) if stub.responses else \
+                    (200, json.dumps({'ok': True}), 'application/json')
+                body = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/data'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def queue(self, *statuses, body='{}', content_type='application/json'):
+        self.responses += [(status, body, content_type) for status in statuses]
+
+@pytest.fixture
+def upstream():
+    stub = StubUpstream()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+def _client(**overrides):
+    options = dict(max_retries=2, backoff_base=0.001, backoff_max=0.001, failure_threshold=2, reset_timeout=0.2)
+    options.update(overrides)
+    return UpstreamClient('test', **options)
+
+def test_transient_errors_are_retried(upstream):
+    upstream.queue(503, 502)
+    client = _client()
+    assert client.get_json(upstream.url) == {'ok': True}
+    assert upstream.calls == 3
+    assert client.breaker.state == 'closed'
+
+def test_client_errors_are_not_retried(upstream):
+    upstream.queue(404)
+    client = _client()
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_json(upstream.url)
+    assert upstream.calls == 1
+    assert client.breaker.state == 'closed'
+
+def test_circuit_opens_after_consecutive_failures(upstream):
+    upstream.queue(*[503] * 4)
+    client = _client(max_retries=1)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_json(upstream.url)
+    assert client.breaker.state == 'open'
+    calls = upstream.calls
+    with pytest.raises(CircuitOpenError):
+        client.get_json(upstream.url)
+    assert upstream.calls == calls
+
+def test_half_open_probe_closes_on_success(upstream):
+    upstream.queue(503, 503)
+    client = _client(max_retries=0)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_json(upstream.url)
+    assert client.breaker.state == 'open'
+    time.sleep(0.25)
+    assert client.get_json(upstream.url) == {'ok': True}
+    assert client.breaker.state == 'closed'
+
+def test_half_open_probe_reopens_on_failure(upstream):
+    upstream.queue(503, 503, 503)
+    client = _client(max_retries=0)
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_json(upstream.url)
+    time.sleep(0.25)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get_json(upstream.url)
+    assert client.breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        client.get_json(upstream.url)
+
+def test_invalid_body_on_half_open_probe_does_not_block_the_circuit():
+    client = _client(max_retries=0)
+    closed = StubUpstream()
+    closed.server.shutdown()
+    closed.server.server_close()
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get_json(closed.url)
+    assert client.breaker.state == 'open'
+
+    stub = StubUpstream()
+    try:
+        stub.queue(200, body='<html>error</html>', content_type='text/html')
+        time.sleep(0.25)
+        with pytest.raises(ValueError):
+            client.get_json(stub.url)
+        assert client.breaker.state == 'open'
+        time.sleep(0.25)
+        assert client.get_json(stub.url) == {'ok': True}
+        assert client.breaker.state == 'closed'
+    finally:
+        stub.server.shutdown()
+        stub.server.server_close()
@@ -0,0 +1,97 @@
+import time
+import pytest
+from app.services.leader import DatabaseLease, RedisLease, LeaderElector
+
+TTL = 0.5
+RENEW = 0.05
+
+def _wait_for(condition, timeout=3):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(RENEW)
+    return False
+
+def _crash(elector):
+    # Un proceso caído deja de renovar sin liberar la concesión
+    elector._stop.set()
+    elector._thread.join()
+
+def _check_failover(first_lease, second_lease):
+    first = LeaderElector(first_lease, TTL, RENEW).start()
+    second = LeaderElector(second_lease, TTL, RENEW).start()
+    ran = []
+    try:
+        assert first.is_leader and not second.is_leader
+        second.leader_only(lambda: ran.append('second'))()
+        assert ran == []
+        # Mientras el líder renueva, el otro no la toma aunque pase el TTL
+        time.sleep(TTL * 2)
+        assert first.is_leader and not second.is_leader
+
+        _crash(first)
+        assert _wait_for(lambda: second.is_leader)
+        second.leader_only(lambda: ran.append('second'))()
+        assert ran == ['second']
+
+        # Al pararse de forma ordenada libera la concesión y el siguiente la toma enseguida
+        second.stop()
+        third = LeaderElector(first_lease, TTL, RENEW).start()
+        assert third.is_leader
+        third.stop()
+    finally:
+        first.stop()
+        second.stop()
+
+def test_database_lease_failover(app):
+    _check_failover(DatabaseLease(app, 'scheduler'), DatabaseLease(app, 'scheduler'))
+
+def test_redis_lease_failover(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda url: fakeredis.FakeRedis(server=server))
+    _check_failover(RedisLease('redis://fake', 'scheduler'), RedisLease('redis://fake', 'scheduler'))
+
+def test_redis_lease_only_holder_renews_or_releases(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda url: fakeredis.FakeRedis(server=server))
+    lease = RedisLease('redis://fake', 'scheduler')
+    assert lease.acquire('a', 30)
+    assert not lease.acquire('b', 30)
+    lease.release('b')
+    assert lease.acquire('a', 30)
+    lease.release('a')
+    assert lease.acquire('b', 30)
+
+class _NeverLease:
+    def acquire(self, holder, ttl):
+        return False
+
+    def release(self, holder):
+        pass
+
+def test_followers_still_prewarm_their_hot_keys(app, monkeypatch):
+    import app as app_module
+    from app.services import leader
+    from app.utils import swr_cache
+    prewarmed = []
+    monkeypatch.setattr(app_module, 'SCHEDULER_MODE', 'leader')
+    monkeypatch.setattr(app_module, 'REDIS_URL', 'redis://cache:6379/0')
+    monkeypatch.setattr(leader, 'create_elector', lambda app, name='scheduler': LeaderElector(_NeverLease(), TTL, 60))
+    monkeypatch.setattr(swr_cache, 'prewarm_caches', prewarmed.append)
+    scheduler = app_module.start_scheduler(app)
+    try:
+        scheduler.pause()
+        for job in scheduler.get_jobs():
+            job.func()
+        # Solo el precalentamiento corre fuera del líder: las claves frecuentes son de cada proceso
+        assert prewarmed == [app]
+    finally:
+        scheduler.shutdown(wait=False)
+        app.config['LEADER_ELECTOR'].stop()
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+from app.models import migrations
+from app.models.data_models import db, Record, SchemaMigration, User
+from app.models.migrations import TYPED_METRICS_BACKFILL, backfill_typed_metrics, upgrade_schema
+
+def test_typed_metrics_backfill_runs_once(app):
+    with app.app_context():
+        # Base de datos anterior a las columnas tipadas: sin marca y registros solo con JSON
+        db.session.delete(db.session.get(SchemaMigration, TYPED_METRICS_BACKFILL))
+        user = User(username='legacy', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all([
+            Record(record_type='weather', data='{"temperatura": 21.5, "humedad": "60"}', user_id=user.id),
+            Record(record_type='weather', data='{"descripcion": "nublado"}', user_id=user.id),
+        ])
+        db.session.commit()
+
+        assert backfill_typed_metrics() == 2
+        records = Record.query.order_by(Record.id).all()
+        assert (records[0].temperatura, records[0].humedad) == (21.5, 60.0)
+        assert records[1].temperatura is None
+
+        # El registro sin métricas numéricas no se vuelve a reescribir en cada arranque
+        assert backfill_typed_metrics() == 0
+        upgrade_schema()
+        assert backfill_typed_metrics() == 0
+
+def test_existing_sqlite_database_is_not_vacuumed_without_opt_in(app, monkeypatch):
+    with app.app_context():
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('PRAGMA auto_vacuum=NONE')
+            connection.exec_driver_sql('VACUUM')
+        statements = []
+        monkeypatch.setattr(migrations, 'SQLITE_VACUUM_ON_UPGRADE', False)
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert migrations.enable_incremental_vacuum() is False
+            assert 'VACUUM' not in statements
+
+            monkeypatch.setattr(migrations, 'SQLITE_VACUUM_ON_UPGRADE', True)
+            assert migrations.enable_incremental_vacuum() is True
+            assert 'VACUUM' in statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
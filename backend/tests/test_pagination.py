@@ -0,0 +1,53 @@
+import datetime
+import json
+import pytest
+from app.utils.pagination import decode_cursor, encode_cursor
+
+@pytest.fixture
+def records(client, auth_headers):
+    """12 registros, varios con el mismo timestamp para probar el desempate por id."""
+    rows = [{'record_type': 'note' if n % 3 else 'weather', 'data': {'n': n},
+             'timestamp': f'2026-01-01T00:{n // 3:02d}:00'} for n in range(12)]
+    client.post('/api/database/records/bulk', data=json.dumps(rows),
+                headers={**auth_headers, 'Content-Type': 'application/json'})
+    return rows
+
+def _get(client, auth_headers, query):
+    return client.get('/api/database/records' + query, headers=auth_headers)
+
+def test_cursor_round_trip_and_invalid_cursors():
+    timestamp = datetime.datetime(2026, 1, 1, 12, 30, 15, 250000)
+    assert decode_cursor(encode_cursor(timestamp, 42)) == (timestamp, 42)
+    for cursor in ('', 'no-es-un-cursor', encode_cursor(timestamp, 42)[:-3]):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+def test_cursor_pages_cover_every_record_once_newest_first(client, auth_headers, records):
+    seen = []
+    after = ''
+    pages = 0
+    while after is not None:
+        body = _get(client, auth_headers, f'?per_page=5&after={after}').get_json()
+        assert body['total'] is None and body['page'] is None
+        seen += body['records']
+        after = body['next_cursor']
+        pages += 1
+    assert pages == 3
+    assert len({record['id'] for record in seen}) == len(records)
+    keys = [(record['timestamp'], record['id']) for record in seen]
+    assert keys == sorted(keys, reverse=True)
+
+def test_cursor_pages_respect_filters(client, auth_headers, records):
+    first = _get(client, auth_headers, '?record_type=weather&per_page=3&after=').get_json()
+    second = _get(client, auth_headers, f'?record_type=weather&per_page=3&after={first["next_cursor"]}').get_json()
+    assert [record['data']['n'] for record in first['records'] + second['records']] == [9, 6, 3, 0]
+    assert second['next_cursor'] is None
+
+def test_page_mode_and_count_modes(client, auth_headers, records):
+    body = _get(client, auth_headers, '?page=2&per_page=5').get_json()
+    assert (body['total'], body['pages'], body['page'], body['next_cursor']) == (12, 3, 2, None)
+    assert _get(client, auth_headers, '?per_page=5&after=&count=exact').get_json()['total'] == 12
+    assert _get(client, auth_headers, '?count=estimate').get_json()['total'] == 12
+    assert _get(client, auth_headers, '?count=none').get_json()['total'] is None
+    assert _get(client, auth_headers, '?count=sometimes').status_code == 400
+    assert _get(client, auth_headers, '?after=basura').status_code == 400
@@ -0,0 +1,43 @@
+import json
+import pytest
+from app.models.data_models import db, User, typed_metric_values
+from app.services.change_feed import insert_records
+
+def test_write_from_another_worker_changes_etag_and_body(app, client, auth_headers):
+    first = client.get('/api/database/records', headers=auth_headers)
+    assert first.get_json()['total'] == 0
+
+    # Escritura confirmada por otro proceso: no pasa por ninguna invalidación local
+    with app.app_context():
+        user_id = User.query.filter_by(username='tester').first().id
+        data = {'temperatura': 21.0}
+        insert_records([dict(typed_metric_values('weather', data), record_type='weather',
+                             data=json.dumps(data), user_id=user_id)])
+        db.session.commit()
+
+    second = client.get('/api/database/records', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.get_json()['total'] == 1
+    assert second.headers['ETag'] != first.headers['ETag']
+
+    third = client.get('/api/database/records', headers={**auth_headers, 'If-None-Match': second.headers['ETag']})
+    assert third.status_code == 304
+
+def test_series_follows_the_records_version(app, client, auth_headers):
+    url = '/api/database/records/series?metric=temperatura'
+    assert client.get(url, headers=auth_headers).get_json()['total'] == 0
+    client.post('/api/database/records', headers=auth_headers,
+                json={'record_type': 'weather', 'data': {'temperatura': 20.0}})
+    assert client.get(url, headers=auth_headers).get_json()['total'] == 1
+
+def test_redis_store_round_trips_without_pickle(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    import redis
+    from app.utils.result_cache import RedisResultStore
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, 'from_url', lambda url: fakeredis.FakeRedis(server=server))
+    store = RedisResultStore('redis://fake', 60)
+    store.set('1:5:page=1', (2, b'{"records":[]}\n'))
+    assert store.get('1:5:page=1') == (2, b'{"records":[]}\n')
+    assert store.get('1:6:page=1') is None
+    assert fakeredis.FakeRedis(server=server).get('records_cache:1:5:page=1') == b'2\n{"records":[]}\n'
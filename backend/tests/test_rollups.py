@@ -0,0 +1,17 @@
+import datetime
+from app.models.data_models import db, RecordRollup
+from app.services.rollup_service import numeric_metrics, update_rollups
+
+def test_numeric_metrics_skips_non_finite_values_and_long_names():
+    data = {'temperatura': 20, 'nan': float('nan'), 'inf': float('-inf'), 'huge': 10 ** 400,
+            'flag': True, 'texto': '3', 'x' * 51: 1.0, 'y' * 50: 2.0}
+    assert numeric_metrics(data) == {'temperatura': 20.0, 'y' * 50: 2.0}
+
+def test_update_rollups_ignores_invalid_metrics(app):
+    timestamp = datetime.datetime(2026, 1, 1, 12, 0, 30)
+    with app.app_context():
+        update_rollups([(1, 'weather', timestamp, {'temperatura': 20.0, 'humedad': float('nan'), 'k' * 80: 1}),
+                        (1, 'weather', timestamp, {'temperatura': 22.0})])
+        db.session.commit()
+        rollups = RecordRollup.query.filter_by(bucket='1m').all()
+        assert [(r.metric, r.count, r.min_value, r.max_value) for r in rollups] == [('temperatura', 2, 20.0, 22.0)]
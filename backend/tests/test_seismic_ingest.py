@@ -0,0 +1,111 @@
+"""Ingesta incremental de USGS contra un servidor local que sirve un feed grabado (tests/fixtures)."""
+import datetime
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from app.models.data_models import db, IngestState, SeismicEvent
+from app.services import seismic_service
+from app.utils import seismic_api
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'usgs_feed.json')
+
+class RecordedUSGS:
+    """Responde como el endpoint de consulta de USGS (updatedafter, orderby=time-asc, limit/offset)."""
+
+    def __init__(self):
+        with open(FIXTURE) as f:
+            self.feed = json.load(f)
+        self.fail_offsets = set()
+        self.requests = []
+        usgs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {name: values[0] for name, values in parse_qs(urlparse(self.path).query).items()}
+                usgs.requests.append(params)
+                offset, limit = int(params['offset']), int(params['limit'])
+                if offset in usgs.fail_offsets:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                features = usgs.feed['features']
+                if 'updatedafter' in params:
+                    after = datetime.datetime.fromisoformat(params['updatedafter'])
+                    features = [f for f in features
+                                if seismic_service._from_epoch_ms(f['properties']['updated']) > after]
+                features = sorted(features, key=lambda f: f['properties']['time'])[offset - 1:offset - 1 + limit]
+                body = json.dumps(dict(usgs.feed, features=features)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/fdsnws/event/1/query'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def feature(self, event_id):
+        return next(f for f in self.feed['features'] if f['id'] == event_id)
+
+@pytest.fixture
+def usgs(monkeypatch):
+    stub = RecordedUSGS()
+    monkeypatch.setattr(seismic_api, 'USGS_BASE_URL', stub.url)
+    monkeypatch.setattr(seismic_service, 'SEISMIC_INGEST_PAGE_SIZE', 2)
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+def _stored(app):
+    with app.app_context():
+        return {event.id: event.magnitude for event in SeismicEvent.query}
+
+def test_ingests_every_page(app, usgs):
+    stats = seismic_service.ingest_seismic_events(app)
+    assert stats['upserted'] == 5
+    assert set(_stored(app)) == {f['id'] for f in usgs.feed['features']}
+    assert [int(params['offset']) for params in usgs.requests] == [1, 3, 5]
+    assert all(params['orderby'] == 'time-asc' for params in usgs.requests)
+
+def test_failed_run_does_not_advance_watermark(app, usgs):
+    # La segunda página falla: la primera queda guardada pero la marca de agua no avanza
+    usgs.fail_offsets = {3}
+    seismic_service.ingest_seismic_events(app)
+    assert set(_stored(app)) == {'us7000r1a1', 'us7000r1a2'}
+    with app.app_context():
+        assert db.session.get(IngestState, seismic_service.SEISMIC_INGEST_STATE) is None
+
+    # us7000r1a3 se actualizó antes que us7000r1a2: con la marca en el mayor `updated`
+    # de las páginas ya guardadas no volvería a pedirse nunca
+    usgs.fail_offsets = set()
+    usgs.requests.clear()
+    seismic_service.ingest_seismic_events(app)
+    assert set(_stored(app)) == {f['id'] for f in usgs.feed['features']}
+    assert 'updatedafter' not in usgs.requests[0]
+
+def test_next_run_fetches_only_updates_and_deletions(app, usgs):
+    seismic_service.ingest_seismic_events(app)
+    generated = usgs.feed['metadata']['generated']
+
+    updated = usgs.feature('us7000r1a3')
+    updated['properties'].update(mag=3.4, updated=generated + 60000)
+    removed = usgs.feature('us7000r1a5')
+    removed['properties'].update(status='deleted', updated=generated + 120000)
+    usgs.requests.clear()
+
+    stats = seismic_service.ingest_seismic_events(app)
+    assert (stats['upserted'], stats['deleted']) == (1, 1)
+    assert 'updatedafter' in usgs.requests[0]
+    stored = _stored(app)
+    assert stored['us7000r1a3'] == 3.4
+    assert 'us7000r1a5' not in stored
+
+    usgs.requests.clear()
+    assert seismic_service.ingest_seismic_events(app)['upserted'] == 0
@@ -0,0 +1,55 @@
+import datetime
+import json
+import pytest
+from app.utils import serialization
+from app.utils.serialization import RawJSON, dumps
+
+@pytest.fixture(params=['orjson', 'orjson_placeholder', 'stdlib'])
+def encoder(request, monkeypatch):
+    """Cada camino de `dumps`: orjson con Fragment, orjson con marcadores y json estándar."""
+    if request.param != 'stdlib' and serialization.orjson is None:
+        pytest.skip('orjson is not installed')
+    if request.param == 'orjson' and serialization._Fragment is None:
+        pytest.skip('this orjson version has no Fragment')
+    if request.param == 'orjson_placeholder':
+        monkeypatch.setattr(serialization, '_Fragment', None)
+    if request.param == 'stdlib':
+        monkeypatch.setattr(serialization, 'orjson', None)
+        monkeypatch.setattr(serialization, '_Fragment', None)
+    return request.param
+
+def test_nested_raw_fragments_are_spliced_in_order(encoder):
+    payload = {
+        'records': [
+            {'id': 1, 'data': RawJSON('{"temperatura": 21.5, "tags": ["a", "b"]}')},
+            {'id': 2, 'data': RawJSON('[1, {"x": null}]')},
+        ],
+        'extra': {'deep': [RawJSON('"texto con \\"comillas\\""')]},
+        'last': RawJSON('3'),
+    }
+    assert json.loads(dumps(payload)) == {
+        'records': [{'id': 1, 'data': {'temperatura': 21.5, 'tags': ['a', 'b']}},
+                    {'id': 2, 'data': [1, {'x': None}]}],
+        'extra': {'deep': ['texto con "comillas"']},
+        'last': 3,
+    }
+
+def test_null_and_empty_data_become_null(encoder):
+    assert json.loads(dumps({'a': RawJSON(None), 'b': RawJSON(''), 'c': RawJSON('null')})) == \
+        {'a': None, 'b': None, 'c': None}
+
+def test_fragment_text_is_not_reencoded(encoder):
+    # El fragmento se incrusta byte a byte, sin normalizar espacios ni escapes
+    output = dumps({'data': RawJSON('{"ciudad": "San Jos\\u00e9"}')})
+    assert b'{"ciudad": "San Jos\\u00e9"}' in output
+
+def test_flask_types_and_indent(encoder):
+    output = dumps({'when': datetime.datetime(2026, 1, 2, 3, 4, 5), 'raw': RawJSON('{"a": 1}')}, indent=True)
+    assert json.loads(output) == {'when': 'Fri, 02 Jan 2026 03:04:05 GMT', 'raw': {'a': 1}}
+    assert b'\n' in output
+
+def test_jsonify_uses_raw_fragments(app):
+    from flask import jsonify
+    with app.test_request_context():
+        response = jsonify({'data': RawJSON('{"a": [1, 2]}')})
+    assert response.get_json() == {'data': {'a': [1, 2]}}
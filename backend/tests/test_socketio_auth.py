@@ -0,0 +1,45 @@
+import datetime
+import jwt
+from app import socketio
+from app.core.config import SECRET_KEY
+from app.events import notify_database_change, notify_weather_update
+
+def _token(user_id, expires_in):
+    return jwt.encode({'user_id': user_id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)},
+                      SECRET_KEY, algorithm='HS256')
+
+def _events(client, name):
+    return [message['args'][0] for message in client.get_received() if message['name'] == name]
+
+def test_expired_token_keeps_public_topics(app, monkeypatch):
+    monkeypatch.setattr('app.events.coalescer.window', 0)
+    client = socketio.test_client(app, auth={'token': _token(1, -60)})
+    assert client.is_connected()
+    assert _events(client, 'auth_error')
+
+    notify_weather_update({'city': 'Liberia', 'temperatura': 25})
+    notify_database_change('weather', 'create', {'id': 1}, user_id=1)
+    received = client.get_received()
+    assert [message['name'] for message in received] == ['weather_update']
+    client.disconnect()
+
+def test_valid_token_joins_user_room(app, monkeypatch):
+    monkeypatch.setattr('app.events.coalescer.window', 0)
+    client = socketio.test_client(app, auth={'token': _token(7, 3600), 'topics': []})
+    assert not _events(client, 'auth_error')
+
+    notify_database_change('weather', 'create', {'id': 1}, user_id=7)
+    assert [message['name'] for message in client.get_received()] == ['database_update']
+    client.disconnect()
+
+def test_emit_bytes_are_measured_from_the_encoded_packet(app):
+    from prometheus_client import REGISTRY
+    from socketio import packet
+    sample = lambda: REGISTRY.get_sample_value('socketio_emit_payload_bytes_total', {'event': 'weather_update'}) or 0
+    before = sample()
+    # Lo que hace el gestor de salas una vez por emisión (el cliente de pruebas vuelve a codificar)
+    encoded = packet.Packet(packet.EVENT, data=['weather_update', {'city': 'Liberia', 'temperatura': 25}]).encode()
+    assert sample() - before == len(encoded) - 1
+    # Los acks no son eventos y no se cuentan
+    packet.Packet(packet.ACK, data=[{'topics': ['weather']}], id=1).encode()
+    assert sample() - before == len(encoded) - 1
@@ -0,0 +1,53 @@
+import io
+from app.utils.streaming_json import iter_json_array, iter_ndjson
+
+def test_non_finite_constants_are_row_errors():
+    body = b'[{"x": 1}, {"x": NaN}, {"x": [Infinity]}, {"x": -Infinity}, {"x": 2}]'
+    rows = list(iter_json_array(io.BytesIO(body), chunk_size=7))
+    assert [(row, value) for row, value, error in rows if error is None] == [(1, {'x': 1}), (5, {'x': 2})]
+    assert [(row, error) for row, _, error in rows if error is not None] == [
+        (2, 'invalid JSON: NaN is not a valid JSON number'),
+        (3, 'invalid JSON: Infinity is not a valid JSON number'),
+        (4, 'invalid JSON: -Infinity is not a valid JSON number'),
+    ]
+
+def test_ndjson_rejects_non_finite_constants():
+    rows = list(iter_ndjson(io.BytesIO(b'{"x": 1}\n{"x": NaN}\n')))
+    assert rows[0] == (1, {'x': 1}, None)
+    assert rows[1][0] == 2 and rows[1][1] is None and 'NaN' in rows[1][2]
+
+def _array(body, **kwargs):
+    return list(iter_json_array(io.BytesIO(body), **kwargs))
+
+def test_array_elements_split_across_chunks():
+    body = ' [ {"ciudad": "San José", "n": 12345}, 67890 ,"ñandú", [1, [2]] ,null ] '.encode()
+    expected = [(1, {'ciudad': 'San José', 'n': 12345}, None), (2, 67890, None), (3, 'ñandú', None),
+                (4, [1, [2]], None), (5, None, None)]
+    # chunk_size=1 corta números, cadenas y caracteres UTF-8 de varios bytes
+    for chunk_size in (1, 2, 3, 7, 64 * 1024):
+        assert _array(body, chunk_size=chunk_size) == expected
+
+def test_empty_array_and_body_shape_errors():
+    assert _array(b'[]') == []
+    assert _array(b'') == []
+    assert _array(b'{"a": 1}') == [(1, None, 'body must be a JSON array or NDJSON')]
+    assert _array(b'[1, 2') == [(1, 1, None), (2, 2, None), (3, None, 'unexpected end of body: array is not closed')]
+    assert _array(b'[1 2]') == [(1, 1, None), (2, None, "invalid JSON: expected ',' or ']'")]
+
+def test_syntax_error_stops_at_the_current_row():
+    rows = _array(b'[{"a": 1}, {"a": }, {"a": 3}]', chunk_size=4)
+    assert rows[0] == (1, {'a': 1}, None)
+    assert rows[1][0] == 2 and rows[1][2].startswith('invalid JSON')
+    assert len(rows) == 2
+
+def test_element_larger_than_the_limit():
+    body = b'[{"a": "' + b'x' * 100 + b'"}, 1]'
+    assert _array(body, chunk_size=8, max_element=50) == [(1, None, 'element exceeds 50 bytes')]
+
+def test_ndjson_rows_blank_lines_and_long_lines():
+    body = b'{"a": 1}\n\n  \n[2]\nnot json\n' + b'"' + b'x' * 40 + b'"\n{"a": 5}'
+    rows = list(iter_ndjson(io.BytesIO(body), max_line=20))
+    assert rows[:2] == [(1, {'a': 1}, None), (2, [2], None)]
+    assert rows[2][0] == 3 and rows[2][2].startswith('invalid JSON')
+    assert rows[3] == (4, None, 'line exceeds 20 bytes')
+    assert rows[4] == (5, {'a': 5}, None)
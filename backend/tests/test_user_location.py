@@ -0,0 +1,33 @@
+import datetime
+from app.models.data_models import User
+from app.services.compression import compressor
+
+def _weather(user_id, minutes, value):
+    return [(user_id, 'weather', datetime.datetime(2026, 1, 1) + datetime.timedelta(minutes=minutes), {'temperatura': value})]
+
+def test_changing_or_deleting_location_resets_compression_series(app, client, auth_headers):
+    with app.app_context():
+        user_id = User.query.filter_by(username='tester').first().id
+    # El compresor es global: se descarta el estado que hayan dejado otras pruebas
+    compressor.forget([(user_id, 'weather', None, None)])
+    assert client.put('/api/users/location', json={'city': 'Madrid', 'country': 'ES'}, headers=auth_headers).status_code == 200
+    compressor.compress(_weather(user_id, 0, 20))
+    assert compressor.compress(_weather(user_id, 1, 20.1)) == []
+
+    # Repetir la misma ubicación no corta la serie
+    client.put('/api/users/location', json={'city': 'madrid', 'country': 'es'}, headers=auth_headers)
+    assert compressor.compress(_weather(user_id, 2, 20.2)) == []
+
+    client.put('/api/users/location', json={'city': 'Lima', 'country': 'PE'}, headers=auth_headers)
+    assert compressor.compress(_weather(user_id, 3, 20.3)) == _weather(user_id, 3, 20.3)
+    assert compressor.compress(_weather(user_id, 4, 20.4)) == []
+
+    assert client.delete('/api/users/location', headers=auth_headers).status_code == 200
+    assert compressor.compress(_weather(user_id, 5, 20.5)) == _weather(user_id, 5, 20.5)
+
+    # La lectura retenida de cada serie cortada se guarda al cambiar o borrar la ubicación
+    records = client.get('/api/database/records', headers=auth_headers).get_json()['records']
+    assert [(record['timestamp'], record['data']) for record in records] == [
+        ('2026-01-01T00:04:00', {'temperatura': 20.4}),
+        ('2026-01-01T00:02:00', {'temperatura': 20.2}),
+    ]
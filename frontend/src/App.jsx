@@ -15,8 +15,10 @@ function App() {
   // Configurar Socket.IO para recibir actualizaciones en tiempo real
   useEffect(() => {
     // Conectar al servidor Socket.IO
+    // El token (si existe) une al cliente a la sala de su usuario
     const socket = io('http://localhost:5000', {
       transports: ['websocket'],
+      auth: { token: localStorage.getItem('userToken') || undefined },
       reconnection: true,
       reconnectionAttempts: 5,
       reconnectionDelay: 1000
@@ -36,25 +38,44 @@ function App() {
     });
 
     // Escuchar actualizaciones de clima
-    socket.on('weather_update', (data) => {
+    const handleWeatherUpdate = (data) => {
       console.log('Recibida actualización de clima:', data);
       // Actualiza el estado de la aplicación con los nuevos datos
       toast.info(`Datos del clima actualizados para ${data.city}`);
-    });
+    };
 
     // Escuchar actualizaciones de base de datos
-    socket.on('database_update', (data) => {
+    const handleDatabaseUpdate = (data) => {
       console.log('Recibida actualización de base de datos:', data);
       // Actualizar UI según el tipo de actualización
       const { record_type, action } = data;
       
       if (action === 'create') {
         toast.success(`Nuevo registro de ${record_type} creado`);
+      } else if (action === 'bulk_create') {
+        toast.success(`${data.data.count} registros de ${record_type} creados`);
       } else if (action === 'delete') {
         toast.info(`Registro de ${record_type} eliminado`);
       } else if (action === 'update') {
         toast.info(`Datos de ${record_type} actualizados`);
       }
+    };
+
+    socket.on('weather_update', handleWeatherUpdate);
+    socket.on('database_update', handleDatabaseUpdate);
+
+    // El servidor agrupa las ráfagas de eventos en un único mensaje *_batch
+    socket.on('weather_update_batch', ({ events }) => {
+      handleWeatherUpdate(events[events.length - 1]);
+    });
+    socket.on('database_update_batch', ({ events }) => {
+      const changes = events.filter(({ action }) => action !== 'read');
+      if (changes.length === 1) {
+        handleDatabaseUpdate(changes[0]);
+      } else if (changes.length > 1) {
+        console.log('Recibido lote de actualizaciones de base de datos:', events);
+        toast.info(`${changes.length} registros actualizados`);
+      }
     });
 
     // Limpiar conexión al desmontar
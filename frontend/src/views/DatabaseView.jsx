@@ -165,8 +165,12 @@ function DatabaseView() {
     }
   };
 
-  // Función para parsear data (si es un JSON string) y retornarla como objeto
+  // Función para parsear data y retornarla como objeto (la API ya la envía como objeto;
+  // se mantiene el parseo para respuestas antiguas en las que llegaba como JSON string)
   const parseRecordData = (recordData) => {
+    if (typeof recordData !== 'string') {
+      return recordData;
+    }
     try {
       return JSON.parse(recordData);
     } catch (e) {